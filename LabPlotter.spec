@@ -6,7 +6,8 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('react_build', 'react_build')],
-    hiddenimports=['originpro', 'pythoncom', 'win32timezone', 'flask_cors'],
+    hiddenimports=['originpro', 'pythoncom', 'win32timezone', 'flask_cors',
+                   'loaders', 'processing', 'render_plan', 'pptx_export', 'parse_cache', 'live_tail', 'route_plans', 'project_saver', 'analytics', 'preview'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
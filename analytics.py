@@ -0,0 +1,265 @@
+import numpy as np
+import pandas as pd
+
+# --- Curve Analytics ---
+# Every curve of a job is packed into one flat array (sorted by T inside
+# each curve), so smoothing, derivatives, transition temperatures and
+# cooling/warming comparisons are a fixed number of NumPy passes whatever
+# the number of groups, channels and sweeps.
+SMOOTH_POINTS = 11
+NORMAL_WINDOW = 10.0
+TC_LEVELS = {'tc_onset': 0.9, 'tc_mid': 0.5, 'tc_zero': 0.01}
+GRID_POINTS = 200
+SPLIT_FRACTION = 0.02
+
+def pack(curves):
+    """
+    [(x, y)] -> (x, y, seg, starts, counts): NaN points dropped, each curve
+    sorted by x and laid out one after another; seg is the curve of each point.
+    """
+    counts = np.array([len(x) for x, _ in curves], dtype=np.int64)
+    seg = np.repeat(np.arange(len(curves)), counts)
+    x = np.concatenate([np.asarray(x, dtype=np.float64) for x, _ in curves]) if curves else np.empty(0)
+    y = np.concatenate([np.asarray(y, dtype=np.float64) for _, y in curves]) if curves else np.empty(0)
+    ok = np.isfinite(x) & np.isfinite(y)
+    if not ok.all():
+        x, y, seg = x[ok], y[ok], seg[ok]
+        counts = np.bincount(seg, minlength=len(curves))
+    starts = np.cumsum(counts) - counts
+    # Sweeps arrive monotonic in T: reverse the falling ones and only sort
+    # when something is still out of order.
+    live = counts > 0
+    falling = np.zeros(len(curves), dtype=bool)
+    falling[live] = x[starts[live]] > x[(starts + counts - 1)[live]]
+    if falling.any():
+        flip = falling[seg]
+        pos = np.flatnonzero(flip)
+        src = (2 * starts[seg[pos]] + counts[seg[pos]] - 1) - pos
+        x[pos], y[pos] = x[src], y[src]
+    if len(x) > 1 and ((x[1:] < x[:-1]) & (seg[1:] == seg[:-1])).any():
+        order = np.lexsort((x, seg))
+        x, y = x[order], y[order]
+    return x, y, seg, starts, counts
+
+def _edges(starts, counts, width):
+    """Flat indices within `width` rows of either end of each curve."""
+    near = np.concatenate([np.arange(width), -np.arange(width, 0, -1)])
+    idx = np.where(near >= 0, starts[:, None] + near, (starts + counts)[:, None] + near)
+    keep = (idx >= starts[:, None]) & (idx < (starts + counts)[:, None])
+    return np.unique(idx[keep])
+
+def _reduce(ufunc, values, starts, counts, empty=np.nan):
+    """ufunc.reduceat per curve; `empty` for curves without points."""
+    out = np.full(len(counts), empty, dtype=np.result_type(values, type(empty)))
+    live = counts > 0
+    if live.any(): out[live] = ufunc.reduceat(values, starts[live])
+    return out
+
+def _first(match, seg, n):
+    """Index of the first True per curve, -1 where there is none."""
+    hits = np.flatnonzero(match)
+    out = np.full(n, -1)
+    curves, first = np.unique(seg[hits], return_index=True)
+    out[curves] = hits[first]
+    return out
+
+def _last(match, seg, n):
+    hits = np.flatnonzero(match)
+    out = np.full(n, -1)
+    out[seg[hits]] = hits  # later hits overwrite earlier ones
+    return out
+
+def smooth(y, seg, starts, counts, points=SMOOTH_POINTS):
+    """Centred moving average of `points` points that never reaches across curves."""
+    half = points // 2
+    total = np.concatenate(([0.0], np.cumsum(y)))
+    out = np.empty(len(y))
+    if len(y) > 2 * half:
+        out[half:len(y) - half] = (total[2 * half + 1:] - total[:len(y) - 2 * half]) / (2 * half + 1)
+    # Rows near a curve end average over what the curve has on that side.
+    pos = _edges(starts, counts, half)
+    lo = np.maximum(pos - half, starts[seg[pos]])
+    hi = np.minimum(pos + half + 1, starts[seg[pos]] + counts[seg[pos]])
+    out[pos] = (total[hi] - total[lo]) / (hi - lo)
+    return out
+
+def derivative(x, y, seg, starts, counts):
+    """dy/dx from central differences, one-sided at curve ends; NaN where x repeats."""
+    d = np.full(len(y), np.nan)
+    pos = _edges(starts, counts, 1)
+    prev = np.maximum(pos - 1, starts[seg[pos]])
+    nxt = np.minimum(pos + 1, starts[seg[pos]] + counts[seg[pos]] - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if len(y) > 2: d[1:-1] = (y[2:] - y[:-2]) / (x[2:] - x[:-2])
+        d[pos] = (y[nxt] - y[prev]) / (x[nxt] - x[prev])
+    d[~np.isfinite(d)] = np.nan
+    return d
+
+def _crossing(x, ys, seg, level, lv, inside):
+    """
+    Highest x per curve where the smoothed curve rises through `level`
+    (per curve; `lv` per row) on rows where `inside` holds.
+    """
+    n = len(level)
+    if len(x) < 2: return np.full(n, np.nan)
+    up = inside[1:] & (ys[:-1] < lv[:-1]) & (ys[1:] >= lv[:-1]) & (seg[:-1] == seg[1:])
+    i = _last(np.concatenate((up, [False])), seg, n)
+    out = np.full(n, np.nan)
+    ok = i >= 0
+    j = i[ok]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[ok] = x[j] + (level[ok] - ys[j]) * (x[j + 1] - x[j]) / (ys[j + 1] - ys[j])
+    return out
+
+def analyze_curves(curves, resistive, smooth_points=SMOOTH_POINTS, window=NORMAL_WINDOW, levels=TC_LEVELS):
+    """
+    Per-curve results for [(T, y)] as a dict of arrays. Resistive curves
+    get a normal-state resistance (highest smoothed R within `window` K
+    above the steepest point) and the temperatures where R falls to each
+    fraction of it in `levels`. Every curve gets a normalization factor:
+    R_n for resistive curves, max |y| otherwise.
+    Also returns the flat packed arrays used, for interpolation.
+    """
+    n = len(curves)
+    resistive = np.asarray(resistive, dtype=bool)
+    x, y, seg, starts, counts = pack(curves)
+    ys = smooth(y, seg, starts, counts, smooth_points)
+    d = derivative(x, ys, seg, starts, counts)
+    out = {'points': counts, 't_min': _reduce(np.minimum, x, starts, counts),
+           't_max': _reduce(np.maximum, x, starts, counts)}
+    d_max = _reduce(np.fmax, d, starts, counts)
+    peak = _first(d == d_max[seg], seg, n)
+    out['dydt_max'] = d_max
+    out['t_dydt_max'] = np.where(peak >= 0, x[np.maximum(peak, 0)] if len(x) else np.nan, np.nan)
+    limit = (out['t_dydt_max'] + window)[seg]
+    inside = x <= limit
+    near = inside & (x >= out['t_dydt_max'][seg])
+    r_n = _reduce(np.fmax, np.where(near, ys, np.nan), starts, counts)
+    r_n[~resistive | (r_n <= 0)] = np.nan
+    out['r_normal'] = r_n
+    r_rows = r_n[seg]
+    for name, frac in levels.items():
+        out[name] = _crossing(x, ys, seg, frac * r_n, frac * r_rows, inside)
+    scale = _reduce(np.fmax, np.abs(ys), starts, counts)
+    out['norm'] = np.where(resistive & np.isfinite(r_n), r_n, scale)
+    return out, (x, ys, seg, starts, counts)
+
+def _interp(packed, key, span, curve, grid):
+    """Smoothed values of curve[k] at grid[k, :] for many curves at once; key = x + seg * span."""
+    x, ys, seg, starts, counts = packed
+    q = grid + (curve * span)[:, None]
+    first, last = starts[curve][:, None], (starts[curve] + counts[curve] - 1)[:, None]
+    hi = np.clip(np.searchsorted(key, q), first + 1, last)
+    lo = hi - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = np.clip((q - key[lo]) / (key[hi] - key[lo]), 0.0, 1.0)
+    return ys[lo] + w * (ys[hi] - ys[lo])
+
+def compare_pairs(packed, pairs, stats, grid_points=GRID_POINTS, split=SPLIT_FRACTION):
+    """
+    Cooling/warming (FC/ZFC) comparisons for [(cooling curve, warming curve)]:
+    Tc shifts, the largest gap and the area between the curves over their
+    common T range, and the split point: the highest T where they differ by
+    more than `split` of the larger curve's range.
+    """
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    out = {}
+    for name in TC_LEVELS:
+        if name in stats: out[f'd{name}'] = stats[name][pairs[:, 1]] - stats[name][pairs[:, 0]]
+    cool, warm = pairs[:, 0], pairs[:, 1]
+    lo = np.maximum(stats['t_min'][cool], stats['t_min'][warm])
+    hi = np.minimum(stats['t_max'][cool], stats['t_max'][warm])
+    valid = (packed[4][cool] > 1) & (packed[4][warm] > 1) & (hi > lo)
+    out['t_split'] = np.full(len(pairs), np.nan)
+    out['max_diff'] = np.full(len(pairs), np.nan)
+    out['area'] = np.full(len(pairs), np.nan)
+    if not valid.any(): return out
+    steps = np.linspace(0.0, 1.0, grid_points)
+    grid = lo[valid, None] + (hi - lo)[valid, None] * steps
+    x, seg = packed[0], packed[2]
+    span = x.max() - x.min() + 1.0
+    key = x + seg * span  # globally increasing: curves laid out one after another
+    fc, zfc = _interp(packed, key, span, cool[valid], grid), _interp(packed, key, span, warm[valid], grid)
+    gap = np.abs(fc - zfc)
+    out['max_diff'][valid] = gap.max(axis=1)
+    out['area'][valid] = np.trapezoid(gap, grid, axis=1)
+    scale = np.maximum(np.ptp(fc, axis=1), np.ptp(zfc, axis=1))
+    apart = gap > split * scale[:, None]
+    top = grid_points - 1 - np.argmax(apart[:, ::-1], axis=1)
+    out['t_split'][valid] = np.where(apart.any(axis=1), grid[np.arange(len(grid)), top], np.nan)
+    return out
+
+# --- Render Plans ---
+def plan_curves(plan):
+    """
+    Every distinct plotted (sheet, x, y) of a RenderPlan with its sheet tags:
+    [{'sheet', 'x', 'y', 'group', 'sweep', 'resistive'}]. Only sheets tagged
+    kind='resistance' get the Tc criteria.
+    """
+    seen = {}
+    for graph in plan.graphs:
+        for p in graph['plots']:
+            key = (p['sheet'], p['x'], p['y'])
+            if key in seen: continue
+            spec = plan.sheets[p['sheet']]
+            tags = spec.get('tags', {})
+            seen[key] = {'sheet': spec['name'], 'index': p['sheet'], 'x': spec['df'].columns[p['x']],
+                         'y': spec['df'].columns[p['y']], 'group': tags.get('group'), 'sweep': tags.get('sweep'),
+                         'resistive': tags.get('kind') == 'resistance'}
+    return list(seen.values())
+
+def _pairs(curves):
+    """Match the n-th cooling curve with the n-th warming curve of the same column and group."""
+    lanes = {}
+    for i, c in enumerate(curves):
+        if c['sweep'] in ('cooling', 'warming'):
+            lanes.setdefault((c['y'], c['group']), {'cooling': [], 'warming': []})[c['sweep']].append(i)
+    return [(a, b) for lane in lanes.values() for a, b in zip(lane['cooling'], lane['warming'])]
+
+def _clean(value):
+    if isinstance(value, (float, np.floating)): return None if not np.isfinite(value) else float(value)
+    if isinstance(value, np.integer): return int(value)
+    return value
+
+def normalized(packed, stats, points):
+    """Each smoothed curve divided by its norm, thinned to `points` evenly spaced rows: (T, y) arrays (curves, points)."""
+    x, ys, seg, starts, counts = packed
+    live = np.maximum(counts - 1, 0)
+    idx = starts[:, None] + np.rint(live[:, None] * np.linspace(0.0, 1.0, points)).astype(np.int64)
+    idx = np.minimum(idx, max(len(x) - 1, 0))
+    if not len(x): return np.full(idx.shape, np.nan), np.full(idx.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = ys[idx] / stats['norm'][:, None]
+    empty = counts == 0
+    t = x[idx]
+    t[empty], y[empty] = np.nan, np.nan
+    return t, y
+
+def analyze_plan(plan, smooth_points=SMOOTH_POINTS, window=NORMAL_WINDOW, curve_points=0):
+    """
+    JSON-ready {'curves': [...], 'pairs': [...]} for everything a plan
+    plots. With curve_points, each curve also carries its normalized
+    smoothed curve as {'t': [...], 'y': [...]}.
+    """
+    curves = plan_curves(plan)
+    data = [(plan.sheets[c['index']]['df'][c['x']].to_numpy(), plan.sheets[c['index']]['df'][c['y']].to_numpy())
+            for c in curves]
+    stats, packed = analyze_curves(data, [c['resistive'] for c in curves], smooth_points, window)
+    pairs = _pairs(curves)
+    diffs = compare_pairs(packed, pairs, stats)
+    rows = [dict({k: v for k, v in c.items() if k != 'index'}, **{k: _clean(v[i]) for k, v in stats.items()})
+            for i, c in enumerate(curves)]
+    pair_rows = [dict({'y': curves[a]['y'], 'group': curves[a]['group'], 'cooling': curves[a]['sheet'],
+                       'warming': curves[b]['sheet']}, **{k: _clean(v[i]) for k, v in diffs.items()})
+                 for i, (a, b) in enumerate(pairs)]
+    rows = [{k: _clean(v) for k, v in r.items()} for r in rows]
+    if curve_points:
+        t, y = normalized(packed, stats, curve_points)
+        for i, row in enumerate(rows):
+            row['normalized'] = {'t': [_clean(v) for v in t[i]], 'y': [_clean(v) for v in y[i]]}
+    return {'curves': rows, 'pairs': pair_rows}
+
+def summary_frames(result):
+    """The analysis as (curves, pairs) DataFrames for an Origin summary book."""
+    curves = pd.DataFrame(result['curves'])
+    return curves.drop(columns=['normalized'], errors='ignore'), pd.DataFrame(result['pairs'])
@@ -1,17 +1,43 @@
-import originpro as op
-import pandas as pd
-import numpy as np
+import base64
+import importlib
 import os
+import shutil
 import sys
+import tempfile
 import threading
-import webview
-import pythoncom
 import time
-from flask import Flask, request, jsonify, send_from_directory
+import uuid
+from collections import OrderedDict
+from flask import Flask, Response, g, request, jsonify, send_from_directory
 from flask_cors import CORS
 from datetime import date, datetime
-from pptx import Presentation
-from pptx.util import Inches
+from origin_worker import OriginWorker, load_backend
+from metrics import Metrics, no_span
+from project_saver import ProjectSaver
+
+# --- Lazy Imports ---
+# pandas, numpy, python-pptx and the data-path modules built on them cost
+# most of a second to import. They load on first attribute access (or
+# earlier, from the warm-up thread) so the window can open right away.
+class LazyModule:
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+
+    def __getattr__(self, attr):
+        if self.module is None: self.module = importlib.import_module(self.name)
+        return getattr(self.module, attr)
+
+loaders = LazyModule('loaders')
+processing = LazyModule('processing')
+render_plan = LazyModule('render_plan')
+pptx_export = LazyModule('pptx_export')
+live_tail = LazyModule('live_tail')
+analytics = LazyModule('analytics')
+route_plans = LazyModule('route_plans')
+preview = LazyModule('preview')
+WARM_MODULES = ('pandas', 'numpy', 'loaders', 'processing', 'render_plan', 'pptx_export', 'pptx', 'parse_cache',
+                'live_tail', 'route_plans', 'analytics', 'preview')
 
 # --- Path Setup ---
 if getattr(sys, 'frozen', False):
@@ -26,56 +52,102 @@ else:
 app = Flask(__name__, static_folder=template_folder, static_url_path='')
 CORS(app) # Fixes the "Failed" false alarm
 
+# --- Origin Worker ---
+# All Origin calls run on one worker thread; LABPLOTTER_BACKEND=fake swaps in
+# the recording stand-in so the app runs without Origin.
+backend = load_backend()
+worker = OriginWorker(backend)
+metrics = Metrics()
+startup = {'started': time.time(), 'imports': None, 'import_error': None}
+_cache = []
+
+def run_on_origin(fn, name='watch'):
+    """Run fn(op) on the Origin worker and wait for its result."""
+    job = worker.wait(worker.submit(lambda: fn(backend.op), name))
+    if job['state'] == 'error': raise RuntimeError(job['error'])
+    return job['result']
+
+# Project saves are coalesced on their own thread and run on the worker.
+saver = ProjectSaver(os.path.join(os.getcwd(), 'Origin_Project.opju'),
+                     lambda fn: run_on_origin(fn, 'project_save'), span=metrics.spans('project'))
+
+def parse_cache():
+    """The shared ParseCache (None when disabled), created on first use."""
+    if not _cache:
+        from parse_cache import default_cache
+        _cache.append(default_cache())
+    return _cache[0]
+
+def warm_imports():
+    try:
+        for name in WARM_MODULES: importlib.import_module(name)
+        parse_cache()
+    except Exception as e:
+        startup['import_error'] = str(e)
+    startup['imports'] = time.time()
+
+def prewarm():
+    """Attach Origin on the worker and import the data path in the background."""
+    worker.start()
+    threading.Thread(target=warm_imports, name='warm-imports', daemon=True).start()
+
 # --- Logging & Context ---
 def log_status(message):
     print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
+    worker.progress(message)
 
-class OriginContext:
-    def __enter__(self):
-        pythoncom.CoInitialize()
-        op.set_show(True)
-        return self
-    def __exit__(self, exc_type, exc_value, traceback):
-        pythoncom.CoUninitialize()
+def route_name():
+    """Metrics name of the current request: its path, unless the view set g.route."""
+    return g.get('route') or request.path.strip('/')
 
-# --- Data Loaders ---
-def get_delimiter(file_obj):
-    try:
-        sample = file_obj.read(1024).decode('latin1', errors='ignore') 
-        file_obj.seek(0)
-        if ',' in sample: return ','
-        if '\t' in sample: return '\t'
-        return ','
-    except Exception: return ','
-
-def find_data_start_row(file_obj):
-    file_obj.seek(0)
-    try:
-        lines = file_obj.read().decode('latin1').splitlines()
-    except Exception: return 0
-    file_obj.seek(0)
-    for i, line in enumerate(lines):
-        if '[Data]' in line: return i + 1
-    return 0
-
-def load_data(file_obj, skiprows, usecols, colnames):
-    delim = get_delimiter(file_obj)
-    file_obj.seek(0) 
-    if skiprows == -1:
-        skiprows = find_data_start_row(file_obj)
-    
-    try:
-        df = pd.read_csv(file_obj, delimiter=delim, skiprows=skiprows, encoding='utf-8')
-    except UnicodeDecodeError:
-        file_obj.seek(0)
-        df = pd.read_csv(file_obj, delimiter=delim, skiprows=skiprows, encoding='latin1')
-        
-    try:
-        df = df.iloc[:, usecols]
-        df.columns = colnames
-    except IndexError:
-        raise ValueError("Column index out of bounds.")
-    return df
+def load_upload(file_obj, fmt, params, by=None, prepare=None):
+    """Parse one uploaded file for the current route, timed as its 'parse' stage."""
+    with metrics.span(route_name(), 'parse', fmt=fmt) as fields:
+        data = loaders.read_upload(file_obj, fmt, by, prepare, params['float32'], cache=parse_cache())
+        fields['rows'] = len(data) if by is None else sum(len(sub) for _, sub in data)
+    return data
+
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+@app.after_request
+def record_latency(response):
+    if request.method == 'POST' and 'started' in g:
+        metrics.request(route_name(), time.perf_counter() - g.started, response.status_code)
+    return response
+
+def run_origin_job(name, render, params, extra=None):
+    """Queue render() on the Origin worker; wait for it unless async was asked for."""
+    job_id = worker.submit(render, name)
+    extra = extra or {}
+    if params['async']:
+        return jsonify({'job_id': job_id, 'status': f'/jobs/{job_id}', **extra}), 202
+    job = worker.wait(job_id)
+    if job['state'] == 'error':
+        return jsonify({'error': job['error'], 'job_id': job_id, **extra}), 500
+    return jsonify({'message': job['result'], 'job_id': job_id, **extra}), 200
+
+def job_message(err1, err2):
+    return "Processed successfully." if not (err1 or err2) else f"Done. Warnings: {err1 or ''} {err2 or ''}"
+
+def submit_plan(name, plan, pptx_name, params):
+    span = metrics.spans(name)
+    if params['pointBudget']:
+        with span('decimate', method=params['decimation'], budget=params['pointBudget']):
+            before, after = plan.decimate(params['pointBudget'], params['decimation'], params['rawSheet'])
+    else:
+        before = after = plan.points()
+    metrics.count(name, rows=plan.rows(), points=after)
+    submitted = time.perf_counter()
+    def render():
+        metrics.observe(name, 'queue', time.perf_counter() - submitted)
+        with span('job'):
+            graphs = render_plan.execute_plan(plan, backend.op, span=span)
+            err1 = export_graphs_to_pptx(graphs, pptx_name, params['createPPT'], params, span)
+            err2 = finalize_origin(params['saveProject'])
+        return job_message(err1, err2)
+    return run_origin_job(name, render, params, {'points': {'before': before, 'after': after}})
 
 def validate_request(file_keys, form_keys):
     files = {}
@@ -85,59 +157,41 @@ def validate_request(file_keys, form_keys):
             return None, None, (jsonify({'error': f'Missing file: {key}'}), 400)
         files[key] = f
 
-    params = {}
-    for key in form_keys:
-        val = request.form.get(key)
-        try:
-            params[key] = float(val) if (key != 'lastModified') else val
-        except ValueError:
-            params[key] = val
-    
-    # Read Switches
-    params['createPPT'] = request.form.get('createPPT') == 'true'
-    params['saveProject'] = request.form.get('saveProject') == 'true'
-            
+    try:
+        params = route_plans.parse_params(request.form, form_keys)
+    except route_plans.PlanError as e:
+        return None, None, (jsonify({'error': str(e)}), 400)
     return files, params, None
 
-# --- Graph Helpers ---
-def split_data_by_temp(df, mode='min'):
-    idx = df['Temperature'].idxmin() if mode == 'min' else df['Temperature'].idxmax()
-    return df.iloc[:idx + 1], df.iloc[idx + 1:]
-
-def setup_graph(template, x_title, y_title, legend_txt, label_txt):
-    graph = op.new_graph(template=template)
-    layer = graph[0]
-    layer.axis('x').title = x_title
-    layer.axis('y').title = y_title
-    if legend_txt: layer.label('Legend').text = legend_txt
-    if label_txt: layer.label('Text').text = label_txt
-    op.wait('s', 0.1)
-    return graph
-
-def add_plot(layer, wks, x_col, y_col, color_idx, name=None):
-    plot = layer.add_plot(wks, colx=x_col, coly=y_col)
-    plot.color = op.ocolor(color_idx)
-    if name: plot.name = name
-    op.wait('s', 0.1)
-    return plot
+def build_upload(route, load=load_upload):
+    """Validate the form and build the route's plan from the uploads: (plan, pptx name, params, error)."""
+    file_keys, form_keys, build = route_plans.ROUTES[route]
+    files, params, error = validate_request(file_keys, form_keys)
+    if error: return None, None, None, error
+    try:
+        plan, pptx_name = build(files, params, lambda f, fmt, **kw: load(f, fmt, params, **kw))
+    except route_plans.PlanError as e:
+        return None, None, None, (jsonify({'error': str(e)}), 400)
+    return plan, pptx_name, params, None
+
+def handle_upload(route):
+    """Build the route's plan and hand it to the worker."""
+    plan, pptx_name, params, error = build_upload(route)
+    if error: return error
+    return submit_plan(route, plan, pptx_name, params)
 
 # --- EXPORT LOGIC ---
 def finalize_origin(should_save):
+    """Queue a background project save; see /project for when it lands."""
     if should_save:
-        log_status("Saving Origin Project...")
-        project_file = os.path.join(os.getcwd(), 'Origin_Project.opju')
-        if os.path.exists(project_file):
-            try:
-                os.rename(project_file, project_file)
-            except OSError:
-                return "Project file locked. Skipping save."
-        op.save(project_file)
-    op.detach()
+        log_status("Project save queued...")
+        saver.request()
     return None
 
-def export_graphs_to_pptx(graphs_list, filename, should_export):
+def export_graphs_to_pptx(graphs_list, filename, should_export, options=None, span=no_span):
     if not should_export:
         return None
+    options = options or {}
     try:
         path = os.path.join(os.getcwd(), filename)
         if os.path.exists(path):
@@ -146,16 +200,10 @@ def export_graphs_to_pptx(graphs_list, filename, should_export):
             except OSError:
                 return f"File {filename} is open. Close it to save."
         
-        prs = Presentation()
-        blank = prs.slide_layouts[6] 
-        for graph in graphs_list:
-            temp = os.path.join(os.getcwd(), f"temp_{id(graph)}.png")
-            graph.save_fig(temp, type='png', width=1200)
-            slide = prs.slides.add_slide(blank)
-            slide.shapes.add_picture(temp, Inches(0.5), Inches(1), height=Inches(5.5))
-            try: os.remove(temp)
-            except OSError: pass
-        prs.save(path)
+        log_status(f"Exporting {filename}...")
+        pptx_export.export_slides(graphs_list, path, append=options.get('appendPPT', False),
+                                  slide=options.get('slideSize', pptx_export.DEFAULT_SLIDE),
+                                  dpi=options.get('pptDpi', pptx_export.DEFAULT_DPI), span=span)
     except Exception as e:
         return str(e)
     return None
@@ -165,252 +213,278 @@ def export_graphs_to_pptx(graphs_list, filename, should_export):
 def index():
     return send_from_directory(app.static_folder, 'index.html')
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    status = worker.status(job_id)
+    if status is None: return jsonify({'error': f'Unknown job: {job_id}'}), 404
+    return jsonify(status), 200
+
+@app.route('/metrics')
+def metrics_snapshot():
+    snapshot = metrics.snapshot()
+    cache = parse_cache()
+    snapshot['cache'] = cache.stats() if cache is not None else None
+    snapshot['project'] = saver.status()
+    snapshot['jobs'] = {'queued': worker.queue.qsize()}
+    return jsonify(snapshot), 200
+
+@app.route('/cache', methods=['GET', 'DELETE'])
+def cache_status():
+    cache = parse_cache()
+    if cache is None: return jsonify({'enabled': False}), 200
+    if request.method == 'DELETE':
+        removed = cache.invalidate(request.args.get('digest', ''))
+        return jsonify(dict(cache.stats(), enabled=True, removed=removed)), 200
+    return jsonify(dict(cache.stats(), enabled=True)), 200
+
+# Plan builders live in route_plans.py so batch.py can run them without Flask.
 @app.route('/dewar', methods=['POST'])
 def upload_dewar_file():
-    with OriginContext():
-        files, params, error = validate_request(['cooling', 'warming'], ['pressure', 'lastModified'])
-        if error: return error
-        fmt_date = params.get('lastModified', '')
-        df_cool = load_data(files['cooling'], 3, [0, 3, 4], ['Temperature', 'R1', 'R2'])
-        df_warm = load_data(files['warming'], 3, [0, 3, 4], ['Temperature', 'R1', 'R2'])
-        wks_c = op.new_sheet('w', lname=f'CoolingData {params["pressure"]} GPa')
-        wks_c.from_df(df_cool)
-        wks_w = op.new_sheet('w', lname=f'WarmingData {params["pressure"]} GPa')
-        wks_w.from_df(df_warm)
-        graphs = [] 
-        for i, ch in enumerate(['1', '2']):
-            y_idx = 1 if ch == '1' else 2
-            txt = f'{fmt_date}\nHg1223\nCh. {ch}\nPressure: {params["pressure"]} GPa'
-            graph = setup_graph('Scatter', 'T (K)', 'R (Ω)', '\l(1) Cooling\n\l(2) Warming', txt)
-            add_plot(graph[0], wks_c, 0, y_idx, 'blue')
-            add_plot(graph[0], wks_w, 0, y_idx, 'red')
-            graph[0].rescale()
-            graphs.append(graph)
-        
-        err1 = export_graphs_to_pptx(graphs, f"Dewar_{params['pressure']}GPa.pptx", params['createPPT'])
-        err2 = finalize_origin(params['saveProject'])
-        msg = "Processed successfully." if not (err1 or err2) else f"Done. Warnings: {err1 or ''} {err2 or ''}"
-        return jsonify({'message': msg}), 200
-
-def handle_single_file_resistance(req, skip, cols, split_mode):
-    files, params, error = validate_request(['datafile'], ['pressure', 'lastModified'])
-    if error: return error
-    fmt_date = params.get('lastModified', '')
-    df = load_data(files['datafile'], skip, cols, ['Temperature', 'R1', 'R2'])
-    cool, warm = split_data_by_temp(df, split_mode)
-    wks_c = op.new_sheet('w', lname=f'CoolingData {params["pressure"]} GPa')
-    wks_c.from_df(cool)
-    wks_w = op.new_sheet('w', lname=f'WarmingData {params["pressure"]} GPa')
-    wks_w.from_df(warm)
-    graphs = []
-    for ch in ['1', '2']:
-        y_idx = 1 if ch == '1' else 2
-        txt = f'{fmt_date}\nHg1223\nCh. {ch}\nPressure: {params["pressure"]} GPa'
-        graph = setup_graph('Scatter', 'T (K)', 'R (Ω)', '\l(1) Cooling\n\l(2) Warming', txt)
-        add_plot(graph[0], wks_c, 0, y_idx, 'blue')
-        add_plot(graph[0], wks_w, 0, y_idx, 'red')
-        graph[0].rescale()
-        graphs.append(graph)
-    
-    err1 = export_graphs_to_pptx(graphs, f"Resistance_{params['pressure']}GPa.pptx", params['createPPT'])
-    err2 = finalize_origin(params['saveProject'])
-    msg = "Processed successfully." if not (err1 or err2) else f"Done. Warnings: {err1 or ''} {err2 or ''}"
-    return jsonify({'message': msg}), 200
+    return handle_upload('dewar')
 
 @app.route('/dewar_strip', methods=['POST'])
 def upload_dewar_merged():
-    with OriginContext(): return handle_single_file_resistance(request, 26, [0, 3, 4], 'min')
+    return handle_upload('dewar_strip')
 
 @app.route('/ppms', methods=['POST'])
 def upload_ppms_file():
-    with OriginContext(): return handle_single_file_resistance(request, -1, [3, 12, 13], 'min')
+    return handle_upload('ppms')
 
 @app.route('/current_effect', methods=['POST'])
 def current_effect():
-    with OriginContext():
-        files, params, error = validate_request(['datafile'], ['pressure', 'lastModified'])
-        if error: return error
-        fmt_date = params.get('lastModified', '')
-        df = load_data(files['datafile'], 3, [0, 1, 2, 11], ['Temperature', 'R1', 'R2', 'Current'])
-        df = df[pd.to_numeric(df['Temperature'], errors='coerce').notnull()]
-        unique_currents = df['Current'].unique()
-        wb = op.new_book('w', lname=f'CurrentData {params["pressure"]} GPa')
-        graphs = []
-        for ch_idx, ch_name in [(1, '1'), (2, '2')]:
-            graph = setup_graph('Scatter', 'T (K)', 'R (Ω)', '', f'{fmt_date}\nHg1223\nCh. {ch_name}\n{params["pressure"]} GPa')
-            legend = ''
-            for i, curr in enumerate(unique_currents):
-                sub = df[df['Current'] == curr]
-                if sub.empty: continue
-                wks = wb.add_sheet(f'Ch{ch_name}_{curr}mA')
-                wks.from_df(sub[['Temperature', f'R{ch_name}']])
-                add_plot(graph[0], wks, 0, 1, i)
-                legend += f'\l({i+1}) {curr} A\n'
-            graph[0].label('Legend').text = legend
-            graph[0].rescale()
-            graphs.append(graph)
-        err1 = export_graphs_to_pptx(graphs, f"CurrentEffect_{params['pressure']}GPa.pptx", params['createPPT'])
-        err2 = finalize_origin(params['saveProject'])
-        msg = "Processed successfully." if not (err1 or err2) else f"Done. Warnings: {err1 or ''} {err2 or ''}"
-        return jsonify({'message': msg}), 200
+    return handle_upload('current_effect')
 
 @app.route('/ppms_magnetic', methods=['POST'])
 def upload_ppms_magnetic_file():
-    with OriginContext():
-        files, params, error = validate_request(['datafile'], ['pressure', 'lastModified'])
-        if error: return error
-        df = load_data(files['datafile'], -1, [3, 4, 12, 13], ['Temperature', 'MagneticField', 'R1', 'R2'])
-        unique_fields = df['MagneticField'].unique()
-        wb = op.new_book('w', lname=f'MagneticFieldData {params["pressure"]} GPa')
-        graphs = []
-        fmt_date = params.get('lastModified', '')
-        for ch_idx, ch_name in [(1, '1'), (2, '2')]:
-            graph = setup_graph('Scatter', 'T (K)', 'R (Ω)', '', f'{fmt_date}\nCe\nCh. {ch_name}\n{params["pressure"]} GPa')
-            legend = ''
-            for i, field in enumerate(unique_fields):
-                sub = df[df['MagneticField'] == field]
-                if sub.empty: continue
-                wks = wb.add_sheet(f'Field_{field}')
-                wks.from_df(sub[['Temperature', f'R{ch_name}']])
-                add_plot(graph[0], wks, 0, 1, i)
-                legend += f'\l({i+1}) {round(field)/1000} T\n'
-            graph[0].label('Legend').text = legend
-            graph[0].rescale()
-            graphs.append(graph)
-        err1 = export_graphs_to_pptx(graphs, f"MagneticField_{params['pressure']}GPa.pptx", params['createPPT'])
-        err2 = finalize_origin(params['saveProject'])
-        msg = "Processed successfully." if not (err1 or err2) else f"Done. Warnings: {err1 or ''} {err2 or ''}"
-        return jsonify({'message': msg}), 200
+    return handle_upload('ppms_magnetic')
 
 @app.route('/ppms_heat_capacity', methods=['POST'])
 def upload_ppms_heat_capacity_file():
-    with OriginContext():
-        files, params, error = validate_request(['datafile'], ['mass_heat_cap', 'lastModified'])
-        if error: return error
-        df = load_data(files['datafile'], -1, [7, 5, 9], ['Temperature', 'MagneticField', 'Heat capacity'])
-        df['MagneticField'] = np.ceil(df['MagneticField'] / 10) * 10
-        unique_fields = df['MagneticField'].unique()
-        wb = op.new_book('w', lname=f'MagneticFieldData {params["mass_heat_cap"]} mg')
-        fmt_date = params.get('lastModified', '')
-        graph = setup_graph('Scatter', 'T (K)', 'Cp (mj/mole$\cdot$K)', '', f'{fmt_date}\n{params["mass_heat_cap"]} mg')
-        legend = ''
-        for i, field in enumerate(unique_fields):
-            sub = df[df['MagneticField'] == field]
-            if sub.empty: continue
-            wks = wb.add_sheet(f'Field_{field}')
-            wks.from_df(sub[['Temperature', 'Heat capacity']])
-            add_plot(graph[0], wks, 0, 1, i)
-            legend += f'\l({i+1}) {round(field)/1000} T\n'
-        graph[0].label('Legend').text = legend
-        graph[0].rescale()
-        err1 = export_graphs_to_pptx([graph], f"HeatCapacity_{params['mass_heat_cap']}mg.pptx", params['createPPT'])
-        err2 = finalize_origin(params['saveProject'])
-        msg = "Processed successfully." if not (err1 or err2) else f"Done. Warnings: {err1 or ''} {err2 or ''}"
-        return jsonify({'message': msg}), 200
+    return handle_upload('ppms_heat_capacity')
 
 @app.route('/ppms_heat_capacity_cw', methods=['POST'])
 def upload_ppms_heat_capacity_cw_file():
-    with OriginContext():
-        return handle_field_warming_cooling(request, skip=-1, cols=[7, 5, 9], col_names=['Temperature', 'Magnetic field', 'Heat capacity'], y_col='Heat capacity', y_label='Heat capacity (mj/mole$\cdot$K)', mass_key='mass', round_field=True)
+    return handle_upload('ppms_heat_capacity_cw')
 
 @app.route('/mpms_magnetic', methods=['POST'])
 def upload_mpms_magnetic_file():
-    with OriginContext():
-        return handle_field_warming_cooling(request, skip=-1, cols=[2, 3, 60], col_names=['Temperature', 'Magnetic field', 'Magnetic moment'], y_col='Magnetic moment', y_label='Magnetic moment (Oe)', mass_key='mass', round_field=False)
-
-def handle_field_warming_cooling(req, skip, cols, col_names, y_col, y_label, mass_key, round_field):
-    files, params, error = validate_request(['datafile'], [mass_key, 'lastModified'])
-    if error: return error
-    fmt_date = params.get('lastModified', '')
-    df = load_data(files['datafile'], skip, cols, col_names)
-    if round_field: df['Magnetic field'] = np.ceil(df['Magnetic field'] / 10) * 10
-    field_col = 'Magnetic field'
-    unique_fields = df[field_col].unique()
-    wb = op.new_book('w', lname=f'Data_{params[mass_key]}mg')
-    graph_warm = setup_graph('Scatter', 'T (K)', y_label, '', f'{fmt_date}\nZFC\nCe\nMass = {params[mass_key]}mg')
-    graph_cool = setup_graph('Scatter', 'T (K)', y_label, '', f'{fmt_date}\nFC\nCe\nMass = {params[mass_key]}mg')
-    leg_w, leg_c = '', ''
-    for i, field in enumerate(unique_fields):
-        sub = df[df[field_col] == field]
-        if sub.empty: continue
-        idx = sub['Temperature'].idxmax()
-        warm_df, cool_df = sub.loc[:idx], sub.loc[idx+1:]
-        wks_w = wb.add_sheet(f'Warming_{field}')
-        wks_w.from_df(warm_df[['Temperature', y_col]])
-        add_plot(graph_warm[0], wks_w, 0, 1, i, f'Warming_{field}')
-        leg_w += f'\l({i+1}){field} Oe\n'
-        wks_c = wb.add_sheet(f'Cooling_{field}')
-        wks_c.from_df(cool_df[['Temperature', y_col]])
-        add_plot(graph_cool[0], wks_c, 0, 1, i, f'Cooling_{field}')
-        leg_c += f'\l({i+1}){field} Oe\n'
-    graph_warm[0].label('Legend').text = leg_w
-    graph_warm[0].rescale()
-    graph_cool[0].label('Legend').text = leg_c
-    graph_cool[0].rescale()
-    err1 = export_graphs_to_pptx([graph_warm, graph_cool], f"CW_FieldData_{params[mass_key]}mg.pptx", params['createPPT'])
-    err2 = finalize_origin(params['saveProject'])
-    msg = "Processed successfully." if not (err1 or err2) else f"Done. Warnings: {err1 or ''} {err2 or ''}"
-    return jsonify({'message': msg}), 200
+    return handle_upload('mpms_magnetic')
 
 @app.route('/mpms', methods=['POST'])
 def upload_mpms_file():
-    with OriginContext():
-        files, params, error = validate_request(['datafile'], ['magnetic_moment', 'lastModified'])
-        if error: return error
-        fmt_date = params.get('lastModified', '')
-        df = load_data(files['datafile'], -1, [2, 60], ['Temperature', 'Magnetic moment'])
-        warm, cool = split_data_by_temp(df, 'max')
-        wks_w = op.new_sheet('w', lname=f'WarmingData {params["magnetic_moment"]} Oe')
-        wks_w.from_df(warm)
-        wks_c = op.new_sheet('w', lname=f'CoolingData {params["magnetic_moment"]} Oe')
-        wks_c.from_df(cool)
-        txt = f'{fmt_date}\nCe\nMagnetic field: {params["magnetic_moment"]} Oe'
-        graph = setup_graph('Scatter', 'T (K)', 'Magnetic moment (Oe)', '\l(1) ZFC\n\l(2) FC', txt)
-        add_plot(graph[0], wks_w, 0, 1, 'red')
-        add_plot(graph[0], wks_c, 0, 1, 'blue')
-        graph[0].rescale()
-        err1 = export_graphs_to_pptx([graph], f"MPMS_{params['magnetic_moment']}Oe.pptx", params['createPPT'])
-        err2 = finalize_origin(params['saveProject'])
-        msg = "Processed successfully." if not (err1 or err2) else f"Done. Warnings: {err1 or ''} {err2 or ''}"
-        return jsonify({'message': msg}), 200
+    return handle_upload('mpms')
 
 @app.route('/mpms_ac', methods=['POST'])
 def upload_mpms_ac_file():
-    with OriginContext():
-        files, params, error = validate_request(['datafile'], ['mass_ac', 'MF_dc', 'MF_ac', 'lastModified'])
-        if error: return error
-        df = load_data(files['datafile'], -1, [2, 26, 21, 23], ['Temperature', 'Frequency', 'X_real', 'X_imag'])
-        df = df.dropna()
-        freqs = df['Frequency'].unique()
-        if len(freqs) == 0: return jsonify({'error': 'No valid frequency data found'}), 400
-        wb = op.new_book('w', lname=f"AC_Susceptibility_{params['mass_ac']}mg")
-        graph_real = setup_graph('Scatter', 'Temperature (K)', "X' (emu/Oe)", '', '')
-        graph_imag = setup_graph('Scatter', 'Temperature (K)', "X'' (emu/Oe)", '', '')
-        legend = ''
-        for i, freq in enumerate(freqs):
-            sub = df[df['Frequency'] == freq]
-            safe_freq = f"{freq:.2f}".replace('.', '_')
-            wks = wb.add_sheet(f'Freq_{safe_freq}')
-            wks.from_df(sub) 
-            add_plot(graph_real[0], wks, 0, 2, i)
-            add_plot(graph_imag[0], wks, 0, 3, i)
-            legend += f'\l({i+1}) {freq:.1f} Hz\n'
-        for graph in [graph_real, graph_imag]:
-            graph[0].label('Legend').text = legend
-            graph[0].rescale()
-            op.wait('s', 0.1)
-        err1 = export_graphs_to_pptx([graph_real, graph_imag], f"AC_Susceptibility_{params['mass_ac']}mg.pptx", params['createPPT'])
-        err2 = finalize_origin(params['saveProject'])
-        msg = "Processed successfully." if not (err1 or err2) else f"Done. Warnings: {err1 or ''} {err2 or ''}"
-        return jsonify({'message': msg}), 200
-
-# --- Force Close Splash Helper ---
-def close_splash_forcefully():
+    return handle_upload('mpms_ac')
+
+# --- Analytics ---
+# Same upload and plan as the route, but instead of building it in Origin the
+# curves are analysed in one vectorized pass. originSheet=true also writes
+# the results to an 'Analytics' book.
+@app.route('/analyze/<route>', methods=['POST'])
+def analyze_upload(route):
+    if route not in route_plans.ROUTES: return jsonify({'error': f'Unknown route: {route}'}), 404
+    plan, _, params, error = build_upload(route)
+    if error: return error
+    form = request.form
+    try:
+        options = (route_plans.form_number(form, 'smoothPoints', analytics.SMOOTH_POINTS, int),
+                   route_plans.form_number(form, 'normalWindow', analytics.NORMAL_WINDOW),
+                   route_plans.form_number(form, 'curvePoints', 0, int))
+    except route_plans.PlanError as e:
+        return jsonify({'error': str(e)}), 400
+    with metrics.span(f'analyze/{route}', 'analytics') as fields:
+        result = analytics.analyze_plan(plan, *options)
+        fields['curves'] = len(result['curves'])
+    if form.get('originSheet') != 'true': return jsonify(result), 200
+    curves, pairs = analytics.summary_frames(result)
+    summary = render_plan.RenderPlan()
+    book = summary.book(f'Analytics {route}')
+    summary.sheet('Curves', curves, book)
+    if len(pairs): summary.sheet('Hysteresis', pairs, book)
+    def render():
+        render_plan.execute_plan(summary, backend.op)
+        return "Analytics sheet written."
+    return run_origin_job(f'analyze/{route}', render, params, result)
+
+# --- Preview ---
+# The route's own plan built from a bounded sample of each upload (see
+# loaders.read_sample) and thinned to previewPoints per curve, returned
+# straight to the UI: format=json|binary|png. Nothing goes to Origin.
+# keep=true holds the uploads under a token so /preview/<token>/confirm
+# can run the full parse and Origin render without uploading them again.
+PREVIEW_KEEP = 8
+previews = OrderedDict()
+previews_lock = threading.Lock()
+
+def load_sample(file_obj, fmt, params, by=None, prepare=None, max_bytes=None, samples=None):
+    with metrics.span(route_name(), 'parse', fmt=fmt, sampled=True) as fields:
+        data, info = loaders.read_sample(file_obj, fmt, by, prepare, params['float32'],
+                                         max_bytes or loaders.PREVIEW_BYTES)
+        fields['rows'] = info['rows']
+    if samples is not None: samples.append(info)
+    return data
+
+def keep_uploads(route):
+    """Copy the uploads to a temp folder under a new token; the oldest kept set is dropped past PREVIEW_KEEP."""
+    token = uuid.uuid4().hex[:12]
+    folder = tempfile.mkdtemp(prefix='labplotter-preview-')
+    paths = {}
+    for key in route_plans.ROUTES[route][0]:
+        f = request.files[key]
+        f.stream.seek(0)
+        paths[key] = os.path.join(folder, key)
+        f.save(paths[key])
+    stash_preview(token, {'route': route, 'folder': folder, 'paths': paths, 'form': request.form.to_dict()})
+    return token
+
+# Request threads share `previews`: entries only change under the lock, and
+# a request takes its entry out before touching the files, so an eviction
+# can never delete them underneath it.
+def stash_preview(token, kept):
+    with previews_lock:
+        previews[token] = kept
+        evicted = [previews.popitem(last=False)[1] for _ in range(len(previews) - PREVIEW_KEEP)]
+    for old in evicted: shutil.rmtree(old['folder'], ignore_errors=True)
+
+def take_preview(token):
+    with previews_lock: return previews.pop(token, None)
+
+def drop_preview(token):
+    kept = take_preview(token)
+    if kept: shutil.rmtree(kept['folder'], ignore_errors=True)
+    return kept
+
+@app.route('/preview/<route>', methods=['POST'])
+def preview_upload(route):
+    if route not in route_plans.ROUTES: return jsonify({'error': f'Unknown route: {route}'}), 404
+    form = request.form
+    kind = form.get('format') or 'json'
+    if kind not in ('json', 'binary', 'png'): return jsonify({'error': f'Unknown preview format: {kind}'}), 400
+    t0 = time.perf_counter()
+    samples = []
+    try:
+        max_bytes = int(route_plans.form_number(form, 'previewMB', 0) * 2 ** 20) or None
+        points = route_plans.form_number(form, 'previewPoints', preview.PREVIEW_POINTS, int)
+    except route_plans.PlanError as e:
+        return jsonify({'error': str(e)}), 400
+    plan, _, params, error = build_upload(route, lambda f, fmt, params, **kw: load_sample(
+        f, fmt, params, max_bytes=max_bytes, samples=samples, **kw))
+    if error: return error
+    with metrics.span(f'preview/{route}', 'decimate', method='minmax', budget=points):
+        before, after = plan.decimate(points, 'minmax')
+    graphs = preview.plan_graphs(plan)
+    meta = {'route': route, 'token': keep_uploads(route) if form.get('keep') == 'true' else None,
+            'samples': samples, 'points': {'before': before, 'after': after}}
+    if kind == 'binary':
+        meta['seconds'] = time.perf_counter() - t0
+        return Response(preview.to_binary(graphs, meta), mimetype='application/octet-stream')
+    if kind == 'json':
+        meta['graphs'] = preview.to_json(graphs)
+    else:
+        try:
+            images = [preview.to_png(graph) for graph in graphs]
+        except ImportError:
+            return jsonify({'error': 'PNG previews need Pillow'}), 400
+        meta['graphs'] = [dict(info, png='data:image/png;base64,' + base64.b64encode(image).decode())
+                          for info, image in zip(preview.describe(graphs), images)]
+    meta['seconds'] = time.perf_counter() - t0
+    return jsonify(meta), 200
+
+@app.route('/preview/<token>', methods=['DELETE'])
+def preview_discard(token):
+    g.route = 'preview/discard'
+    if drop_preview(token) is None: return jsonify({'error': f'Unknown preview: {token}'}), 404
+    return jsonify({'token': token}), 200
+
+@app.route('/preview/<token>/confirm', methods=['POST'])
+def preview_confirm(token):
+    """Full parse and Origin render of a kept preview; form fields sent here override the preview's."""
+    g.route = 'preview/confirm'
+    kept = take_preview(token)
+    if kept is None: return jsonify({'error': f'Unknown preview: {token}'}), 404
+    file_keys, form_keys, build = route_plans.ROUTES[kept['route']]
+    try:
+        params = route_plans.parse_params(dict(kept['form'], **request.form.to_dict()), form_keys)
+    except route_plans.PlanError as e:
+        stash_preview(token, kept)  # bad overrides: keep the uploads for a corrected confirm
+        return jsonify({'error': str(e)}), 400
+    handles = {}
+    try:
+        for key, path in kept['paths'].items(): handles[key] = open(path, 'rb')
+        plan, pptx_name = build(handles, params, lambda f, fmt, **kw: load_upload(f, fmt, params, **kw))
+    except route_plans.PlanError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        for fh in handles.values(): fh.close()
+        shutil.rmtree(kept['folder'], ignore_errors=True)
+    return submit_plan(kept['route'], plan, pptx_name, params)
+
+# --- Live Tail ---
+watches = {}
+
+@app.route('/watch', methods=['GET', 'POST'])
+def watch_files():
+    if request.method == 'GET':
+        return jsonify([w.status() for w in watches.values()]), 200
+    path, fmt = request.form.get('path', ''), request.form.get('fmt', '')
+    if fmt not in live_tail.LIVE_FORMATS: return jsonify({'error': f'Live mode not available for: {fmt}'}), 400
+    if not os.path.isfile(path): return jsonify({'error': f'File not found: {path}'}), 400
+    try:
+        tolerance = route_plans.form_number(request.form, 'sweepTolerance', processing.SWEEP_TOLERANCE)
+        interval = route_plans.form_number(request.form, 'interval', 2.0)
+    except route_plans.PlanError as e:
+        return jsonify({'error': str(e)}), 400
+    session = live_tail.LiveSession(path, fmt, request.form.get('label', ''), tolerance,
+                                    request.form.get('float32') == 'true')
+    watch = live_tail.LiveWatch(session, run_on_origin, interval, metrics.spans('watch'))
+    watches[watch.id] = watch.start()
+    return jsonify(watch.status()), 201
+
+@app.route('/watch/<watch_id>', methods=['GET', 'DELETE'])
+def watch_status(watch_id):
+    watch = watches.get(watch_id)
+    if watch is None: return jsonify({'error': f'Unknown watch: {watch_id}'}), 404
+    if request.method == 'DELETE':
+        watch.stop(timeout=10)
+        del watches[watch_id]
+    return jsonify(watch.status()), 200
+
+# --- Project Persistence ---
+@app.route('/project', methods=['GET', 'POST'])
+def project_status():
+    if request.method == 'POST':
+        try:
+            wait = route_plans.form_number(request.args, 'wait', None)
+        except route_plans.PlanError as e:
+            return jsonify({'error': str(e)}), 400
+        saver.request()
+        if wait is not None: saver.flush(wait)
+    return jsonify(saver.status()), 200
+
+# --- Readiness ---
+@app.route('/ready')
+def readiness():
+    origin = worker.attached.is_set() and worker.attach_error is None
+    ready = origin and startup['imports'] is not None and startup['import_error'] is None
+    return jsonify({'ready': ready, 'origin': origin, 'origin_error': worker.attach_error,
+                    'imports': startup['imports'] is not None, 'import_error': startup['import_error'],
+                    'seconds': time.time() - startup['started']}), 200 if ready else 503
+
+# --- Splash Helper ---
+SPLASH_TIMEOUT = 60
+
+def close_splash_when_ready():
     """
-    Runs in a background thread. 
-    Waits 3 seconds, then ruthlessly kills the splash screen.
+    Runs in a background thread. Closes the splash once Origin is attached
+    and the data path is imported (or attaching failed), at most
+    SPLASH_TIMEOUT seconds after start.
     """
-    time.sleep(3)
+    deadline = time.time() + SPLASH_TIMEOUT
+    worker.attached.wait(SPLASH_TIMEOUT)
+    while startup['imports'] is None and time.time() < deadline:
+        time.sleep(0.05)
     if getattr(sys, 'frozen', False):
         try:
             import pyi_splash
@@ -420,11 +494,22 @@ def close_splash_forcefully():
             pass
 
 def start_server():
-    app.run(host='127.0.0.1', port=5000, threaded=False)
+    app.run(host='127.0.0.1', port=5000, threaded=True)
+
+def wait_for_server(host='127.0.0.1', port=5000, timeout=10):
+    import socket
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.2): return True
+        except OSError:
+            time.sleep(0.02)
+    return False
 
 if __name__ == '__main__':
-    # 1. Start the "Splash Killer" thread immediately
-    threading.Thread(target=close_splash_forcefully, daemon=True).start()
+    # 1. Attach Origin and import the data path while the splash is up
+    prewarm()
+    threading.Thread(target=close_splash_when_ready, daemon=True).start()
 
     # 2. Start the Flask Server
     if os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
@@ -432,7 +517,9 @@ if __name__ == '__main__':
         t.daemon = True
         t.start()
         
-        # 3. Start the GUI
+        # 3. Start the GUI as soon as Flask is listening
+        import webview
+        wait_for_server()
         webview.create_window(
             "Lab Automation Dashboard", 
             "http://127.0.0.1:5000", 
@@ -440,4 +527,9 @@ if __name__ == '__main__':
             height=800
         )
         
-        webview.start()
\ No newline at end of file
+        webview.start()
+        for watch in list(watches.values()): watch.stop(timeout=5)
+        saver.stop(timeout=60)
+        worker.stop(timeout=10)
+        with previews_lock: tokens = list(previews)
+        for token in tokens: drop_preview(token)
\ No newline at end of file
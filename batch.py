@@ -0,0 +1,228 @@
+"""
+Headless batch runner: re-plots a directory (or a manifest) of runs through
+the same route plans the UI uses, without the webview.
+Usage: python batch.py <route> <dir | manifest.jsonl> [--set pressure=1.2] [--backend origin|fake|none]
+Parsing, sweep segmentation and grouping run on a process pool; the plans
+feed the single Origin/PPTX stage on this thread through a bounded queue.
+--backend none skips Origin and writes each job's sheets as CSV plus a
+summary.json, and summary.csv across all jobs.
+
+A manifest is JSON lines, one form per job: file keys map to paths
+(relative to the manifest), everything else is a form field, e.g.
+  {"name": "p1", "cooling": "p1_cool.dat", "warming": "p1_warm.dat", "pressure": "1.2"}
+In directory mode each file matching --pattern is one job; routes with
+several files pair them by stem, e.g. run1_cooling.dat + run1_warming.dat.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# --- Jobs ---
+def _route(route):
+    from route_plans import ROUTES
+    return ROUTES[route]
+
+def directory_jobs(route, root, pattern='*'):
+    """[(name, {file key: path}, form)] for every matching file (or file set) in root."""
+    file_keys = _route(route)[0]
+    names = sorted(n for n in os.listdir(root) if fnmatch.fnmatch(n, pattern)
+                   and os.path.isfile(os.path.join(root, n)))
+    if len(file_keys) == 1:
+        return [(os.path.splitext(n)[0], {file_keys[0]: os.path.join(root, n)}, {}) for n in names]
+    sets = {}
+    for n in names:
+        for key in file_keys:
+            if key in n.lower():
+                stem = re.sub(key, '', os.path.splitext(n)[0], flags=re.I).strip('_- .')
+                sets.setdefault(stem, {})[key] = os.path.join(root, n)
+                break
+    return [(stem, paths, {}) for stem, paths in sorted(sets.items()) if len(paths) == len(file_keys)]
+
+def manifest_jobs(route, path):
+    file_keys = _route(route)[0]
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    with open(path) as fh:
+        for i, line in enumerate(fh):
+            if not line.strip(): continue
+            form = json.loads(line)
+            paths = {key: os.path.join(base, form.pop(key)) for key in file_keys if key in form}
+            name = str(form.pop('name', '') or os.path.splitext(os.path.basename(next(iter(paths.values()), f'job{i}')))[0])
+            jobs.append((name, paths, {k: str(v) for k, v in form.items()}))
+    return jobs
+
+# --- Parse Stage (pool processes) ---
+# Pool processes parse without the parse cache: each would open its own
+# ParseCache on the shared folder, sweep the others' unfinished entries,
+# evict files the others still list and overrun LABPLOTTER_CACHE_MB
+# between them.
+
+def safe_name(name):
+    return re.sub(r'[\\/:*?"<>|\n]', '_', str(name)).strip() or '_'
+
+def write_outputs(plan, folder, summary):
+    """Each sheet as CSV plus summary.json; nothing touches Origin."""
+    os.makedirs(folder, exist_ok=True)
+    for spec in plan.sheets:
+        spec['df'].to_csv(os.path.join(folder, safe_name(spec['name']) + '.csv'), index=False)
+    with open(os.path.join(folder, 'summary.json'), 'w') as fh:
+        json.dump(summary, fh, indent=1, default=str)
+
+def prepare_job(route, name, paths, form, out=None):
+    """
+    Parse and plan one job. Returns (summary, plan, pptx name), or
+    (summary, None, None) once the outputs are written when out is set.
+    """
+    from loaders import read_upload
+    from route_plans import ROUTES, parse_params
+    file_keys, form_keys, build = ROUTES[route]
+    params = parse_params(form, form_keys)
+    t0 = time.perf_counter()
+    handles = {key: open(path, 'rb') for key, path in paths.items()}
+    try:
+        missing = [key for key in file_keys if key not in handles]
+        if missing: raise ValueError(f'Missing file: {missing[0]}')
+        plan, pptx_name = build(handles, params, lambda f, fmt, by=None, prepare=None: read_upload(
+            f, fmt, by, prepare, params['float32']))
+    finally:
+        for fh in handles.values(): fh.close()
+    before = after = plan.points()
+    if params['pointBudget']:
+        before, after = plan.decimate(params['pointBudget'], params['decimation'], params['rawSheet'])
+    summary = {'name': name, 'route': route, 'files': paths, 'params': params, 'pptx': pptx_name,
+               'rows': plan.rows(), 'sheets': [{'name': s['name'], 'rows': len(s['df']), 'columns': list(s['df'].columns)}
+                                               for s in plan.sheets],
+               'graphs': len(plan.graphs), 'points_before': before, 'points_after': after,
+               'parse_seconds': time.perf_counter() - t0, 'pid': os.getpid()}
+    if out is None: return summary, plan, pptx_name
+    write_outputs(plan, os.path.join(out, safe_name(name)), summary)
+    return summary, None, None
+
+# --- Origin Stage (this thread) ---
+def run_batch(route, jobs, out, workers=None, depth=4, backend=None, save_project=None, log=print):
+    """
+    Run every job; returns one result dict per job in job order. In-flight
+    parses are capped at workers + depth so memory stays bounded however
+    far Origin falls behind.
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(out, exist_ok=True)
+    ready = queue.Queue(maxsize=depth)
+
+    def feed():
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for name, paths, form in jobs:
+                pending.append((name, pool.submit(prepare_job, route, name, paths, form,
+                                                  out if backend is None else None)))
+                if len(pending) >= workers + depth: ready.put(_collect(*pending.popleft()))
+            while pending: ready.put(_collect(*pending.popleft()))
+        ready.put(None)
+
+    feeder = threading.Thread(target=feed, name='batch-feed', daemon=True)
+    t0 = time.perf_counter()
+    feeder.start()
+    results = []
+    if backend is not None: backend.attach()
+    try:
+        while True:
+            item = ready.get()
+            if item is None: break
+            result, plan, pptx_name = item
+            if plan is not None and result['error'] is None:
+                try:
+                    result['origin_seconds'], result['pptx_path'] = _render(plan, pptx_name, result, out, backend)
+                except Exception as e:
+                    traceback.print_exc()
+                    result['error'] = str(e)
+            results.append(result)
+            log(f"[{len(results)}/{len(jobs)}] {result['name']}: " + (f"error: {result['error']}" if result['error'] else
+                f"{result['rows']} rows, {len(result['sheets'])} sheets, {result['graphs']} graphs, "
+                f"parse {result['parse_seconds']:.2f}s"))
+        if backend is not None and save_project:
+            backend.op.save(os.path.abspath(os.path.join(out, save_project)))
+    finally:
+        if backend is not None: backend.detach()
+    feeder.join()
+    _write_summary(results, out)
+    log(f'{len(results)} jobs in {time.perf_counter() - t0:.2f}s, {sum(bool(r["error"]) for r in results)} failed')
+    return results
+
+def _collect(name, future):
+    try:
+        summary, plan, pptx_name = future.result()
+        return dict(summary, error=None), plan, pptx_name
+    except Exception as e:
+        return {'name': name, 'error': f'{type(e).__name__}: {e}', 'rows': 0, 'sheets': [], 'graphs': 0,
+                'parse_seconds': 0.0}, None, None
+
+def _render(plan, pptx_name, result, out, backend):
+    from pptx_export import export_slides
+    from render_plan import execute_plan
+    t0 = time.perf_counter()
+    graphs = execute_plan(plan, backend.op)
+    path = None
+    if result['params']['createPPT']:
+        folder = os.path.join(out, safe_name(result['name']))
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.abspath(os.path.join(folder, pptx_name))
+        export_slides(graphs, path, slide=result['params']['slideSize'], dpi=result['params']['pptDpi'])
+    return time.perf_counter() - t0, path
+
+def _write_summary(results, out):
+    import csv
+    fields = ['name', 'route', 'error', 'rows', 'sheets', 'graphs', 'points_before', 'points_after',
+              'parse_seconds', 'origin_seconds', 'pptx_path']
+    with open(os.path.join(out, 'summary.csv'), 'w', newline='') as fh:
+        writer = csv.DictWriter(fh, fields, extrasaction='ignore')
+        writer.writeheader()
+        for r in results: writer.writerow(dict(r, sheets=len(r['sheets'])))
+
+# --- CLI ---
+def main(argv=None):
+    from route_plans import ROUTES
+    parser = argparse.ArgumentParser(description='LabPlotter batch runner')
+    parser.add_argument('route', choices=sorted(ROUTES))
+    parser.add_argument('source', help='directory of measurement files or a JSON-lines manifest')
+    parser.add_argument('--pattern', default='*', help='file glob in directory mode')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='form field for every job (pressure=1.2, createPPT=false, pointBudget=2000, ...)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--queue', type=int, default=4, help='parsed jobs waiting for Origin')
+    parser.add_argument('--backend', choices=['origin', 'fake', 'none'], default='origin')
+    parser.add_argument('--out', default='batch_out')
+    parser.add_argument('--save-project', metavar='NAME.opju', help='save the Origin project once at the end')
+    args = parser.parse_args(argv)
+
+    defaults = {'createPPT': 'true', 'lastModified': ''}
+    for item in args.set:
+        key, _, value = item.partition('=')
+        defaults[key] = value
+    if os.path.isdir(args.source):
+        jobs = directory_jobs(args.route, args.source, args.pattern)
+    else:
+        jobs = manifest_jobs(args.route, args.source)
+    jobs = [(name, paths, dict(defaults, **form)) for name, paths, form in jobs]
+    if not jobs:
+        print(f'No jobs found in {args.source}')
+        return 1
+    backend = None
+    if args.backend != 'none':
+        from origin_worker import load_backend
+        backend = load_backend(args.backend)
+    results = run_batch(args.route, jobs, args.out, args.workers, args.queue, backend, args.save_project)
+    return 1 if any(r['error'] for r in results) else 0
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support()
+    sys.exit(main())
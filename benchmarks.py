@@ -0,0 +1,742 @@
+"""
+Benchmarks for the LabPlotter data path.
+Usage: python benchmarks.py <benchmark> [--rows N] [--groups N] [--workdir DIR]
+`routes` posts a synthetic file to every Flask route through the test
+client against fake_originpro, so it runs without Origin or Windows.
+"""
+import argparse
+import io
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+# --- Synthetic Instrument Files ---
+def _sweep_temperature(rows, t_low=2.0, t_high=300.0):
+    half = rows // 2
+    down = np.linspace(t_high, t_low, half)
+    up = np.linspace(t_low, t_high, rows - half)
+    return np.concatenate([down, up])
+
+# Column counts roughly match the real exports; MPMS files are the wide ones.
+FORMAT_WIDTHS = {'dewar': 6, 'dewar_strip': 6, 'current_effect': 12, 'mpms': 70,
+                 'mpms_magnetic': 70, 'mpms_ac': 70}
+
+# Step values for the column a route groups by.
+GROUP_STEPS = {'MagneticField': 1000.0, 'Magnetic field': 1000.0, 'Current': 0.5, 'Frequency': 10.0}
+
+def write_format_file(path, fmt, rows, groups=1, chunk=200_000):
+    """Synthetic file laid out like a route format in loaders.FORMATS."""
+    from loaders import FORMATS
+    spec = FORMATS[fmt]
+    ncols = max(FORMAT_WIDTHS.get(fmt, 20), max(spec['usecols']) + 1)
+    t_col = spec['usecols'][spec['colnames'].index('Temperature')]
+    group_cols = {spec['usecols'][spec['colnames'].index(name)]: step
+                  for name, step in GROUP_STEPS.items() if name in spec['colnames']}
+    per_group = -(-rows // max(groups, 1))
+    rng = np.random.default_rng(0)
+    temps = np.concatenate([_sweep_temperature(per_group) for _ in range(max(groups, 1))])[:rows]
+    with open(path, 'w', encoding='latin1', newline='\n') as fh:
+        if spec['skiprows'] == -1:
+            fh.write('[Header]\n; Synthetic Quantum Design export\nBYAPP, LabPlotter benchmark\n')
+            for i in range(20): fh.write(f'INFO, header line {i}\n')
+            fh.write('[Data]\n')
+        else:
+            for i in range(spec['skiprows']): fh.write(f'Synthetic header line {i}\n')
+        fh.write(','.join(f'Col{i} (\xb5\xa9)' for i in range(ncols)) + '\n')
+        for start in range(0, rows, chunk):
+            t = temps[start:start + chunk]
+            block = rng.random((len(t), ncols))
+            block[:, t_col] = t
+            for col, step in group_cols.items():
+                block[:, col] = (np.arange(start, start + len(t)) // per_group + 1) * step
+            np.savetxt(fh, block, delimiter=',', fmt='%.6g')
+
+def format_file(workdir, fmt, rows, groups=1):
+    path = os.path.join(workdir, f'{fmt}_{rows}_{groups}.dat')
+    if not os.path.exists(path): write_format_file(path, fmt, rows, groups)
+    return path
+
+# --- Baseline (pre single-pass loader) ---
+def legacy_load_data(file_obj, skiprows, usecols, colnames):
+    sample = file_obj.read(1024).decode('latin1', errors='ignore')
+    file_obj.seek(0)
+    delim = ',' if ',' in sample else ('\t' if '\t' in sample else ',')
+    if skiprows == -1:
+        lines = file_obj.read().decode('latin1').splitlines()
+        file_obj.seek(0)
+        skiprows = next((i + 1 for i, line in enumerate(lines) if '[Data]' in line), 0)
+        del lines
+    try:
+        df = pd.read_csv(file_obj, delimiter=delim, skiprows=skiprows, encoding='utf-8')
+    except UnicodeDecodeError:
+        file_obj.seek(0)
+        df = pd.read_csv(file_obj, delimiter=delim, skiprows=skiprows, encoding='latin1')
+    df = df.iloc[:, usecols]
+    df.columns = colnames
+    return df
+
+def legacy_render(plan, op):
+    """Old setup_graph/add_plot path: a 0.1 s op.wait after every graph and plot."""
+    books = [op.new_book('w', lname=lname) for lname in plan.books]
+    sheets = []
+    for spec in plan.sheets:
+        wks = op.new_sheet('w', lname=spec['name']) if spec['book'] is None else books[spec['book']].add_sheet(spec['name'])
+        wks.from_df(spec['df'])
+        sheets.append(wks)
+    for spec in plan.graphs:
+        graph = op.new_graph(template=spec['template'])
+        layer = graph[0]
+        layer.axis('x').title = spec['x_title']
+        layer.axis('y').title = spec['y_title']
+        if spec['label']: layer.label('Text').text = spec['label']
+        op.wait('s', 0.1)
+        for p in spec['plots']:
+            plot = layer.add_plot(sheets[p['sheet']], colx=p['x'], coly=p['y'])
+            plot.color = op.ocolor(p['color'])
+            if p['name']: plot.name = p['name']
+            op.wait('s', 0.1)
+        layer.label('Legend').text = spec['legend']
+        layer.rescale()
+
+def legacy_export(graphs, path):
+    """Old export_graphs_to_pptx body: temp PNGs in the cwd, fixed 1200 px, one by one."""
+    from pptx import Presentation
+    from pptx.util import Inches
+    prs = Presentation()
+    blank = prs.slide_layouts[6]
+    for graph in graphs:
+        temp = os.path.join(os.getcwd(), f"temp_{id(graph)}.png")
+        graph.save_fig(temp, type='png', width=1200)
+        prs.slides.add_slide(blank).shapes.add_picture(temp, Inches(0.5), Inches(1), height=Inches(5.5))
+        try: os.remove(temp)
+        except OSError: pass
+    prs.save(path)
+
+_FIGURES = {}
+
+def synthetic_figure(seed, width):
+    """Anti-aliased line-plot PNG like Origin's export, drawn once per (seed, width)."""
+    from PIL import Image, ImageDraw
+    if (seed, width) in _FIGURES: return _FIGURES[seed, width]
+    w, h = width * 2, width * 3 // 2
+    img = Image.new('RGB', (w, h), 'white')
+    draw = ImageDraw.Draw(img)
+    x = np.linspace(w * 0.1, w * 0.9, 2000)
+    rng = np.random.default_rng(seed)
+    for k in range(4):
+        y = h * (0.5 + 0.3 * np.tanh((x - w * (0.3 + 0.1 * k)) / 80)) + rng.normal(0, 6, len(x))
+        draw.line(list(zip(x, y)), fill=('black', 'red', 'blue', 'green')[k], width=max(2, w // 500))
+    draw.rectangle([w // 10, h // 10, w - w // 10, h - h // 10], outline='black', width=max(2, w // 500))
+    out = io.BytesIO()
+    img.resize((width, h // 2), Image.LANCZOS).save(out, format='PNG')
+    _FIGURES[seed, width] = out.getvalue()
+    return _FIGURES[seed, width]
+
+class PlotFigure:
+    """Graph stand-in: save_fig spends `seconds` "rendering", then writes a synthetic PNG."""
+    def __init__(self, seed, seconds=0.0, fixed_width=None):
+        self.seed, self.seconds, self.fixed_width = seed, seconds, fixed_width
+
+    def save_fig(self, path, type='png', width=800, **kwargs):
+        data = synthetic_figure(self.seed, self.fixed_width or width)
+        time.sleep(self.seconds)
+        with open(path, 'wb') as fh:
+            fh.write(data)
+        return path
+
+# --- Measurement Helpers ---
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+def _isolated(target, args, out):
+    out.put(target(*args))
+
+# Peak RSS survives fork+exec, so children come from a forkserver started
+# before any test data is generated (spawn on Windows).
+START_METHOD = 'forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'
+
+def run_isolated(target, *args):
+    """Run target in a fresh process so peak RSS is not shared between cases."""
+    ctx = mp.get_context(START_METHOD)
+    out = ctx.Queue()
+    proc = ctx.Process(target=_isolated, args=(target, args, out))
+    proc.start()
+    result = out.get()
+    proc.join()
+    return result
+
+def _loader_case(name, path, skiprows, usecols):
+    from loaders import load_data
+    loader = legacy_load_data if name == 'legacy' else load_data
+    names = [f'c{i}' for i in range(len(usecols))]
+    base = peak_rss_mb()
+    t0 = time.perf_counter()
+    with open(path, 'rb') as fh:
+        df = loader(fh, skiprows, usecols, names)
+    elapsed = time.perf_counter() - t0
+    return {'case': name, 'rows': len(df), 'seconds': elapsed,
+            'peak_rss_mb': peak_rss_mb(), 'baseline_rss_mb': base}
+
+def report(rows):
+    for r in rows:
+        print('  ' + '  '.join(f'{k}={v:.3f}' if isinstance(v, float) else f'{k}={v}' for k, v in r.items()))
+
+def _pushdown_case(name, path, fmt):
+    from loaders import FORMATS, load_format, sniff_layout
+    base = peak_rss_mb()
+    t0 = time.perf_counter()
+    with open(path, 'rb') as fh:
+        if name == 'full_parse':
+            spec = FORMATS[fmt]
+            layout = sniff_layout(fh, spec['skiprows'])
+            df = pd.read_csv(fh, delimiter=layout.delimiter, encoding='latin1').iloc[:, spec['usecols']]
+        else:
+            df = load_format(fh, fmt, compact=name.endswith('float32'),
+                             engine='pyarrow' if name.startswith('pyarrow') else 'c')
+    elapsed = time.perf_counter() - t0
+    return {'case': name, 'rows': len(df), 'rows_per_s': len(df) / elapsed,
+            'peak_rss_mb': peak_rss_mb(), 'baseline_rss_mb': base}
+
+# --- Benchmarks ---
+def bench_loader(args):
+    path = format_file(args.workdir, 'ppms', args.rows)
+    print(f'loader: {path} ({os.path.getsize(path) / 1e6:.1f} MB)')
+    report([run_isolated(_loader_case, name, path, -1, [3, 12, 13]) for name in ('legacy', 'single_pass')])
+
+def bench_pushdown(args):
+    from loaders import FORMATS, resolve_engine
+    cases = ['full_parse', 'pushdown', 'pushdown_float32']
+    if resolve_engine('auto') == 'pyarrow': cases += ['pyarrow', 'pyarrow_float32']
+    for fmt in FORMATS:
+        path = format_file(args.workdir, fmt, args.rows)
+        print(f'pushdown [{fmt}]: {os.path.getsize(path) / 1e6:.1f} MB')
+        report([run_isolated(_pushdown_case, name, path, fmt) for name in cases])
+
+def _best_of(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def bench_partition(args):
+    from processing import partition_by
+    rng = np.random.default_rng(0)
+    steps = np.repeat(np.arange(args.groups) * 1000.0, -(-args.rows // args.groups))[:args.rows]
+    layouts = {'contiguous': steps, 'interleaved': rng.permutation(steps)}
+    for layout, keys in layouts.items():
+        df = pd.DataFrame({'Temperature': rng.random(args.rows), 'MagneticField': keys,
+                           'R1': rng.random(args.rows), 'R2': rng.random(args.rows)})
+        def mask_loop():
+            # Two channels, as in current_effect / upload_ppms_magnetic_file.
+            for _ in range(2):
+                for value in df['MagneticField'].unique():
+                    sub = df[df['MagneticField'] == value]
+        def partitioned():
+            groups = partition_by(df, 'MagneticField')
+            for _ in range(2):
+                for value, sub in groups: pass
+        print(f'partition [{layout}]: rows={args.rows} groups={args.groups}')
+        report([{'case': 'mask_loop', 'seconds': _best_of(mask_loop)},
+                {'case': 'partition_by', 'seconds': _best_of(partitioned)}])
+
+def bench_segment(args):
+    from processing import segment_sweeps
+    rng = np.random.default_rng(0)
+    cycles = max(1, args.groups // 10)
+    temps = np.concatenate([_sweep_temperature(args.rows // cycles) for _ in range(cycles)])
+    temps += rng.normal(0, 0.05, len(temps))
+    series = pd.Series(temps)
+    def single_split():
+        idx = series.idxmin()
+        return series.iloc[:idx + 1], series.iloc[idx + 1:]
+    segments = segment_sweeps(temps)
+    print(f'segment: rows={len(temps)} cycles={cycles} sweeps_found={len(segments)}')
+    report([{'case': 'single_idxmin_split', 'seconds': _best_of(single_split)},
+            {'case': 'segment_sweeps', 'seconds': _best_of(lambda: segment_sweeps(temps))}])
+    # Scatter at or above the tolerance turns almost every row into a reversal.
+    noisy = [('ramp_scatter_1K', np.linspace(2.0, 50.0, args.rows) + rng.uniform(-1, 1, args.rows), 0.5),
+             ('cycle_noise_20mK', _sweep_temperature(args.rows) + rng.normal(0, 0.02, args.rows), 0.05)]
+    rows = []
+    for case, t, tolerance in noisy:
+        rows.append({'case': case, 'tolerance': tolerance, 'sweeps_found': len(segment_sweeps(t, tolerance)),
+                     'seconds': _best_of(lambda: segment_sweeps(t, tolerance), repeat=1)})
+    print(f'segment [many reversals]: rows={args.rows}')
+    report(rows)
+
+def bench_worker(args):
+    import fake_originpro as fo
+    from concurrent.futures import ThreadPoolExecutor
+    from origin_worker import FakeBackend, OriginWorker
+    fo.ATTACH_SECONDS = args.attach_seconds
+    df = pd.DataFrame({'Temperature': np.arange(100.0), 'R1': np.arange(100.0)})
+    def job():
+        fo.new_sheet('w', lname='bench').from_df(df)
+        return 'ok'
+    def per_request():
+        # Old OriginContext + finalize_origin: attach and detach around every job.
+        fo.attach(); fo.set_show(True)
+        job()
+        fo.detach()
+    # The old server ran with threaded=False, so requests were serial.
+    t0 = time.perf_counter()
+    for _ in range(args.jobs): per_request()
+    per_request_s = time.perf_counter() - t0
+    worker = OriginWorker(FakeBackend())
+    worker.wait(worker.submit(lambda: None, 'warmup'))
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(4) as pool: ids = list(pool.map(lambda _: worker.submit(job, 'bench'), range(args.jobs)))
+    stats = [worker.wait(job_id) for job_id in ids]
+    worker_s = time.perf_counter() - t0
+    worker.stop()
+    latency = np.array([s['queue_seconds'] for s in stats])
+    print(f'worker: jobs={args.jobs} attach_seconds={args.attach_seconds}')
+    report([{'case': 'attach_per_request', 'seconds': per_request_s, 'jobs_per_s': args.jobs / per_request_s},
+            {'case': 'persistent_worker', 'seconds': worker_s, 'jobs_per_s': args.jobs / worker_s,
+             'queue_p50_ms': float(np.percentile(latency, 50) * 1e3),
+             'queue_p95_ms': float(np.percentile(latency, 95) * 1e3)}])
+
+def ppms_magnetic_plan(df):
+    """The plan /ppms_magnetic builds: one sheet and plot per field per channel."""
+    from processing import partition_by
+    from render_plan import RenderPlan
+    groups = partition_by(df, 'MagneticField')
+    plan = RenderPlan()
+    wb = plan.book('MagneticFieldData bench')
+    for ch in ('1', '2'):
+        graph = plan.graph('Scatter', 'T (K)', 'R (Ω)', '', f'Ch. {ch}')
+        for i, (field, sub) in enumerate(groups):
+            plan.plot(graph, plan.sheet(f'Field_{field}', sub[['Temperature', f'R{ch}']], wb), 0, 1, i)
+            graph['legend'] += f'\\l({i+1}) {round(field)/1000} T\n'
+    return plan
+
+def bench_render(args):
+    import fake_originpro as fo
+    from loaders import load_format
+    from render_plan import replay_plan
+    fo.CALL_SECONDS = args.call_seconds
+    with open(format_file(args.workdir, 'ppms_magnetic', args.rows, args.groups), 'rb') as fh:
+        plan = ppms_magnetic_plan(load_format(fh, 'ppms_magnetic'))
+    fo.reset()
+    t0 = time.perf_counter()
+    legacy_render(plan, fo)
+    legacy_s, legacy_calls = time.perf_counter() - t0, len(fo.calls)
+    _, calls, seconds = replay_plan(plan, fo)
+    print(f'render: groups={args.groups} graphs={len(plan.graphs)} sheets={len(plan.sheets)} call_seconds={args.call_seconds}')
+    report([{'case': 'legacy_helpers', 'calls': legacy_calls, 'seconds': legacy_s},
+            {'case': 'render_plan', 'calls': calls, 'seconds': seconds}])
+
+def bench_decimate(args):
+    import fake_originpro as fo
+    from loaders import load_format
+    from processing import split_sweeps
+    from render_plan import RenderPlan, replay_plan
+    fo.CALL_SECONDS, fo.POINT_SECONDS = args.call_seconds, args.point_seconds
+    with open(format_file(args.workdir, 'ppms', args.rows), 'rb') as fh:
+        df = load_format(fh, 'ppms')
+    rows = []
+    for method in (None, 'lttb', 'minmax'):
+        plan = RenderPlan()
+        sheets = [plan.sheet(f'{seg.direction} {i}', frame) for i, (seg, frame) in enumerate(split_sweeps(df))]
+        for y_idx in (1, 2):
+            graph = plan.graph('Scatter', 'T (K)', 'R (Ω)')
+            for i, wks in enumerate(sheets):
+                plan.plot(graph, wks, 0, y_idx, i)
+        t0 = time.perf_counter()
+        before, after = plan.decimate(args.budget, method) if method else (plan.points(), plan.points())
+        thin_s = time.perf_counter() - t0
+        _, calls, seconds = replay_plan(plan, fo)
+        rows.append({'case': method or 'full', 'points_before': before, 'points_after': after,
+                     'decimate_s': thin_s, 'origin_s': seconds, 'total_s': thin_s + seconds})
+    print(f'decimate: rows={args.rows} budget={args.budget} point_seconds={args.point_seconds}')
+    report(rows)
+
+def bench_cache(args):
+    from loaders import load_format
+    from parse_cache import ParseCache
+    root = os.path.join(args.workdir, 'parse_cache')
+    rows = []
+    for fmt in ('ppms_magnetic', 'mpms'):
+        path = format_file(args.workdir, fmt, args.rows)
+        cache = ParseCache(root, 2 ** 32)
+        cache.invalidate()
+        def load(cache=None):
+            with open(path, 'rb') as fh: return load_format(fh, fmt, cache=cache)
+        parse_s = _best_of(load)
+        t0 = time.perf_counter()
+        load(cache)
+        miss_s = time.perf_counter() - t0
+        hit_s = _best_of(lambda: load(cache))
+        rows.append({'case': fmt, 'parse_s': parse_s, 'miss_store_s': miss_s, 'hit_s': hit_s,
+                     'speedup': parse_s / hit_s, 'entry_mb': cache.stats()['bytes'] / 2 ** 20})
+    print(f'cache: rows={args.rows}')
+    report(rows)
+
+def bench_metrics(args):
+    from metrics import Metrics
+    m = Metrics(log=False)
+    n = 200_000
+    def spans():
+        for _ in range(n):
+            with m.span('ppms', 'parse'): pass
+    def bare():
+        for _ in range(n): pass
+    overhead = (_best_of(spans) - _best_of(bare)) / n
+    print(f'metrics: spans={n}')
+    report([{'case': 'span', 'overhead_us': overhead * 1e6}])
+
+# Every upload route with the files and form fields it needs.
+ROUTES = [
+    ('dewar', 'dewar', ['cooling', 'warming'], {'pressure': '1'}),
+    ('dewar_strip', 'dewar_strip', ['datafile'], {'pressure': '1'}),
+    ('ppms', 'ppms', ['datafile'], {'pressure': '1'}),
+    ('current_effect', 'current_effect', ['datafile'], {'pressure': '1'}),
+    ('ppms_magnetic', 'ppms_magnetic', ['datafile'], {'pressure': '1'}),
+    ('ppms_heat_capacity', 'ppms_heat_capacity', ['datafile'], {'mass_heat_cap': '1'}),
+    ('ppms_heat_capacity_cw', 'ppms_heat_capacity_cw', ['datafile'], {'mass': '1'}),
+    ('mpms', 'mpms', ['datafile'], {'magnetic_moment': '100'}),
+    ('mpms_magnetic', 'mpms_magnetic', ['datafile'], {'mass': '1'}),
+    ('mpms_ac', 'mpms_ac', ['datafile'], {'mass_ac': '1', 'MF_dc': '1', 'MF_ac': '1'}),
+]
+
+def _route_case(route, path, rows, file_keys, fields, outdir, export):
+    """Runs in a fresh process: import the app on the fake backend and post one upload."""
+    os.environ['LABPLOTTER_BACKEND'] = 'fake'
+    os.environ['LABPLOTTER_CACHE_MB'] = '0'
+    os.chdir(outdir)
+    import app
+    import fake_originpro as fo
+    client = app.app.test_client()
+    data = dict(fields, lastModified='2025-01-01', createPPT=str(export).lower(), saveProject=str(export).lower())
+    handles = [open(path, 'rb') for _ in file_keys]
+    for key, fh in zip(file_keys, handles): data[key] = (fh, os.path.basename(path))
+    fo.reset()
+    base = peak_rss_mb()
+    t0 = time.perf_counter()
+    response = client.post('/' + route, data=data, content_type='multipart/form-data')
+    elapsed = time.perf_counter() - t0
+    for fh in handles: fh.close()
+    app.worker.stop(timeout=10)
+    rows *= len(file_keys)
+    sheet_rows = app.metrics.snapshot()['routes'].get(route, {}).get('rows', 0)
+    return {'case': route, 'status': response.status_code, 'rows': rows, 'sheet_rows': sheet_rows, 'seconds': elapsed,
+            'rows_per_s': rows / elapsed if elapsed else 0.0, 'peak_rss_mb': peak_rss_mb(),
+            'baseline_rss_mb': base, 'calls': len(fo.calls), 'from_df': fo.counts['from_df'],
+            'add_plot': fo.counts['add_plot'], 'save_fig': fo.counts['save_fig']}
+
+def bench_routes(args):
+    outdir = os.path.join(args.workdir, 'routes_out')
+    os.makedirs(outdir, exist_ok=True)
+    rows = []
+    for route, fmt, file_keys, fields in ROUTES:
+        path = format_file(args.workdir, fmt, args.rows, args.groups)
+        rows.append(run_isolated(_route_case, route, path, args.rows, file_keys, fields, outdir, not args.no_export))
+    print(f'routes: rows={args.rows} groups={args.groups} export={not args.no_export} backend=fake')
+    report(rows)
+
+# Runs with `python -c` so nothing is preloaded (benchmarks.py itself
+# imports numpy and pandas, and forkserver children would inherit them).
+STARTUP_SCRIPT = """
+import json, os, sys, time
+t0 = time.perf_counter()
+mode, path, outdir, attach_seconds = sys.argv[1], sys.argv[2], sys.argv[3], float(sys.argv[4])
+os.environ['LABPLOTTER_BACKEND'] = 'fake'
+os.environ['LABPLOTTER_CACHE_MB'] = '0'
+os.chdir(outdir)
+import fake_originpro as fo
+fo.ATTACH_SECONDS = attach_seconds
+if mode == 'eager':
+    # What app.py used to do: import the whole data path up front and
+    # attach to Origin on the first job.
+    import pandas, pptx, loaders, processing, render_plan, pptx_export, parse_cache
+import app
+window_s = time.perf_counter() - t0
+client = app.app.test_client()
+if mode == 'prewarm':
+    app.prewarm()
+    while client.get('/ready').status_code != 200: time.sleep(0.01)
+ready_s = time.perf_counter() - t0
+with open(path, 'rb') as fh:
+    t1 = time.perf_counter()
+    response = client.post('/ppms', data={'pressure': '1', 'lastModified': '', 'datafile': (fh, 'ppms.dat')},
+                           content_type='multipart/form-data')
+first_s = time.perf_counter() - t1
+app.worker.stop(timeout=10)
+print(json.dumps({'case': mode, 'status': response.status_code, 'window_s': window_s, 'ready_s': ready_s,
+                  'first_request_s': first_s, 'first_response_s': time.perf_counter() - t0}))
+"""
+
+def bench_startup(args):
+    import json
+    import subprocess
+    outdir = os.path.join(args.workdir, 'routes_out')
+    os.makedirs(outdir, exist_ok=True)
+    path = format_file(args.workdir, 'ppms', 20_000)
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get('PYTHONPATH')])))
+    rows = []
+    for mode in ('eager', 'prewarm'):
+        out = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, mode, path, outdir, str(args.attach_seconds)],
+                             env=env, capture_output=True, text=True, check=True).stdout
+        rows.append(json.loads(out.strip().splitlines()[-1]))
+    print(f'startup: attach_seconds={args.attach_seconds} rows=20000')
+    report(rows)
+
+def bench_tail(args):
+    import fake_originpro as fo
+    from live_tail import LiveSession
+    from loaders import load_format
+    src = format_file(args.workdir, 'ppms', args.rows, 4)
+    with open(src, 'rb') as fh: data = fh.read()
+    live = os.path.join(args.workdir, 'live_ppms.dat')
+    head = data.index(b'\n', data.index(b'[Data]') + 8) + 1
+    lines = np.cumsum([len(line) for line in data[head:].splitlines(keepends=True)]) + head
+    append = 1000
+    rows = []
+    with open(live, 'wb') as fh: fh.write(data[:head])
+    session = LiveSession(live, 'ppms')
+    fo.reset()
+    written = 0
+    for mark in sorted({min(args.rows, m) for m in (10_000, 100_000, args.rows)}):
+        # Catch up to the mark, then time one update of `append` rows.
+        with open(live, 'ab') as fh: fh.write(data[lines[written - 1] if written else head:lines[mark - append - 1]])
+        while session.prepare(): pass
+        with open(live, 'ab') as fh: fh.write(data[lines[mark - append - 1]:lines[mark - 1]])
+        t0 = time.perf_counter()
+        appends = session.prepare()
+        parsed = time.perf_counter() - t0
+        session.apply(appends, fo)
+        update_s = time.perf_counter() - t0
+        written = mark
+        with open(live, 'rb') as fh:
+            reparse_s = _best_of(lambda: load_format(fh, 'ppms'), repeat=1)
+        rows.append({'case': f'file_rows={mark}', 'update_rows': sum(len(f) for _, _, f in appends),
+                     'parse_s': parsed, 'update_s': update_s, 'full_reparse_s': reparse_s})
+    print(f'tail: append={append} rows per update')
+    report(rows)
+
+def bench_batch(args):
+    import shutil
+    from batch import directory_jobs, run_batch
+    os.environ['LABPLOTTER_CACHE_MB'] = '0'  # every file parses for real in the pool
+    src = format_file(args.workdir, 'ppms', args.rows, 4)
+    indir = os.path.join(args.workdir, 'batch_in')
+    os.makedirs(indir, exist_ok=True)
+    files = max(4, args.jobs // 4)
+    for i in range(files):
+        dst = os.path.join(indir, f'run{i:03d}.dat')
+        if not os.path.exists(dst): shutil.copyfile(src, dst)
+    jobs = [(name, paths, {'pressure': '1'}) for name, paths, _ in directory_jobs('ppms', indir)][:files]
+    rows = []
+    for workers in (1, 2, 4):
+        out = os.path.join(args.workdir, f'batch_out_{workers}')
+        shutil.rmtree(out, ignore_errors=True)
+        t0 = time.perf_counter()
+        results = run_batch('ppms', jobs, out, workers, log=lambda msg: None)
+        elapsed = time.perf_counter() - t0
+        rows.append({'case': f'workers={workers}', 'files': len(results), 'seconds': elapsed,
+                     'files_per_s': len(results) / elapsed, 'errors': sum(bool(r['error']) for r in results)})
+    print(f'batch: backend=none rows={args.rows} per file, cpus={os.cpu_count()}')
+    report(rows)
+
+def _stream_case(name, path, fmt, by):
+    import loaders
+    from processing import partition_by
+    base = peak_rss_mb()
+    t0 = time.perf_counter()
+    with open(path, 'rb') as fh:
+        if name == 'single_call':
+            groups = partition_by(loaders.load_format(fh, fmt), by)
+        else:
+            loaders.STREAM_MIN_BYTES = 0
+            groups = loaders.read_upload(fh, fmt, by)
+    elapsed = time.perf_counter() - t0
+    return {'case': name, 'groups': len(groups), 'rows': sum(len(sub) for _, sub in groups), 'seconds': elapsed,
+            'output_mb': sum(sub.memory_usage(index=False).sum() for _, sub in groups) / 2 ** 20,
+            'peak_rss_mb': peak_rss_mb(), 'baseline_rss_mb': base}
+
+def bench_stream(args):
+    fmt, by = 'mpms_magnetic', 'Magnetic field'
+    path = format_file(args.workdir, fmt, args.rows, args.groups)
+    print(f'stream [{fmt}]: {os.path.getsize(path) / 2 ** 20:.0f} MB, grouped by {by}')
+    report([run_isolated(_stream_case, name, path, fmt, by) for name in ('single_call', 'streamed')])
+
+def bench_project(args):
+    import fake_originpro as fo
+    from origin_worker import FakeBackend, OriginWorker
+    from project_saver import ProjectSaver
+    fo.SAVE_SECONDS = 0.002  # per worksheet in the project, so saves grow over the session
+    df = pd.DataFrame({'Temperature': np.arange(100.0), 'R1': np.arange(100.0)})
+    path = os.path.join(args.workdir, 'bench_project.opju')
+    def job():
+        for _ in range(6): fo.new_sheet('w', lname='bench').from_df(df)
+    rows = []
+    for case in ('save_per_request', 'coalesced'):
+        fo.reset()
+        worker = OriginWorker(FakeBackend())
+        worker.wait(worker.submit(lambda: None, 'warmup'))
+        def run(fn):
+            job_ = worker.wait(worker.submit(lambda: fn(fo), 'save'))
+            return job_['result']
+        saver = ProjectSaver(path, run, delay=0.2)
+        latency = []
+        t0 = time.perf_counter()
+        for _ in range(args.jobs):
+            # Requests arrive one after another, as from the UI.
+            t1 = time.perf_counter()
+            if case == 'save_per_request':
+                worker.wait(worker.submit(lambda: (job(), fo.save(path)), 'bench'))
+            else:
+                worker.wait(worker.submit(lambda: (job(), saver.request()), 'bench'))
+            latency.append(time.perf_counter() - t1)
+        saver.flush()
+        durable = time.perf_counter() - t0
+        saver.stop()
+        worker.stop()
+        latency = np.array(latency)
+        rows.append({'case': case, 'saves': fo.counts['save'], 'request_p50_ms': float(np.percentile(latency, 50) * 1e3),
+                     'request_max_ms': float(latency.max() * 1e3), 'all_saved_s': durable})
+    print(f'project: requests={args.jobs} save cost 2 ms per worksheet, 6 worksheets per request')
+    report(rows)
+
+def per_curve_analysis(curves, resistive, points=11, window=10.0, levels=(0.9, 0.5, 0.01)):
+    """Baseline: the same smoothing, derivative and Tc criteria, one curve at a time."""
+    out = []
+    for (t, y), res in zip(curves, resistive):
+        order = np.argsort(t, kind='stable')
+        t, y = t[order], y[order]
+        ys = np.convolve(y, np.ones(points), 'same') / np.convolve(np.ones(len(y)), np.ones(points), 'same')
+        d = np.gradient(ys, t)
+        peak = int(np.nanargmax(d))
+        near = (t >= t[peak]) & (t <= t[peak] + window)
+        r_n = ys[near].max()
+        tcs = []
+        for frac in levels:
+            up = np.flatnonzero((ys[:-1] < frac * r_n) & (ys[1:] >= frac * r_n) & (t[1:] <= t[peak] + window))
+            tcs.append(np.interp(frac * r_n, ys[up[-1]:up[-1] + 2], t[up[-1]:up[-1] + 2]) if len(up) and res else np.nan)
+        out.append((d[peak], t[peak], r_n, *tcs))
+    return out
+
+def bench_analytics(args):
+    from analytics import analyze_curves, compare_pairs
+    rng = np.random.default_rng(0)
+    rows = []
+    for groups, points in ((args.groups, 2500), (1000, 300), (5000, 300)):
+        t = np.linspace(2.0, 300.0, points)
+        tc = rng.uniform(20, 120, groups)
+        curves = [(t, (1 + 0.002 * (t - c)) / (1 + np.exp(-(t - c) / 0.8)) + rng.normal(0, 0.002, points)) for c in tc]
+        resistive = np.ones(groups, dtype=bool)
+        loop_s = _best_of(lambda: per_curve_analysis(curves, resistive), repeat=1)
+        def vectorized():
+            stats, packed = analyze_curves(curves, resistive)
+            compare_pairs(packed, [(i, i + 1) for i in range(0, groups - 1, 2)], stats)
+        vec_s = _best_of(vectorized, repeat=3)
+        rows.append({'case': f'curves={groups}', 'points': points, 'per_curve_s': loop_s, 'vectorized_s': vec_s,
+                     'speedup': loop_s / vec_s})
+    print('analytics: smoothing, dR/dT, onset/mid/zero Tc (+ cooling/warming pairs when vectorized)')
+    report(rows)
+
+def _preview_case(case, route, path, fields, outdir):
+    """Runs in a fresh process: one full upload, or one /preview of the same file."""
+    os.environ['LABPLOTTER_BACKEND'] = 'fake'
+    os.environ['LABPLOTTER_CACHE_MB'] = '0'
+    os.chdir(outdir)
+    import app
+    client = app.app.test_client()
+    kind = case.partition('/')[2]
+    data = dict(fields, lastModified='2025-01-01', createPPT='false', format=kind)
+    with open(path, 'rb') as fh:
+        data['datafile'] = (fh, os.path.basename(path))
+        app.worker.wait(app.worker.submit(lambda: None, 'warmup'))
+        t0 = time.perf_counter()
+        response = client.post(('/preview/' if kind else '/') + route, data=data, content_type='multipart/form-data')
+        elapsed = time.perf_counter() - t0
+    app.worker.stop(timeout=10)
+    parse = app.metrics.snapshot()['stages'][('preview/' if kind else '') + route]['parse']['sum']
+    return {'case': case, 'status': response.status_code, 'seconds': elapsed, 'parse_s': parse,
+            'response_kb': len(response.data) / 1024, 'peak_rss_mb': peak_rss_mb()}
+
+def bench_preview(args):
+    route, fmt, _, fields = next(r for r in ROUTES if r[0] == 'mpms_magnetic')
+    path = format_file(args.workdir, fmt, args.rows, args.groups)
+    outdir = os.path.join(args.workdir, 'routes_out')
+    os.makedirs(outdir, exist_ok=True)
+    print(f'preview [{route}]: {os.path.getsize(path) / 2 ** 20:.0f} MB, full route on the fake backend vs /preview')
+    report([run_isolated(_preview_case, case, route, path, fields, outdir)
+            for case in ('full_route', 'preview/json', 'preview/binary', 'preview/png')])
+
+def bench_pptx(args):
+    from pptx_export import export_slides
+    cwd = os.getcwd()
+    os.chdir(args.workdir)
+    try:
+        rows = []
+        for label, fixed in (('requested_width', None), ('oversized_3000px', 3000)):
+            graphs = [PlotFigure(i, args.save_seconds, fixed) for i in range(args.graphs)]
+            for i in range(args.graphs):
+                for width in (1200, 1350, fixed):
+                    if width: synthetic_figure(i, width)
+            for case, fn in (('legacy_tempfiles', lambda p: legacy_export(graphs, p)),
+                             ('export_slides', lambda p: export_slides(graphs, p))):
+                path = os.path.join(args.workdir, f'{case}_{label}.pptx')
+                seconds = _best_of(lambda: fn(path), repeat=1)
+                rows.append({'case': f'{case}/{label}', 'seconds': seconds,
+                             'deck_mb': os.path.getsize(path) / 2 ** 20})
+        print(f'pptx: graphs={args.graphs} save_seconds={args.save_seconds}')
+        report(rows)
+    finally:
+        os.chdir(cwd)
+
+BENCHMARKS = {
+    'loader': bench_loader,
+    'pushdown': bench_pushdown,
+    'partition': bench_partition,
+    'segment': bench_segment,
+    'worker': bench_worker,
+    'render': bench_render,
+    'pptx': bench_pptx,
+    'decimate': bench_decimate,
+    'cache': bench_cache,
+    'metrics': bench_metrics,
+    'routes': bench_routes,
+    'startup': bench_startup,
+    'tail': bench_tail,
+    'batch': bench_batch,
+    'stream': bench_stream,
+    'project': bench_project,
+    'analytics': bench_analytics,
+    'preview': bench_preview,
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='LabPlotter benchmarks')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS) + ['all'])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--groups', type=int, default=40)
+    parser.add_argument('--jobs', type=int, default=50)
+    parser.add_argument('--attach-seconds', type=float, default=0.2)
+    parser.add_argument('--call-seconds', type=float, default=0.0005)
+    parser.add_argument('--graphs', type=int, default=12)
+    parser.add_argument('--budget', type=int, default=2000)
+    parser.add_argument('--no-export', action='store_true', help='skip PPTX and project saving in routes')
+    parser.add_argument('--point-seconds', type=float, default=2e-7)
+    parser.add_argument('--save-seconds', type=float, default=0.25)
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'labplotter_bench'))
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+    if START_METHOD == 'forkserver':
+        from multiprocessing import forkserver
+        forkserver.ensure_running()
+    for name, fn in BENCHMARKS.items():
+        if args.benchmark in (name, 'all'): fn(args)
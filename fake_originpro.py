@@ -0,0 +1,189 @@
+"""
+Recording stand-in for the parts of `originpro` LabPlotter uses.
+Every call lands in `calls`/`counts`, so routes can be run and measured on
+machines without Origin. ATTACH_SECONDS and CALL_SECONDS model the cost of
+attaching to Origin and of a COM round trip, POINT_SECONDS the per-cell cost
+of moving worksheet data, SAVE_SECONDS the per-worksheet cost of saving the
+project (so saves grow with the session); op.wait really sleeps.
+"""
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+
+ATTACH_SECONDS = 0.0
+CALL_SECONDS = 0.0
+POINT_SECONDS = 0.0
+SAVE_SECONDS = 0.0
+
+calls = []
+counts = Counter()
+state = {'attached': False, 'shown': False, 'sheets': 0, 'graphs': 0, 'rows': 0, 'points': 0}
+_lock = threading.Lock()
+
+def reset():
+    with _lock:
+        calls.clear()
+        counts.clear()
+        state.update(attached=False, shown=False, sheets=0, graphs=0, rows=0, points=0)
+
+def _record(name, *args):
+    with _lock:
+        calls.append((name, args))
+        counts[name] += 1
+    if CALL_SECONDS: time.sleep(CALL_SECONDS)
+
+def _png(width, height):
+    """Smallest valid grey PNG of the requested size."""
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+    raw = b''.join(b'\x00' + b'\xc8' * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b''))
+
+# --- Objects ---
+class _Prop:
+    def __init__(self, owner, kind, key):
+        object.__setattr__(self, '_where', f'{owner}.{kind}({key!r})')
+
+    def __setattr__(self, name, value):
+        _record(f'set:{name}', object.__getattribute__(self, '_where'), value)
+        object.__setattr__(self, name, value)
+
+class Worksheet:
+    def __init__(self, name):
+        self.name = name
+        self.shape = (0, 0)
+
+    def from_df(self, df):
+        _record('from_df', self.name, df.shape)
+        if POINT_SECONDS: time.sleep(POINT_SECONDS * df.shape[0] * df.shape[1])
+        self.shape = df.shape
+        with _lock:
+            state['rows'] += df.shape[0]
+            state['points'] += df.shape[0] * df.shape[1]
+
+    def from_list(self, col, data, lname='', units='', comments='', axis='', start=0):
+        _record('from_list', self.name, col, len(data), start)
+        if POINT_SECONDS: time.sleep(POINT_SECONDS * len(data))
+        rows = max(self.shape[0], start + len(data))
+        with _lock:
+            state['rows'] += rows - self.shape[0]
+            state['points'] += len(data)
+        self.shape = (rows, max(self.shape[1], col + 1))
+
+class Book:
+    def __init__(self, name):
+        self.name = name
+        self.sheets = []
+
+    def add_sheet(self, name=''):
+        _record('add_sheet', self.name, name)
+        wks = Worksheet(name)
+        self.sheets.append(wks)
+        with _lock: state['sheets'] += 1
+        return wks
+
+class Plot:
+    def __init__(self, wks, colx, coly):
+        self.wks, self.colx, self.coly = wks, colx, coly
+        self._color, self._name = None, None
+
+    @property
+    def color(self): return self._color
+
+    @color.setter
+    def color(self, value):
+        _record('set:color', value)
+        self._color = value
+
+    @property
+    def name(self): return self._name
+
+    @name.setter
+    def name(self, value):
+        _record('set:name', value)
+        self._name = value
+
+class Layer:
+    def __init__(self):
+        self.plots = []
+        self._axes = {}
+        self._labels = {}
+
+    def axis(self, name):
+        _record('axis', name)
+        return self._axes.setdefault(name, _Prop('layer', 'axis', name))
+
+    def label(self, name):
+        _record('label', name)
+        return self._labels.setdefault(name, _Prop('layer', 'label', name))
+
+    def add_plot(self, wks, colx=0, coly=1, **kwargs):
+        _record('add_plot', wks.name, colx, coly)
+        plot = Plot(wks, colx, coly)
+        self.plots.append(plot)
+        return plot
+
+    def rescale(self):
+        _record('rescale')
+
+    def lt_exec(self, script):
+        _record('lt_exec', script)
+
+class Graph:
+    def __init__(self, template):
+        self.template = template
+        self.layers = [Layer()]
+
+    def __getitem__(self, index):
+        return self.layers[index]
+
+    def save_fig(self, path, type='png', width=800, **kwargs):
+        _record('save_fig', path, type, width)
+        with open(path, 'wb') as fh:
+            fh.write(_png(max(1, width // 8), max(1, width // 12)))
+        return path
+
+# --- Module API ---
+def attach():
+    _record('attach')
+    if ATTACH_SECONDS: time.sleep(ATTACH_SECONDS)
+    state['attached'] = True
+
+def detach():
+    _record('detach')
+    state['attached'] = False
+
+def set_show(show=True):
+    _record('set_show', show)
+    state['shown'] = show
+
+def new_sheet(type='w', lname=''):
+    _record('new_sheet', type, lname)
+    with _lock: state['sheets'] += 1
+    return Worksheet(lname)
+
+def new_book(type='w', lname=''):
+    _record('new_book', type, lname)
+    return Book(lname)
+
+def new_graph(template='line', **kwargs):
+    _record('new_graph', template)
+    with _lock: state['graphs'] += 1
+    return Graph(template)
+
+def ocolor(value):
+    # A local colour conversion in originpro, not a COM round trip: not recorded.
+    return value
+
+def wait(type='r', sec=0.0):
+    _record('wait', type, sec)
+    if type == 's' and sec: time.sleep(sec)
+
+def save(path):
+    _record('save', path)
+    if SAVE_SECONDS: time.sleep(SAVE_SECONDS * state['sheets'])
+    with open(path, 'wb') as fh:
+        fh.write(b'fake opju\n')
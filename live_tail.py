@@ -0,0 +1,271 @@
+import io
+import os
+import threading
+import time
+import traceback
+import uuid
+import numpy as np
+from loaders import FORMATS, parse_rows, sniff_layout
+from metrics import no_span
+from processing import SWEEP_TOLERANCE, SweepTracker, partition_by
+
+# --- File Tail ---
+# Each poll reads at most TAIL_MAX_BYTES, so one update never costs more than
+# that however large the file has grown; a backlog drains over a few polls.
+TAIL_MAX_BYTES = 8 * 1024 * 1024
+
+class FileTail:
+    """
+    Follows a measurement file that is still being written. Remembers the
+    byte offset it has read up to and the partial last line, and parses
+    only complete rows. A file that shrinks is read again from the top.
+    """
+    def __init__(self, path, fmt, compact=False, max_bytes=TAIL_MAX_BYTES):
+        self.path = path
+        self.spec = FORMATS[fmt]
+        self.compact = compact
+        self.max_bytes = max_bytes
+        self.layout = None
+        self.offset = 0
+        self.partial = b''
+        self.rows = 0
+        self.resets = 0
+
+    def _sniff(self, fh):
+        layout = sniff_layout(fh, self.spec['skiprows'])
+        if len(layout.columns) <= max(self.spec['usecols']): return None
+        fh.seek(layout.data_offset - 1)
+        if fh.read(1) != b'\n': return None  # header row still being written
+        return layout
+
+    def read(self):
+        """Complete rows appended since the last call, or None."""
+        size = os.path.getsize(self.path)
+        if self.layout is not None and size < self.offset:
+            self.layout, self.partial = None, b''
+            self.resets += 1
+        with open(self.path, 'rb') as fh:
+            if self.layout is None:
+                self.layout = self._sniff(fh)
+                if self.layout is None: return None
+                self.offset, self.rows = self.layout.data_offset, 0
+            fh.seek(self.offset)
+            data = fh.read(self.max_bytes)
+        self.offset += len(data)
+        data = self.partial + data
+        end = data.rfind(b'\n') + 1
+        self.partial = data[end:]
+        if not end: return None
+        layout = self.layout._replace(data_offset=0)
+        df = parse_rows(io.BytesIO(data[:end]), layout, self.spec['usecols'], self.spec['colnames'],
+                        self.spec['dtypes'], self.compact)
+        self.rows += len(df)
+        return df
+
+# --- Live Sessions ---
+# Which route layouts can be followed live: the column a file is grouped by,
+# its sheet-name prefix, whether sweeps are split, and one
+# (y title, y column, sweep filter) per graph.
+LIVE_FORMATS = {
+    'ppms': {'group': None, 'sweeps': True,
+             'graphs': [('R (Ω)', 'R1', None), ('R (Ω)', 'R2', None)]},
+    'dewar_strip': {'group': None, 'sweeps': True,
+                    'graphs': [('R (Ω)', 'R1', None), ('R (Ω)', 'R2', None)]},
+    'mpms': {'group': None, 'sweeps': True,
+             'graphs': [('Magnetic moment (Oe)', 'Magnetic moment', None)]},
+    'ppms_magnetic': {'group': 'MagneticField', 'prefix': 'Field', 'sweeps': False,
+                      'graphs': [('R (Ω)', 'R1', None), ('R (Ω)', 'R2', None)]},
+    'ppms_heat_capacity': {'group': 'MagneticField', 'prefix': 'Field', 'round': 10, 'sweeps': False,
+                           'graphs': [('Cp (mj/mole$\\cdot$K)', 'Heat capacity', None)]},
+    'mpms_magnetic': {'group': 'Magnetic field', 'prefix': 'Field', 'sweeps': True,
+                      'graphs': [('Magnetic moment (Oe)', 'Magnetic moment', 'warming'),
+                                 ('Magnetic moment (Oe)', 'Magnetic moment', 'cooling')]},
+    'mpms_ac': {'group': 'Frequency', 'prefix': 'Freq', 'sweeps': False,
+                'graphs': [("X' (emu/Oe)", 'X_real', None), ("X'' (emu/Oe)", 'X_imag', None)]},
+}
+SWEEP_COLORS = {'cooling': 'blue', 'warming': 'red'}
+
+class LiveSession:
+    """
+    Incremental version of a route: new rows are split by group and sweep
+    and appended to the worksheets that already hold that group/sweep;
+    sheets and plots are only created for groups or sweeps seen for the
+    first time. prepare() parses on the caller's thread, apply() runs on
+    the Origin worker.
+    """
+    def __init__(self, path, fmt, label='', tolerance=SWEEP_TOLERANCE, compact=False):
+        self.path = path
+        self.fmt = fmt
+        self.label = label
+        self.tolerance = tolerance
+        self.tail = FileTail(path, fmt, compact)
+        self.spec = LIVE_FORMATS[fmt]
+        self.resets = 0
+        self._clear()
+
+    def _clear(self):
+        self.trackers = {}
+        self.sheets = {}
+        self.book = None
+        self.graphs = None
+
+    def prepare(self):
+        """[(sheet key, direction, frame)] for the rows appended since the last call."""
+        df = self.tail.read()
+        if self.tail.resets != self.resets:
+            self.resets = self.tail.resets
+            self._clear()
+        if df is None or not len(df): return []
+        group = self.spec['group']
+        if self.spec.get('round'):
+            df[group] = np.ceil(df[group] / self.spec['round']) * self.spec['round']
+        appends = []
+        for value, sub in (partition_by(df, group) if group else [(None, df)]):
+            if not self.spec['sweeps']:
+                appends.append(((value, 0), None, sub))
+                continue
+            tracker = self.trackers.setdefault(value, SweepTracker(self.tolerance))
+            base = tracker.n
+            for seg, ordinal in tracker.feed(sub['Temperature'].to_numpy()):
+                direction = None if seg.direction == 'flat' else seg.direction
+                appends.append(((value, ordinal), direction, sub.iloc[seg.start - base:seg.stop - base]))
+        return appends
+
+    def _sheet_name(self, key, direction):
+        value, ordinal = key
+        name = f'{self.spec["prefix"]}_{value}' if self.spec['group'] else 'Live'
+        if self.spec['sweeps']:
+            name += f' {(direction or "sweep").capitalize()} #{ordinal + 1}'
+        return name
+
+    def apply(self, appends, op, span=no_span):
+        """
+        Append prepared rows in Origin; returns the number of rows written.
+        Each append is taken off the `appends` list once written, so after a
+        failure the list holds exactly what is left to retry.
+        """
+        written = 0
+        if self.graphs is None:
+            with span('live_setup'):
+                self.book = op.new_book('w', lname=f'Live {os.path.basename(self.path)}')
+                graphs = []
+                for y_title, y_col, only in self.spec['graphs']:
+                    graph = op.new_graph(template='Scatter')
+                    layer = graph[0]
+                    layer.axis('x').title = 'T (K)'
+                    layer.axis('y').title = y_title
+                    if self.label: layer.label('Text').text = self.label
+                    graphs.append({'graph': graph, 'y': y_col, 'only': only, 'legend': []})
+                self.graphs = graphs
+        touched = set()
+        with span('live_append'):
+            while appends:
+                key, direction, frame = appends[0]
+                sheet = self.sheets.get(key)
+                if sheet is None:
+                    wks = self.book.add_sheet(self._sheet_name(key, direction))
+                    sheet = self.sheets[key] = {'wks': wks, 'rows': 0, 'direction': direction,
+                                                'columns': list(frame.columns), 'plots': {},
+                                                'index': len(self.sheets)}
+                elif direction and sheet['direction'] is None:
+                    sheet['direction'] = direction
+                    sheet['wks'].name = self._sheet_name(key, direction)
+                    for i, plot in sheet['plots'].items():
+                        plot.color = op.ocolor(self._color(sheet))
+                        touched.add(i)
+                for col, name in enumerate(frame.columns):
+                    sheet['wks'].from_list(col, frame[name].tolist(), lname=name if not sheet['rows'] else '',
+                                           start=sheet['rows'])
+                sheet['rows'] += len(frame)
+                written += len(frame)
+                touched |= self._plot(key, sheet, op)
+                del appends[0]
+        with span('live_rescale', graphs=len(touched)):
+            for i in sorted(touched):
+                spec = self.graphs[i]
+                layer = spec['graph'][0]
+                labels = [self._sheet_name(key, self.sheets[key]['direction']) for key in spec['legend']]
+                layer.label('Legend').text = '\n'.join(f'\\l({n + 1}) {label}' for n, label in enumerate(labels))
+                layer.rescale()
+        return written
+
+    def _color(self, sheet):
+        if self.spec['group']: return sheet['index']
+        return SWEEP_COLORS.get(sheet['direction'], sheet['index'])
+
+    def _plot(self, key, sheet, op):
+        """Add the sheet to every graph it belongs on that does not show it yet."""
+        touched = set()
+        for i, spec in enumerate(self.graphs):
+            if spec['only'] and spec['only'] != sheet['direction']: continue
+            touched.add(i)
+            if i in sheet['plots']: continue
+            plot = spec['graph'][0].add_plot(sheet['wks'], colx=sheet['columns'].index('Temperature'),
+                                             coly=sheet['columns'].index(spec['y']))
+            plot.color = op.ocolor(self._color(sheet))
+            sheet['plots'][i] = plot
+            spec['legend'].append(key)
+        return touched
+
+    def status(self):
+        return {'path': self.path, 'fmt': self.fmt, 'offset': self.tail.offset, 'rows': self.tail.rows,
+                'sheets': len(self.sheets), 'resets': self.resets}
+
+# --- Watcher ---
+class LiveWatch:
+    """
+    Polls a LiveSession every `interval` seconds on its own thread.
+    `run(fn)` must call fn(op) on the Origin thread and return its result.
+    Rows the tail has already consumed but Origin did not take (worker
+    busy, crashed, not attached) stay pending and are retried before
+    anything new is read.
+    """
+    def __init__(self, session, run, interval=2.0, span=no_span):
+        self.id = uuid.uuid4().hex[:12]
+        self.session = session
+        self.run = run
+        self.interval = interval
+        self.span = span
+        self.stopped = threading.Event()
+        self.updates = 0
+        self.last = {'rows': 0, 'parse_seconds': 0.0, 'origin_seconds': 0.0, 'at': None}
+        self.error = None
+        self.pending = []
+        self.thread = threading.Thread(target=self._loop, name=f'watch-{self.id}', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self.stopped.set()
+        self.thread.join(timeout)
+
+    def poll(self):
+        t0 = time.perf_counter()
+        if not self.pending:
+            with self.span('live_parse'):
+                self.pending = self.session.prepare()
+        if not self.pending: return 0
+        t1 = time.perf_counter()
+        appends = self.pending
+        rows = self.run(lambda op: self.session.apply(appends, op, self.span))
+        self.updates += 1
+        self.last = {'rows': rows, 'parse_seconds': t1 - t0, 'origin_seconds': time.perf_counter() - t1,
+                     'at': time.time()}
+        return rows
+
+    def _loop(self):
+        while not self.stopped.is_set():
+            try:
+                self.poll()
+                self.error = None
+            except Exception as e:
+                traceback.print_exc()
+                self.error = str(e)
+            self.stopped.wait(self.interval)
+
+    def status(self):
+        return dict(self.session.status(), id=self.id, interval=self.interval, updates=self.updates,
+                    last=self.last, error=self.error, pending=sum(len(frame) for _, _, frame in self.pending),
+                    running=self.thread.is_alive())
@@ -0,0 +1,305 @@
+import csv
+import io
+import os
+import pandas as pd
+from collections import namedtuple
+
+# --- Upload Layout Sniffing ---
+# Header scan is bounded: PPMS/MPMS headers are a few KB, so if no [Data]
+# marker shows up in the first few MB the file is treated as headerless.
+HEADER_SCAN_LIMIT = 4 * 1024 * 1024
+DELIMITER_SAMPLE = 1024
+
+DataLayout = namedtuple('DataLayout', ['delimiter', 'offset', 'encoding', 'columns', 'data_offset'])
+
+def sniff_layout(file_obj, skiprows):
+    """
+    Single incremental pass over the head of an upload.
+    Finds the delimiter, the byte offset of the table header row
+    ([Data] marker when skiprows == -1, else after `skiprows` lines),
+    the header fields and whether the scanned bytes are valid UTF-8.
+    """
+    file_obj.seek(0)
+    sample = b''
+    first_line = None
+    header_line = None
+    scanned = 0
+    line_no = 0
+    offset = None
+    data_offset = None
+    utf8 = True
+    while scanned < HEADER_SCAN_LIMIT:
+        line = file_obj.readline()
+        if not line: break
+        scanned += len(line)
+        line_no += 1
+        if first_line is None: first_line, first_end = line, scanned
+        if len(sample) < DELIMITER_SAMPLE:
+            sample += line[:DELIMITER_SAMPLE - len(sample)]
+        if utf8:
+            try: line.decode('utf-8')
+            except UnicodeDecodeError: utf8 = False
+        # Blank lines before the header row are skipped, as read_csv does.
+        if offset is not None:
+            if header_line is None and line.strip(): header_line, data_offset = line, scanned
+        elif skiprows == -1 and b'[Data]' in line:
+            offset = scanned
+        elif skiprows >= 0 and line_no == skiprows:
+            offset = scanned
+        elif skiprows == 0:
+            offset = 0
+            if line.strip(): header_line, data_offset = line, scanned
+        if header_line is not None and len(sample) >= DELIMITER_SAMPLE: break
+    if offset is None:
+        if skiprows == -1 and first_line is not None:
+            offset, header_line, data_offset = 0, first_line, first_end
+        else:
+            offset = scanned
+    encoding = 'utf-8' if utf8 else 'latin1'
+    text = sample.decode('latin1')
+    delim = ',' if ',' in text else ('\t' if '\t' in text else ',')
+    columns = []
+    if header_line:
+        columns = next(csv.reader([header_line.decode(encoding).rstrip('\r\n')], delimiter=delim), [])
+    file_obj.seek(offset)
+    return DataLayout(delim, offset, encoding, columns, data_offset if data_offset is not None else scanned)
+
+# --- Route Formats ---
+# skiprows -1 means "find the [Data] marker". dtypes are pushed down to the
+# CSV engine by column name. A declared column holding text rows sends the
+# parse to the latin1 fallback, where declared float columns are coerced so
+# text becomes NaN; the single-call and streamed paths coerce the same way.
+FLOAT = 'float64'
+
+FORMATS = {
+    'dewar': {'skiprows': 3, 'usecols': [0, 3, 4], 'colnames': ['Temperature', 'R1', 'R2'],
+              'dtypes': {'Temperature': FLOAT, 'R1': FLOAT, 'R2': FLOAT}},
+    'dewar_strip': {'skiprows': 26, 'usecols': [0, 3, 4], 'colnames': ['Temperature', 'R1', 'R2'],
+                    'dtypes': {'Temperature': FLOAT, 'R1': FLOAT, 'R2': FLOAT}},
+    'ppms': {'skiprows': -1, 'usecols': [3, 12, 13], 'colnames': ['Temperature', 'R1', 'R2'],
+             'dtypes': {'Temperature': FLOAT, 'R1': FLOAT, 'R2': FLOAT}},
+    'current_effect': {'skiprows': 3, 'usecols': [0, 1, 2, 11], 'colnames': ['Temperature', 'R1', 'R2', 'Current'],
+                       'dtypes': {'Temperature': FLOAT, 'R1': FLOAT, 'R2': FLOAT, 'Current': FLOAT}},
+    'ppms_magnetic': {'skiprows': -1, 'usecols': [3, 4, 12, 13], 'colnames': ['Temperature', 'MagneticField', 'R1', 'R2'],
+                      'dtypes': {'Temperature': FLOAT, 'MagneticField': FLOAT, 'R1': FLOAT, 'R2': FLOAT}},
+    'ppms_heat_capacity': {'skiprows': -1, 'usecols': [7, 5, 9], 'colnames': ['Temperature', 'MagneticField', 'Heat capacity'],
+                           'dtypes': {'Temperature': FLOAT, 'MagneticField': FLOAT, 'Heat capacity': FLOAT}},
+    'ppms_heat_capacity_cw': {'skiprows': -1, 'usecols': [7, 5, 9], 'colnames': ['Temperature', 'Magnetic field', 'Heat capacity'],
+                              'dtypes': {'Temperature': FLOAT, 'Magnetic field': FLOAT, 'Heat capacity': FLOAT}},
+    'mpms': {'skiprows': -1, 'usecols': [2, 60], 'colnames': ['Temperature', 'Magnetic moment'],
+             'dtypes': {'Temperature': FLOAT, 'Magnetic moment': FLOAT}},
+    'mpms_magnetic': {'skiprows': -1, 'usecols': [2, 3, 60], 'colnames': ['Temperature', 'Magnetic field', 'Magnetic moment'],
+                      'dtypes': {'Temperature': FLOAT, 'Magnetic field': FLOAT, 'Magnetic moment': FLOAT}},
+    'mpms_ac': {'skiprows': -1, 'usecols': [2, 26, 21, 23], 'colnames': ['Temperature', 'Frequency', 'X_real', 'X_imag'],
+                'dtypes': {'Temperature': FLOAT, 'Frequency': FLOAT, 'X_real': FLOAT, 'X_imag': FLOAT}},
+}
+
+# --- CSV Engine ---
+# 'c' by default; 'pyarrow' or 'auto' (pyarrow when installed) are opt-in.
+CSV_ENGINE = os.environ.get('LABPLOTTER_CSV_ENGINE', 'c')
+
+def resolve_engine(engine=None):
+    engine = engine or CSV_ENGINE
+    if engine != 'auto': return engine
+    try:
+        import pyarrow  # noqa: F401
+        return 'pyarrow'
+    except ImportError:
+        return 'c'
+
+# --- Data Loaders ---
+def _read_columns(file_obj, layout, usecols, dtype, engine, encoding):
+    file_obj.seek(layout.data_offset)
+    positions = sorted(set(usecols))
+    if engine == 'pyarrow':
+        # pyarrow ignores positional dtype keys and renumbers usecols.
+        df = pd.read_csv(file_obj, delimiter=layout.delimiter, header=None, usecols=positions,
+                         encoding=encoding, engine=engine)
+        df.columns = [f'c{i}' for i in positions]
+        return df.astype(dtype) if dtype else df
+    names = [f'c{i}' for i in range(len(layout.columns))]
+    return pd.read_csv(file_obj, delimiter=layout.delimiter, header=None, names=names,
+                       usecols=[names[i] for i in positions], dtype=dtype or None,
+                       encoding=encoding, engine=engine)
+
+def _cache_key(cache, file_obj, skiprows, usecols, colnames, dtypes, compact):
+    return cache.key(file_obj, skiprows=skiprows, usecols=usecols, colnames=colnames, dtypes=dtypes, compact=compact)
+
+def load_data(file_obj, skiprows, usecols, colnames, dtypes=None, compact=False, engine=None, cache=None):
+    """
+    Parse only the requested columns. `dtypes` maps colnames to dtypes and is
+    handed to the CSV engine; `compact` narrows float64 columns to float32.
+    With a ParseCache, a file already parsed with the same spec is not parsed again.
+    """
+    if cache is not None:
+        key = _cache_key(cache, file_obj, skiprows, usecols, colnames, dtypes, compact)
+        df = cache.get(key)
+        if df is not None: return df
+        df = load_data(file_obj, skiprows, usecols, colnames, dtypes, compact, engine)
+        cache.put(key, df)
+        return df
+    layout = sniff_layout(file_obj, skiprows)
+    if not usecols or max(usecols) >= len(layout.columns):
+        raise ValueError("Column index out of bounds.")
+    return parse_rows(file_obj, layout, usecols, colnames, dtypes, compact, engine)
+
+def _pushdown_dtypes(usecols, colnames, dtypes, compact):
+    dtype = {}
+    for pos, name in zip(usecols, colnames):
+        kind = (dtypes or {}).get(name)
+        if kind is None: continue
+        dtype[f'c{pos}'] = 'float32' if (compact and kind == FLOAT) else kind
+    return dtype
+
+def coerce_floats(df, colnames, dtypes, compact=False):
+    """Declared float columns of a fallback parse as floats; text rows become NaN."""
+    kind = 'float32' if compact else FLOAT
+    for name in colnames:
+        if (dtypes or {}).get(name) == FLOAT and df[name].dtype != kind:
+            df[name] = pd.to_numeric(df[name], errors='coerce').astype(kind)
+    return df
+
+def parse_rows(file_obj, layout, usecols, colnames, dtypes=None, compact=False, engine=None):
+    """Parse the table of an already sniffed file from layout.data_offset on."""
+    dtype = _pushdown_dtypes(usecols, colnames, dtypes, compact)
+    engine = resolve_engine(engine)
+    fallback = False
+    try:
+        df = _read_columns(file_obj, layout, usecols, dtype, engine, layout.encoding)
+    except (ValueError, TypeError):
+        # Non UTF-8 bytes past the scanned head, or a declared numeric column
+        # holding text rows: fall back to latin1 and let the engine infer.
+        df = _read_columns(file_obj, layout, usecols, {}, engine, 'latin1')
+        fallback = True
+    df = df[[f'c{i}' for i in usecols]]
+    df.columns = colnames
+    return coerce_floats(df, colnames, dtypes, compact) if fallback else df
+
+def load_format(file_obj, fmt, compact=False, engine=None, cache=None):
+    spec = FORMATS[fmt]
+    return load_data(file_obj, spec['skiprows'], spec['usecols'], spec['colnames'],
+                     dtypes=spec['dtypes'], compact=compact, engine=engine, cache=cache)
+
+# --- Streaming ---
+# Uploads from STREAM_MIN_BYTES up are parsed CHUNK_ROWS rows at a time and
+# each chunk is filtered and grouped into running accumulators before the
+# next one is read, so peak memory follows the rows kept plus one chunk
+# rather than the file size. Smaller files take the single-call path above.
+STREAM_MIN_BYTES = int(float(os.environ.get('LABPLOTTER_STREAM_MB', '64')) * 2 ** 20)
+CHUNK_ROWS = 100_000
+
+def _size(file_obj):
+    pos = file_obj.tell()
+    file_obj.seek(0, os.SEEK_END)
+    size = file_obj.tell()
+    file_obj.seek(pos)
+    return size
+
+def iter_chunks(file_obj, fmt, compact=False, chunksize=CHUNK_ROWS):
+    """
+    Frames of up to `chunksize` rows with the format's column names. A
+    chunk that fails the declared dtypes switches the rest of the file to
+    latin1, resuming after the rows already yielded; declared float columns
+    are then coerced so text rows become NaN and the chunks stay
+    concatenable. Always uses the C engine (pyarrow cannot chunk).
+    """
+    spec = FORMATS[fmt]
+    layout = sniff_layout(file_obj, spec['skiprows'])
+    usecols, colnames = spec['usecols'], spec['colnames']
+    if not usecols or max(usecols) >= len(layout.columns):
+        raise ValueError("Column index out of bounds.")
+    names = [f'c{i}' for i in range(len(layout.columns))]
+    wanted = [f'c{i}' for i in usecols]
+    done = 0
+    dtype = _pushdown_dtypes(usecols, colnames, spec['dtypes'], compact)
+    for fallback in (False, True):
+        file_obj.seek(layout.data_offset)
+        reader = pd.read_csv(file_obj, delimiter=layout.delimiter, header=None, names=names,
+                             usecols=sorted(set(wanted)), dtype=None if fallback else (dtype or None),
+                             encoding='latin1' if fallback else layout.encoding, skiprows=done, chunksize=chunksize)
+        try:
+            with reader:
+                for chunk in reader:
+                    chunk = chunk[wanted]
+                    chunk.columns = colnames
+                    if fallback: chunk = coerce_floats(chunk, colnames, spec['dtypes'], compact)
+                    done += len(chunk)
+                    yield chunk
+            return
+        except (ValueError, TypeError):
+            if fallback: raise
+
+def read_upload(file_obj, fmt, by=None, prepare=None, compact=False, engine=None, cache=None,
+                chunksize=CHUNK_ROWS):
+    """
+    Parse an upload for a route: the frame when by is None, otherwise
+    [(value, frame)] groups of `by` as partition_by returns them.
+    `prepare(frame)` (row filters, rounding) runs before grouping, per chunk
+    for streamed files. The parse cache always holds the raw parsed columns
+    (streamed files write theirs chunk by chunk), and prepare and grouping
+    run on whatever comes back from it.
+    """
+    if _size(file_obj) < STREAM_MIN_BYTES:
+        df = load_format(file_obj, fmt, compact, engine, cache)
+        if prepare is not None: df = prepare(df)
+        if by is None: return df
+        from processing import partition_by
+        return partition_by(df, by)
+    from processing import GroupAccumulator
+    spec = FORMATS[fmt]
+    key = chunks = writer = None
+    if cache is not None:
+        key = _cache_key(cache, file_obj, spec['skiprows'], spec['usecols'], spec['colnames'], spec['dtypes'], compact)
+        df = cache.get(key, copy=False)
+        if df is None:
+            writer = cache.writer(key)
+        else:
+            # A hit is memory-mapped and fed through in chunks too, so only the rows kept are copied.
+            chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+    acc = GroupAccumulator(by)
+    for chunk in chunks if chunks is not None else iter_chunks(file_obj, fmt, compact, chunksize):
+        if writer is not None: writer.add(chunk)
+        acc.add(chunk if prepare is None else prepare(chunk))
+    if writer is not None: writer.commit()
+    groups = acc.frames()
+    if by is not None: return groups
+    return groups[0][1] if groups else pd.DataFrame(columns=spec['colnames'])
+
+# --- Preview Sampling ---
+# A preview reads at most PREVIEW_BYTES of the table however large the file
+# is: PREVIEW_BLOCKS runs of whole lines spread evenly from the first row to
+# the last, so every sweep and group still shows up, just more sparsely.
+PREVIEW_BYTES = 8 * 1024 * 1024
+PREVIEW_BLOCKS = 32
+
+def sample_format(file_obj, fmt, compact=False, max_bytes=PREVIEW_BYTES, blocks=PREVIEW_BLOCKS):
+    """(frame, info): the whole table when it fits in max_bytes, else an evenly spread sample of it."""
+    spec = FORMATS[fmt]
+    layout = sniff_layout(file_obj, spec['skiprows'])
+    if not spec['usecols'] or max(spec['usecols']) >= len(layout.columns):
+        raise ValueError("Column index out of bounds.")
+    body = _size(file_obj) - layout.data_offset
+    args = (spec['usecols'], spec['colnames'], spec['dtypes'], compact)
+    if body <= max_bytes:
+        df = parse_rows(file_obj, layout, *args)
+        return df, {'fmt': fmt, 'sampled': False, 'bytes': body, 'file_bytes': body, 'rows': len(df)}
+    block = max_bytes // blocks
+    parts = []
+    for i in range(blocks):
+        start = layout.data_offset + (body - block) * i // (blocks - 1)
+        file_obj.seek(start)
+        data = file_obj.read(block)
+        if i: data = data[data.find(b'\n') + 1:] if b'\n' in data else b''  # runs start on a line boundary
+        if i < blocks - 1: data = data[:data.rfind(b'\n') + 1]
+        parts.append(data)
+    data = b''.join(parts)
+    df = parse_rows(io.BytesIO(data), layout._replace(data_offset=0), *args)
+    return df, {'fmt': fmt, 'sampled': True, 'bytes': len(data), 'file_bytes': body, 'rows': len(df)}
+
+def read_sample(file_obj, fmt, by=None, prepare=None, compact=False, max_bytes=PREVIEW_BYTES):
+    """read_upload's contract on sample_format's rows; returns (data, info)."""
+    df, info = sample_format(file_obj, fmt, compact, max_bytes)
+    if prepare is not None: df = prepare(df)
+    if by is None: return df, info
+    from processing import partition_by
+    return partition_by(df, by), info
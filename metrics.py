@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+# --- Timing Layer ---
+# Spans feed fixed-bucket histograms: recording is one perf_counter pair, a
+# bisect and a few additions under a lock, cheap enough to leave on.
+# LABPLOTTER_METRICS_LOG=1 also prints every span as one JSON line.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRICS_LOG = os.environ.get('LABPLOTTER_METRICS_LOG', '') not in ('', '0')
+
+def no_span(stage, **fields):
+    """Default span hook for code run without metrics."""
+    return nullcontext(fields)
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max: self.max = seconds
+
+    def quantile(self, q):
+        """Upper bucket bound holding the q-th observation (max for the overflow bucket)."""
+        if not self.count: return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank: return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': self.total, 'mean': self.total / self.count if self.count else 0.0,
+                'max': self.max, 'p50': self.quantile(0.5), 'p95': self.quantile(0.95), 'p99': self.quantile(0.99),
+                'buckets': {('+Inf' if i == len(BUCKETS) else str(BUCKETS[i])): n
+                            for i, n in enumerate(self.counts) if n}}
+
+class Metrics:
+    def __init__(self, log=METRICS_LOG):
+        self.log = log
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.routes = {}
+        self.stages = {}
+
+    def _route(self, route):
+        entry = self.routes.get(route)
+        if entry is None:
+            entry = self.routes[route] = {'latency': Histogram(), 'requests': 0, 'errors': 0, 'rows': 0, 'points': 0}
+        return entry
+
+    def observe(self, route, stage, seconds, **fields):
+        with self.lock:
+            stages = self.stages.setdefault(route, {})
+            hist = stages.get(stage)
+            if hist is None: hist = stages[stage] = Histogram()
+            hist.add(seconds)
+        if self.log:
+            print(json.dumps({'ts': round(time.time(), 3), 'route': route, 'stage': stage,
+                              'seconds': round(seconds, 6), **fields}), flush=True)
+
+    @contextmanager
+    def span(self, route, stage, **fields):
+        t0 = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.observe(route, stage, time.perf_counter() - t0, **fields)
+
+    def spans(self, route):
+        """span() bound to one route, for code that only knows stage names."""
+        return lambda stage, **fields: self.span(route, stage, **fields)
+
+    def request(self, route, seconds, status):
+        with self.lock:
+            entry = self._route(route)
+            entry['latency'].add(seconds)
+            entry['requests'] += 1
+            if status >= 400: entry['errors'] += 1
+
+    def count(self, route, **counts):
+        with self.lock:
+            entry = self._route(route)
+            for key, value in counts.items(): entry[key] = entry.get(key, 0) + value
+
+    def snapshot(self):
+        with self.lock:
+            routes = {route: dict(entry, latency=entry['latency'].to_dict()) for route, entry in self.routes.items()}
+            stages = {route: {stage: hist.to_dict() for stage, hist in by_stage.items()}
+                      for route, by_stage in self.stages.items()}
+        return {'uptime_seconds': time.time() - self.started, 'buckets': list(BUCKETS),
+                'routes': routes, 'stages': stages}
@@ -0,0 +1,162 @@
+import importlib
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+
+# --- Backends ---
+# A backend hands out an originpro-like module as `op` and knows how to set
+# up and tear down the thread that talks to it. The fake backend lets the
+# whole app run on machines without Origin (Linux CI, benchmarks). `op` is
+# imported on first use, normally by attach() on the worker thread.
+class OriginBackend:
+    name = 'origin'
+    module = 'originpro'
+
+    def __init__(self):
+        self._op = None
+
+    @property
+    def op(self):
+        if self._op is None: self._op = importlib.import_module(self.module)
+        return self._op
+
+    def attach(self):
+        import pythoncom
+        pythoncom.CoInitialize()
+        self.op.set_show(True)
+
+    def detach(self):
+        import pythoncom
+        try: self.op.detach()
+        finally: pythoncom.CoUninitialize()
+
+class FakeBackend(OriginBackend):
+    name = 'fake'
+    module = 'fake_originpro'
+
+    def attach(self):
+        self.op.attach()
+        self.op.set_show(True)
+
+    def detach(self):
+        self.op.detach()
+
+BACKENDS = {'origin': OriginBackend, 'fake': FakeBackend}
+
+def load_backend(name=None):
+    return BACKENDS[name or os.environ.get('LABPLOTTER_BACKEND', 'origin')]()
+
+# --- Worker ---
+class OriginWorker:
+    """
+    One long-lived thread that owns the Origin COM apartment.
+    Jobs run strictly in submission order; Origin stays attached between them.
+    """
+    def __init__(self, backend, history=200):
+        self.backend = backend
+        self.history = history
+        self.queue = queue.Queue()
+        self.jobs = OrderedDict()
+        self.done = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.current = None
+        self.attached = threading.Event()
+        self.attach_error = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='origin-worker', daemon=True)
+                self.thread.start()
+
+    def stop(self, timeout=None):
+        if self.thread is None: return
+        self.queue.put(None)
+        self.thread.join(timeout)
+        self.thread = None
+
+    def submit(self, fn, name=''):
+        job_id = uuid.uuid4().hex[:12]
+        job = {'id': job_id, 'name': name, 'state': 'queued', 'progress': '', 'result': None, 'error': None,
+               'submitted': time.time(), 'started': None, 'finished': None}
+        with self.lock:
+            self.jobs[job_id] = job
+            self.done[job_id] = threading.Event()
+            while len(self.jobs) > self.history:
+                old_id, old = next(iter(self.jobs.items()))
+                if old['state'] in ('queued', 'running'): break
+                del self.jobs[old_id]
+                self.done.pop(old_id, None)
+        self.queue.put((job_id, fn))
+        self.start()
+        return job_id
+
+    def progress(self, message):
+        job = self.current
+        if job is not None: job['progress'] = message
+
+    def status(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None: return None
+            status = dict(job)
+        status['queue_seconds'] = (status['started'] or time.time()) - status['submitted']
+        if status['started']:
+            status['run_seconds'] = (status['finished'] or time.time()) - status['started']
+        return status
+
+    def wait(self, job_id, timeout=None):
+        event = self.done.get(job_id)
+        if event is not None: event.wait(timeout)
+        return self.status(job_id)
+
+    def ready(self, timeout=None):
+        """Wait until the worker has attached (or failed to); True when attached."""
+        return self.attached.wait(timeout) and self.attach_error is None
+
+    def _run(self):
+        self.attached.clear()
+        try:
+            self.backend.attach()
+            self.attach_error = None
+        except Exception as e:
+            # Fail what is queued and exit; the next submit() starts a new
+            # thread that tries to attach again.
+            traceback.print_exc()
+            with self.lock:
+                self.attach_error = str(e)
+                while not self.queue.empty():
+                    item = self.queue.get_nowait()
+                    if item is None: continue
+                    job = self.jobs[item[0]]
+                    job['error'], job['state'], job['finished'] = f'Origin attach failed: {e}', 'error', time.time()
+                    self.done[item[0]].set()
+                self.thread = None
+            self.attached.set()
+            return
+        self.attached.set()
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None: break
+                job_id, fn = item
+                job = self.jobs[job_id]
+                job['state'], job['started'] = 'running', time.time()
+                self.current = job
+                try:
+                    job['result'] = fn()
+                    job['state'] = 'done'
+                except Exception as e:
+                    traceback.print_exc()
+                    job['error'], job['state'] = str(e), 'error'
+                finally:
+                    self.current = None
+                    job['finished'] = time.time()
+                    self.done[job_id].set()
+        finally:
+            self.backend.detach()
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# --- Parse Cache ---
+# Parsed uploads are stored under <root>/<content digest>-<spec digest>/ as
+# one .npy per column plus meta.json, so a repeat run of the same file and
+# parse spec is a memory-mapped read instead of a CSV parse.
+CACHE_DIR = os.environ.get('LABPLOTTER_CACHE_DIR', '')
+CACHE_MB = float(os.environ.get('LABPLOTTER_CACHE_MB', '512'))
+HASH_CHUNK = 1024 * 1024
+# .npy files are written with a fixed-size header so columns can be appended
+# chunk by chunk and the row count filled in at the end.
+NPY_HEADER = 128
+# Unfinished tmp-* entries older than this are removed when a cache opens.
+TMP_MAX_AGE = 6 * 3600
+
+def content_digest(file_obj):
+    """sha256 of the whole upload (hardware-accelerated on most CPUs); leaves the stream at offset 0."""
+    file_obj.seek(0)
+    h = hashlib.sha256()
+    for chunk in iter(lambda: file_obj.read(HASH_CHUNK), b''):
+        h.update(chunk)
+    file_obj.seek(0)
+    return h.hexdigest()[:32]
+
+def spec_digest(**spec):
+    return hashlib.blake2b(json.dumps(spec, sort_keys=True, default=str).encode(), digest_size=8).hexdigest()
+
+def _entry_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+class ParseCache:
+    """
+    Size-bounded LRU of parsed DataFrames on disk. Only all-numeric frames
+    are stored (object columns would need pickling); everything else is a
+    plain miss. Safe to share between request threads.
+    """
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'skipped': 0}
+        os.makedirs(root, exist_ok=True)
+        found = []
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            try:
+                if name.startswith('tmp-'):
+                    # Another live instance may still be writing it; only old ones are leftovers of a crash.
+                    if time.time() - os.path.getmtime(path) > TMP_MAX_AGE: shutil.rmtree(path, ignore_errors=True)
+                elif os.path.exists(os.path.join(path, 'meta.json')):
+                    found.append((os.path.getmtime(os.path.join(path, 'meta.json')), name, _entry_bytes(path)))
+            except OSError:
+                continue  # committed or evicted by another instance meanwhile
+        for _, name, size in sorted(found):
+            self.entries[name] = size
+        with self.lock: self._evict()
+
+    def key(self, file_obj, **spec):
+        return f'{content_digest(file_obj)}-{spec_digest(**spec)}'
+
+    def get(self, key, copy=True):
+        """The cached frame or None; copy=False leaves its columns memory-mapped (read-only)."""
+        path = os.path.join(self.root, key)
+        with self.lock:
+            if key not in self.entries:
+                self.counters['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.counters['hits'] += 1
+        try:
+            with open(os.path.join(path, 'meta.json')) as fh:
+                meta = json.load(fh)
+            os.utime(os.path.join(path, 'meta.json'))
+            columns = {name: np.load(os.path.join(path, f'{i}.npy'), mmap_mode='r')
+                       for i, name in enumerate(meta['columns'])}
+            return pd.DataFrame(columns, columns=meta['columns'], copy=copy)
+        except (OSError, ValueError, KeyError):
+            self.invalidate(key)
+            return None
+
+    def put(self, key, df):
+        writer = self.writer(key)
+        writer.add(df)
+        return writer.commit()
+
+    def writer(self, key):
+        """A CacheWriter that stores `key` from frames added one chunk at a time."""
+        return CacheWriter(self, key)
+
+    def _install(self, tmp, key):
+        size = _entry_bytes(tmp)
+        with self.lock:
+            if key in self.entries or size > self.max_bytes: return False
+            try: os.replace(tmp, os.path.join(self.root, key))
+            except OSError: return False
+            self.entries[key] = size
+            self.counters['stores'] += 1
+            self._evict()
+        return True
+
+    def invalidate(self, prefix=''):
+        """Drop every entry whose key starts with prefix (a content digest, a full key or '' for all)."""
+        with self.lock:
+            doomed = [key for key in self.entries if key.startswith(prefix)]
+            for key in doomed: self._drop(key)
+        return len(doomed)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, entries=len(self.entries), bytes=sum(self.entries.values()),
+                        max_bytes=self.max_bytes, root=self.root)
+
+    def _drop(self, key):
+        self.entries.pop(key, None)
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+
+    def _evict(self):
+        total = sum(self.entries.values())
+        while self.entries and total > self.max_bytes:
+            key, size = next(iter(self.entries.items()))
+            self._drop(key)
+            total -= size
+            self.counters['evictions'] += 1
+
+class CacheWriter:
+    """
+    One cache entry written chunk by chunk, so a streamed upload is stored
+    without ever holding all of its rows. Every chunk must have the columns
+    and numeric dtypes of the first; otherwise, or once the entry outgrows
+    the cache, the writer gives up and commit() stores nothing.
+    """
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.tmp = None
+        self.files = None
+        self.columns = None
+        self.dtypes = None
+        self.rows = 0
+        self.bytes = 0
+        self.failed = False
+
+    def add(self, df):
+        if self.failed: return
+        try:
+            if self.columns is None:
+                self.columns, self.dtypes = list(df.columns), list(df.dtypes)
+                if not all(kind.kind in 'biuf' for kind in self.dtypes): return self._fail('skipped')
+                self.tmp = os.path.join(self.cache.root, f'tmp-{uuid.uuid4().hex}')
+                os.makedirs(self.tmp)
+                self.files = [open(os.path.join(self.tmp, f'{i}.npy'), 'wb') for i in range(len(self.columns))]
+                for fh in self.files: fh.write(b'\0' * NPY_HEADER)
+            elif list(df.columns) != self.columns or list(df.dtypes) != self.dtypes:
+                return self._fail('skipped')
+            for fh, name, kind in zip(self.files, self.columns, self.dtypes):
+                data = np.ascontiguousarray(df[name].to_numpy(), dtype=kind)
+                fh.write(data.tobytes())
+                self.bytes += data.nbytes
+        except OSError:
+            # A full or unwritable cache directory only costs the caching.
+            return self._fail('skipped')
+        self.rows += len(df)
+        if self.bytes > self.cache.max_bytes: self._fail()
+
+    def commit(self):
+        """Store the entry; False when nothing was stored."""
+        if self.failed or self.columns is None: return False
+        try:
+            for fh, kind in zip(self.files, self.dtypes):
+                header = {'descr': np.lib.format.dtype_to_descr(kind), 'fortran_order': False, 'shape': (self.rows,)}
+                text = repr(header).encode('latin1')
+                fh.seek(0)
+                fh.write(b'\x93NUMPY\x01\x00' + (NPY_HEADER - 10).to_bytes(2, 'little')
+                         + text.ljust(NPY_HEADER - 11) + b'\n')
+                fh.close()
+            with open(os.path.join(self.tmp, 'meta.json'), 'w') as fh:
+                json.dump({'columns': self.columns, 'rows': self.rows}, fh)
+            return self.cache._install(self.tmp, self.key)
+        except OSError:
+            return self._fail('skipped')
+        finally:
+            self._fail()
+
+    def _fail(self, counter=None):
+        if counter:
+            with self.cache.lock: self.cache.counters[counter] += 1
+        self.failed = True
+        for fh in self.files or []: fh.close()
+        if self.tmp: shutil.rmtree(self.tmp, ignore_errors=True)
+        return False
+
+def default_cache():
+    """Cache from LABPLOTTER_CACHE_DIR / LABPLOTTER_CACHE_MB; None when the size is 0."""
+    if CACHE_MB <= 0: return None
+    return ParseCache(CACHE_DIR or os.path.join(tempfile.gettempdir(), 'labplotter_cache'), int(CACHE_MB * 2 ** 20))
@@ -0,0 +1,90 @@
+import io
+import os
+import struct
+import tempfile
+from pptx import Presentation
+from pptx.util import Inches
+from metrics import no_span
+
+# --- Slide Settings ---
+SLIDE_SIZES = {'4:3': (10.0, 7.5), '16:9': (13.333, 7.5)}
+DEFAULT_SLIDE = '4:3'
+DEFAULT_DPI = 150
+MARGIN_IN = 0.5
+TOP_IN = 1.0
+BOTTOM_IN = 1.0
+
+# --- Images ---
+def png_size(data):
+    """(width, height) from the PNG IHDR chunk."""
+    if data[:8] != b'\x89PNG\r\n\x1a\n': return None
+    return struct.unpack('>II', data[16:24])
+
+def render_png(graph, width):
+    """
+    Origin can only save figures to a path, so the PNG goes through the
+    system temp dir and is read straight back into memory.
+    """
+    fd, temp = tempfile.mkstemp(suffix='.png', prefix='labplotter_')
+    os.close(fd)
+    try:
+        graph.save_fig(temp, type='png', width=width)
+        with open(temp, 'rb') as fh:
+            return fh.read()
+    finally:
+        try: os.remove(temp)
+        except OSError: pass
+
+def prepare_image(data, max_width):
+    """
+    Safety net for a save_fig that ignores the requested width: downscale
+    oversized figures (needs Pillow). Returns (buffer, (width, height)).
+    """
+    size = png_size(data)
+    if size and size[0] > max_width:
+        try:
+            from PIL import Image
+            img = Image.open(io.BytesIO(data))
+            img = img.resize((max_width, round(img.height * max_width / img.width)), Image.BILINEAR, reducing_gap=2.0)
+            out = io.BytesIO()
+            img.save(out, format='PNG')
+            data, size = out.getvalue(), img.size
+        except ImportError:
+            pass
+    return io.BytesIO(data), size
+
+# --- Export ---
+def picture_box(size, slide_w, slide_h):
+    """Largest box under the title band that keeps the image aspect ratio, centred."""
+    max_w, max_h = slide_w - 2 * MARGIN_IN, slide_h - TOP_IN - BOTTOM_IN
+    if not size: return MARGIN_IN, TOP_IN, None, max_h
+    aspect = size[0] / size[1]
+    width, height = min(max_w, max_h * aspect), min(max_h, max_w / aspect)
+    return (slide_w - width) / 2, TOP_IN, width, height
+
+def export_slides(graphs, path, append=False, slide=DEFAULT_SLIDE, dpi=DEFAULT_DPI, span=no_span):
+    """
+    One slide per graph, rendered in memory on the calling (Origin) thread
+    at the width the picture will fill. `slide` is a SLIDE_SIZES key or
+    (width, height) in inches. With append=True an existing deck is
+    extended. `span(stage)` times each save_fig and the deck write.
+    """
+    slide_w, slide_h = SLIDE_SIZES[slide] if isinstance(slide, str) else slide
+    max_width = int(round((slide_w - 2 * MARGIN_IN) * dpi))
+    if append and os.path.exists(path):
+        prs = Presentation(path)
+    else:
+        prs = Presentation()
+        prs.slide_width, prs.slide_height = Inches(slide_w), Inches(slide_h)
+    slide_w, slide_h = prs.slide_width / 914400, prs.slide_height / 914400
+    blank = prs.slide_layouts[6]
+    for graph in graphs:
+        with span('save_fig', width=max_width):
+            data = render_png(graph, max_width)
+        image, size = prepare_image(data, max_width)
+        left, top, width, height = picture_box(size, slide_w, slide_h)
+        prs.slides.add_slide(blank).shapes.add_picture(
+            image, Inches(left), Inches(top), width=Inches(width) if width else None, height=Inches(height))
+    with span('pptx_write', slides=len(graphs)):
+        prs.save(path)
+    return len(graphs)
@@ -0,0 +1,91 @@
+import io
+import json
+import struct
+import numpy as np
+
+# --- Preview Curves ---
+# What a route would plot, without Origin: every graph of a RenderPlan with
+# its curves as float32 arrays, already thinned by RenderPlan.decimate.
+PREVIEW_POINTS = 1000
+THUMB_SIZE = (320, 240)
+BINARY_MAGIC = b'LPV1'
+# Origin's default colour increment list, for plots coloured by index.
+PALETTE = ['#000000', '#ff0000', '#008000', '#0000ff', '#00ffff', '#ff00ff', '#ffff00', '#808000',
+           '#000080', '#800080', '#800000', '#008080', '#4169e1', '#ff8000', '#8000ff', '#ff69b4']
+
+def _color(value):
+    return PALETTE[value % len(PALETTE)] if isinstance(value, (int, np.integer)) else value
+
+def plan_graphs(plan):
+    """[{x_title, y_title, legend, label, curves: [{name, color, x, y}]}] for every graph of the plan."""
+    graphs = []
+    for graph in plan.graphs:
+        curves = []
+        for p in graph['plots']:
+            spec = plan.sheets[p['sheet']]
+            df = spec['df']
+            curves.append({'name': p['name'] or spec['name'], 'color': _color(p['color']),
+                           'x': df.iloc[:, p['x']].to_numpy(dtype=np.float32, na_value=np.nan),
+                           'y': df.iloc[:, p['y']].to_numpy(dtype=np.float32, na_value=np.nan)})
+        graphs.append({'x_title': graph['x_title'], 'y_title': graph['y_title'], 'legend': graph['legend'],
+                       'label': graph['label'], 'curves': curves})
+    return graphs
+
+def describe(graphs):
+    """The graphs without their arrays; each curve gets its point count instead."""
+    return [dict({k: v for k, v in g.items() if k != 'curves'},
+                 curves=[{'name': c['name'], 'color': c['color'], 'points': len(c['x'])} for c in g['curves']])
+            for g in graphs]
+
+# --- Encodings ---
+def to_json(graphs):
+    """Curves as JSON lists; NaN becomes null."""
+    def values(arr):
+        return [None if v != v else v for v in arr.tolist()]
+    header = describe(graphs)
+    for g, meta in zip(graphs, header):
+        for c, out in zip(g['curves'], meta['curves']):
+            out['x'], out['y'] = values(c['x']), values(c['y'])
+    return header
+
+def to_binary(graphs, meta=None):
+    """
+    b'LPV1', uint32 header length, UTF-8 JSON header, then for every curve
+    in header order its x then y as little-endian float32 (`points` each).
+    """
+    header = json.dumps(dict(meta or {}, graphs=describe(graphs)), default=str).encode()
+    out = io.BytesIO()
+    out.write(BINARY_MAGIC + struct.pack('<I', len(header)) + header)
+    for g in graphs:
+        for c in g['curves']:
+            out.write(c['x'].astype('<f4').tobytes())
+            out.write(c['y'].astype('<f4').tobytes())
+    return out.getvalue()
+
+def _range(values):
+    lo, hi = (float(np.nanmin(values)), float(np.nanmax(values))) if np.isfinite(values).any() else (0.0, 1.0)
+    if hi <= lo: lo, hi = lo - 0.5, hi + 0.5
+    pad = (hi - lo) * 0.04
+    return lo - pad, hi + pad
+
+def to_png(graph, size=THUMB_SIZE):
+    """A scatter thumbnail of one graph, drawn with Pillow (no Origin, no display)."""
+    from PIL import Image, ImageDraw
+    width, height = size
+    left, top, right, bottom = 8, 18, width - 8, height - 8
+    img = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(img)
+    curves = [c for c in graph['curves'] if len(c['x'])]
+    x0, x1 = _range(np.concatenate([c['x'] for c in curves])) if curves else (0.0, 1.0)
+    y0, y1 = _range(np.concatenate([c['y'] for c in curves])) if curves else (0.0, 1.0)
+    draw.rectangle((left, top, right, bottom), outline='#808080')
+    title = f"{graph['y_title']} vs {graph['x_title']}".encode('ascii', 'replace').decode()
+    draw.text((left, 3), title, fill='black')
+    for c in curves:
+        ok = np.isfinite(c['x']) & np.isfinite(c['y'])
+        px = left + (c['x'][ok] - x0) / (x1 - x0) * (right - left)
+        py = bottom - (c['y'][ok] - y0) / (y1 - y0) * (bottom - top)
+        draw.point(list(zip(px.tolist(), py.tolist())), fill=c['color'])
+    out = io.BytesIO()
+    img.save(out, format='PNG')
+    return out.getvalue()
@@ -0,0 +1,288 @@
+import numpy as np
+import pandas as pd
+from collections import namedtuple
+
+# --- Partitioning ---
+def partition_by(df, col):
+    """
+    Split df into (value, frame) groups of `col` in one O(N) pass.
+    Groups keep first-appearance order (same as Series.unique()), rows keep
+    their order inside a group and NaN keys are dropped. Instrument runs step
+    the field/current/frequency sequentially, so when every group is already
+    contiguous the frames are slices of df itself; otherwise rows are
+    reordered once with a stable radix sort and sliced from that copy.
+    """
+    codes, uniques = pd.factorize(df[col], sort=False)
+    if len(uniques) == 0: return []
+    valid = codes >= 0
+    if not valid.all():
+        df, codes = df[valid], codes[valid]
+    counts = np.bincount(codes, minlength=len(uniques))
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+    if len(codes) > 1 and (np.diff(codes) < 0).any():
+        # int16 keys let numpy pick radix sort, keeping this O(N).
+        keys = codes.astype(np.int16) if len(uniques) < 2 ** 15 else codes
+        df = df.iloc[np.argsort(keys, kind='stable')]
+    return [(uniques[i], df.iloc[bounds[i]:bounds[i + 1]]) for i in range(len(uniques))]
+
+class GroupAccumulator:
+    """
+    partition_by for a file read in chunks. Each chunk is split with
+    partition_by and its rows are copied out per group and column, so the
+    chunk itself can be dropped right away; memory holds only the rows
+    kept. Groups keep first-appearance order across chunks and NaN keys
+    are dropped. With by=None everything lands in a single group.
+    """
+    def __init__(self, by=None):
+        self.by = by
+        self.columns = None
+        self.groups = {}
+        self.rows = 0
+
+    def add(self, df):
+        if self.columns is None: self.columns = list(df.columns)
+        for value, sub in (partition_by(df, self.by) if self.by else [(None, df)]):
+            pieces = self.groups.get(value)
+            if pieces is None: pieces = self.groups[value] = [[] for _ in self.columns]
+            for store, name in zip(pieces, self.columns):
+                store.append(sub[name].to_numpy(copy=True))
+            self.rows += len(sub)
+
+    def frames(self):
+        """[(value, frame)] like partition_by; groups are released as their frames are built."""
+        out = []
+        for value in list(self.groups):
+            pieces = self.groups.pop(value)
+            columns = {name: np.concatenate(p) if len(p) > 1 else p[0] for name, p in zip(self.columns, pieces)}
+            del pieces
+            out.append((value, pd.DataFrame(columns, columns=self.columns, copy=False)))
+        return out
+
+# --- Sweep Segmentation ---
+# A sweep only reverses once the temperature has moved SWEEP_TOLERANCE kelvin
+# back from its running extreme, so thermometer noise and small overshoots
+# stay inside the sweep they belong to.
+SWEEP_TOLERANCE = 0.5
+# Blocks start small and double up to SWEEP_BLOCK, so a sweep that ends a few
+# rows in costs a few rows, and the scan stays O(N) however many sweeps there are.
+SWEEP_MIN_BLOCK = 16
+SWEEP_BLOCK = 65536
+
+Segment = namedtuple('Segment', ['start', 'stop', 'direction'])
+
+def _find_reversal(t, pos, direction, tolerance, ext=None):
+    """
+    First reversal at or after pos: (index of the extreme, found?).
+    `ext` carries a (value, index) extreme over from earlier data.
+    """
+    n = len(t)
+    ext_val, ext_idx = ext if ext is not None else (t[pos], pos)
+    size = SWEEP_MIN_BLOCK
+    while pos < n:
+        block = t[pos:pos + size]
+        if direction > 0:
+            run = np.maximum(np.maximum.accumulate(block), ext_val)
+            rev = run - block >= tolerance
+        else:
+            run = np.minimum(np.minimum.accumulate(block), ext_val)
+            rev = block - run >= tolerance
+        stop = int(rev.argmax()) if rev.any() else len(block)
+        if stop:
+            head = block[:stop]
+            i = int(head.argmax() if direction > 0 else head.argmin())
+            if (head[i] > ext_val) if direction > 0 else (head[i] < ext_val):
+                ext_val, ext_idx = head[i], pos + i
+        if stop < len(block): return ext_idx, True
+        pos += len(block)
+        size = min(size * 2, SWEEP_BLOCK)
+    return ext_idx, False
+
+def segment_sweeps(temps, tolerance=SWEEP_TOLERANCE):
+    """
+    Find every monotonic temperature sweep, vectorized block by block.
+    Returns Segments [start, stop) labelled 'cooling', 'warming' or 'flat';
+    a turning point belongs to the sweep that ends on it.
+    """
+    t = np.asarray(temps, dtype=np.float64)
+    n = len(t)
+    if n == 0: return []
+    valid = np.flatnonzero(~np.isnan(t))
+    if len(valid) == 0: return [Segment(0, n, 'flat')]
+    # NaN readings take the previous valid temperature.
+    t = t[valid[np.maximum(np.searchsorted(valid, np.arange(n), side='right') - 1, 0)]]
+    moved = np.flatnonzero(np.abs(t - t[0]) >= tolerance)
+    if len(moved) == 0: return [Segment(0, n, 'flat')]
+    direction = 1 if t[moved[0]] > t[0] else -1
+    segments = []
+    start = 0
+    while start < n:
+        turn, found = _find_reversal(t, start, direction, tolerance)
+        stop = turn + 1 if found else n
+        segments.append(Segment(start, stop, 'warming' if direction > 0 else 'cooling'))
+        start, direction = stop, -direction
+    return segments
+
+class SweepTracker:
+    """
+    segment_sweeps for data that arrives in chunks (a file still being
+    written). State is a few scalars, so each feed() costs O(chunk). Rows
+    already handed out are never moved, so the result differs from
+    segment_sweeps on the whole data in two ways only: rows read before
+    the temperature first moved by `tolerance` come back 'flat', and when
+    a reversal is only seen in a later chunk, the turnaround rows before
+    that chunk stay with the earlier sweep.
+    """
+    def __init__(self, tolerance=SWEEP_TOLERANCE):
+        self.tolerance = tolerance
+        self.n = 0
+        self.last = np.nan
+        self.first = np.nan
+        self.direction = 0
+        self.ordinal = 0
+        self.ext = None
+        self.after = None
+        self.guesses = None
+
+    def feed(self, temps):
+        """
+        Consume the next chunk; returns Segments covering exactly its rows
+        (global row numbers) with the sweep ordinal: [(Segment, ordinal)].
+        """
+        t = np.asarray(temps, dtype=np.float64).copy()
+        base, n = self.n, len(t)
+        if n == 0: return []
+        nan = np.isnan(t)
+        if nan.any():
+            valid = np.flatnonzero(~nan)
+            if len(valid):
+                t = t[valid[np.maximum(np.searchsorted(valid, np.arange(n), side='right') - 1, 0)]]
+                # Leading NaNs take the last reading, or the first one before any.
+                if not np.isnan(self.last): t[:valid[0]] = self.last
+            else:
+                t[:] = self.last
+        self.n += n
+        if self.direction == 0:
+            if np.isnan(self.first):
+                if np.isnan(t[0]): return [(Segment(base, base + n, 'flat'), 0)]
+                # segment_sweeps scans both directions' first sweep from the first reading.
+                self.first = t[0]
+                self.guesses = [self._guess(1), self._guess(-1)]
+            self.last = t[-1]
+            moved = np.flatnonzero(np.abs(t - self.first) >= self.tolerance)
+            if not len(moved):
+                for guess in self.guesses: guess._scan(t, base)
+                return [(Segment(base, base + n, 'flat'), 0)]
+            guess = self.guesses[0 if t[moved[0]] > self.first else 1]
+            self.direction, self.ordinal, self.ext, self.after = guess.direction, guess.ordinal, guess.ext, guess.after
+            self.guesses = None
+        self.last = t[-1]
+        return self._scan(t, base)
+
+    def _guess(self, direction):
+        guess = SweepTracker(self.tolerance)
+        guess.direction, guess.ext = direction, (self.first, 0)
+        return guess
+
+    def _scan(self, t, base):
+        """Run the sweeps on through t (rows base onward); [(Segment, ordinal)] for its rows."""
+        n = len(t)
+        pieces = []
+        start, pos = base, 0
+        while pos < n:
+            ext = None if self.ext is None else (self.ext[0], self.ext[1] - base)
+            turn, found = _find_reversal(t, pos, self.direction, self.tolerance, ext)
+            if not found:
+                # Also keep the opposite extreme of the rows after this sweep's extreme: the
+                # next sweep starts there, even if those rows were handed out already.
+                if turn >= pos:
+                    self.ext, self.after, rest = (t[turn], base + turn), None, turn + 1
+                else:
+                    rest = pos
+                if rest < n:
+                    tail = t[rest:]
+                    j = int(tail.argmin() if self.direction > 0 else tail.argmax())
+                    if self.after is None or (tail[j] < self.after[0] if self.direction > 0 else tail[j] > self.after[0]):
+                        self.after = (tail[j], base + rest + j)
+                break
+            stop = max(base + turn + 1, start)
+            if stop > start: pieces.append((Segment(start, stop, 'warming' if self.direction > 0 else 'cooling'), self.ordinal))
+            self.ordinal += 1
+            self.direction = -self.direction
+            self.ext = self.after if turn + 1 < 0 else None
+            self.after = None
+            start, pos = stop, stop - base
+        if start < base + n:
+            pieces.append((Segment(start, base + n, 'warming' if self.direction > 0 else 'cooling'), self.ordinal))
+        return pieces
+
+def split_sweeps(df, tolerance=SWEEP_TOLERANCE, col='Temperature'):
+    """(Segment, frame) pairs for every sweep in df; frames are row slices."""
+    return [(seg, df.iloc[seg.start:seg.stop]) for seg in segment_sweeps(df[col].to_numpy(), tolerance)]
+
+def sweep_tags(segments):
+    """'' for the first sweep in each direction, then ' #2', ' #3', ..."""
+    seen = {}
+    tags = []
+    for seg in segments:
+        seen[seg.direction] = seen.get(seg.direction, 0) + 1
+        tags.append('' if seen[seg.direction] == 1 else f' #{seen[seg.direction]}')
+    return tags
+
+# --- Decimation ---
+# Curves longer than the point budget are thinned before they reach Origin.
+# Both methods bucket by row index and always keep the first and last row.
+def _first_in_bucket(match, bucket_of):
+    """Index of the first True in `match` for every bucket."""
+    hits = np.flatnonzero(match)
+    _, first = np.unique(bucket_of[hits], return_index=True)
+    return hits[first]
+
+def lttb_indices(x, y, budget):
+    """
+    Largest-Triangle-Three-Buckets, fully vectorized. Each bucket keeps the
+    point spanning the largest triangle with the centroids of its neighbour
+    buckets; the previous centroid stands in for the previously chosen point
+    so every bucket is solved in the same pass.
+    """
+    n = len(y)
+    budget = max(int(budget), 3)
+    if n <= budget: return np.arange(n)
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    count = budget - 2
+    edges = np.linspace(1, n - 1, count + 1).astype(np.int64)
+    bucket_of = np.repeat(np.arange(count), np.diff(edges))
+    mx, my = x[1:n - 1], y[1:n - 1]
+    finite = np.isfinite(mx) & np.isfinite(my)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        seen = np.add.reduceat(finite, edges[:-1] - 1)
+        cx = np.add.reduceat(np.where(finite, mx, 0.0), edges[:-1] - 1) / seen
+        cy = np.add.reduceat(np.where(finite, my, 0.0), edges[:-1] - 1) / seen
+    ax, ay = np.concatenate(([x[0]], cx[:-1])), np.concatenate(([y[0]], cy[:-1]))
+    bx, by = np.concatenate((cx[1:], [x[-1]])), np.concatenate((cy[1:], [y[-1]]))
+    ax, ay, bx, by = ax[bucket_of], ay[bucket_of], bx[bucket_of], by[bucket_of]
+    area = np.abs((ax - bx) * (my - ay) - (ax - mx) * (by - ay))
+    area[np.isnan(area)] = -np.inf
+    best = np.maximum.reduceat(area, edges[:-1] - 1)
+    picked = _first_in_bucket(area == best[bucket_of], bucket_of) + 1
+    return np.concatenate(([0], picked, [n - 1]))
+
+def minmax_indices(x, y, budget):
+    """Min-max envelope: the lowest and highest point of every bucket."""
+    n = len(y)
+    budget = max(int(budget), 4)
+    if n <= budget: return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    count = (budget - 2) // 2
+    edges = np.linspace(0, n, count + 1).astype(np.int64)
+    bucket_of = np.repeat(np.arange(count), np.diff(edges))
+    nan = np.isnan(y)
+    low, high = np.where(nan, np.inf, y), np.where(nan, -np.inf, y)
+    lows = _first_in_bucket(low == np.minimum.reduceat(low, edges[:-1])[bucket_of], bucket_of)
+    highs = _first_in_bucket(high == np.maximum.reduceat(high, edges[:-1])[bucket_of], bucket_of)
+    return np.unique(np.concatenate(([0], lows, highs, [n - 1])))
+
+DECIMATORS = {'lttb': lttb_indices, 'minmax': minmax_indices}
+
+def decimate_indices(x, y, budget, method='lttb'):
+    """Sorted row positions that keep the shape of y(x) within `budget` points."""
+    return DECIMATORS[method](x, y, budget)
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+import traceback
+from metrics import no_span
+
+# --- Project Persistence ---
+# Requests only mark the project dirty. One saver thread waits for a burst
+# of requests to settle (SAVE_DELAY, but never longer than SAVE_MAX_DELAY
+# after the first), then saves once for all of them.
+SAVE_DELAY = 1.0
+SAVE_MAX_DELAY = 10.0
+SAVE_RETRIES = 5
+SAVE_BACKOFF = 0.5
+
+class ProjectSaver:
+    """
+    Coalesced background saves of the Origin project file. `run(fn)` must
+    call fn(op) on the Origin thread and return its result. Origin saves
+    straight to the target, so its open project keeps pointing there and a
+    later manual save lands in the same file. The previous file is first
+    moved aside to <name>.previous<ext> and put back if the save fails or
+    writes nothing. A target that is locked (open in another Origin
+    instance) is retried with backoff instead of being skipped; other
+    errors fail the save at once. If the app died mid-save, leaving only
+    the .previous copy, that copy is put back when the saver is created.
+    """
+    def __init__(self, path, run, delay=SAVE_DELAY, max_delay=SAVE_MAX_DELAY, retries=SAVE_RETRIES,
+                 backoff=SAVE_BACKOFF, span=no_span):
+        self.path = path
+        root, ext = os.path.splitext(path)
+        self.backup = f'{root}.previous{ext}'
+        self.run = run
+        self.delay = delay
+        self.max_delay = max_delay
+        self.retries = retries
+        self.backoff = backoff
+        self.span = span
+        self.cond = threading.Condition()
+        self.requested = 0
+        self.saved = 0
+        self.state = 'idle'
+        self.saves = 0
+        self.failures = 0
+        self.last = None
+        self.stopping = False
+        self.thread = None
+        self.recovered = False
+        if os.path.exists(self.backup) and not os.path.exists(path):
+            os.replace(self.backup, path)
+            self.recovered = True
+
+    def request(self):
+        """Mark the project dirty; returns at once."""
+        with self.cond:
+            self.requested += 1
+            if self.state in ('idle', 'error'): self.state = 'pending'
+            if self.thread is None or not self.thread.is_alive():
+                self.stopping = False
+                self.thread = threading.Thread(target=self._loop, name='project-saver', daemon=True)
+                self.thread.start()
+            self.cond.notify()
+        return self.requested
+
+    def flush(self, timeout=None):
+        """Wait until every request made so far is saved (or failed); True when saved."""
+        target = self.requested
+        deadline = None if timeout is None else time.time() + timeout
+        with self.cond:
+            while self.saved < target and self.thread is not None and self.thread.is_alive():
+                if not self.cond.wait(None if deadline is None else max(0.0, deadline - time.time())): break
+            return self.saved >= target and self.state != 'error'
+
+    def stop(self, timeout=None):
+        """Save what is pending, then end the thread."""
+        with self.cond:
+            self.stopping = True
+            self.cond.notify_all()
+            thread = self.thread
+        if thread is not None: thread.join(timeout)
+
+    def _loop(self):
+        while True:
+            with self.cond:
+                while self.saved == self.requested and not self.stopping: self.cond.wait()
+                if self.saved == self.requested: return
+                # Let the burst settle: wait until no request came in for `delay`.
+                first = time.time()
+                while not self.stopping:
+                    seen = self.requested
+                    self.cond.wait(self.delay)
+                    if self.requested == seen or time.time() - first >= self.max_delay: break
+                target, coalesced = self.requested, self.requested - self.saved
+                self.state = 'saving'
+            try:
+                result = self._save()
+            except Exception as e:
+                traceback.print_exc()
+                result = {'error': str(e), 'attempts': 0}
+            with self.cond:
+                self.saved = target
+                self.last = dict(result, coalesced=coalesced, at=time.time())
+                if result['error']:
+                    self.failures += 1
+                    self.state = 'error'
+                else:
+                    self.saves += 1
+                    self.state = 'pending' if self.requested > self.saved else 'idle'
+                self.cond.notify_all()
+
+    def _save(self):
+        t0 = time.perf_counter()
+        error = None
+        for attempt in range(self.retries + 1):
+            # Moving the last good copy aside fails while another program holds the file.
+            try:
+                if os.path.exists(self.path): os.replace(self.path, self.backup)
+                error = None
+                break
+            except PermissionError as e:
+                error = f'{os.path.basename(self.path)} is locked: {e.strerror or e}'
+                if attempt < self.retries: time.sleep(self.backoff * 2 ** attempt)
+        if error: return {'error': error, 'attempts': attempt + 1, 'save_seconds': 0.0, 'seconds': time.perf_counter() - t0}
+        try:
+            with self.span('project_save'):
+                self.run(lambda op: op.save(self.path))
+            if not os.path.exists(self.path): error = f'Origin wrote no project file at {self.path}'
+        except Exception as e:
+            error = str(e)
+        saved = time.perf_counter()
+        if error:
+            if os.path.exists(self.backup): os.replace(self.backup, self.path)
+        elif os.path.exists(self.backup):
+            os.remove(self.backup)
+        return {'error': error, 'attempts': attempt + 1, 'save_seconds': saved - t0,
+                'seconds': time.perf_counter() - t0}
+
+    def status(self):
+        with self.cond:
+            return {'path': self.path, 'previous': self.backup, 'recovered': self.recovered, 'state': self.state,
+                    'requested': self.requested, 'saved': self.saved, 'pending': self.requested - self.saved,
+                    'saves': self.saves, 'failures': self.failures, 'last': self.last}
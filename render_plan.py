@@ -0,0 +1,133 @@
+import time
+import numpy as np
+from metrics import no_span
+from processing import decimate_indices
+
+# --- Render Plan ---
+class RenderPlan:
+    """
+    Declarative description of what one job builds in Origin: books,
+    worksheets, graphs and their plots. Routes fill it in on the request
+    thread; execute_plan replays it on the Origin worker.
+    """
+    def __init__(self):
+        self.books = []
+        self.sheets = []
+        self.graphs = []
+
+    def book(self, lname):
+        self.books.append(lname)
+        return len(self.books) - 1
+
+    def sheet(self, name, df, book=None, **tags):
+        """
+        Tags describe the rows for analysis and are never sent to Origin:
+        group and sweep say where they came from, kind='resistance' marks
+        R(T) data that gets the Tc criteria.
+        """
+        self.sheets.append({'name': name, 'df': df, 'book': book, 'tags': tags})
+        return len(self.sheets) - 1
+
+    def graph(self, template, x_title, y_title, legend='', label=''):
+        graph = {'template': template, 'x_title': x_title, 'y_title': y_title,
+                 'legend': legend, 'label': label, 'plots': []}
+        self.graphs.append(graph)
+        return graph
+
+    def plot(self, graph, sheet, x_col, y_col, color, name=None):
+        graph['plots'].append({'sheet': sheet, 'x': x_col, 'y': y_col, 'color': color, 'name': name})
+
+    def rows(self):
+        return sum(len(spec['df']) for spec in self.sheets)
+
+    def points(self):
+        """Points drawn across all graphs (rows of each plotted sheet)."""
+        return sum(len(self.sheets[p['sheet']]['df']) for graph in self.graphs for p in graph['plots'])
+
+    def decimate(self, budget, method='lttb', raw=False):
+        """
+        Thin every plotted curve to about `budget` points. A sheet feeding
+        several curves keeps the union of their points so all of them stay
+        shape-true. With raw=True each thinned sheet also gets an unplotted
+        '<name> raw' copy at full resolution. Returns (points before, after).
+        """
+        before = self.points()
+        curves = {}
+        for graph in self.graphs:
+            for p in graph['plots']:
+                curves.setdefault(p['sheet'], set()).add((p['x'], p['y']))
+        for index, pairs in curves.items():
+            spec = self.sheets[index]
+            full = spec['df']
+            if len(full) <= budget: continue
+            keep = [decimate_indices(full.iloc[:, x].to_numpy(), full.iloc[:, y].to_numpy(), budget, method)
+                    for x, y in sorted(pairs)]
+            spec['df'] = full.iloc[np.unique(np.concatenate(keep))]
+            if raw: self.sheet(f"{spec['name']} raw", full, spec['book'])
+        return before, self.points()
+
+# --- Executor ---
+def _lt_text(text):
+    """A LabTalk string literal; it cannot hold a double quote, and line breaks are written as \\n."""
+    return '"' + str(text).replace('"', "'").replace('\r\n', '\n').replace('\n', '\\n') + '"'
+
+def _lt_color(color):
+    # Integer colours index Origin's colour list, which LabTalk counts from 1.
+    if isinstance(color, (int, np.integer)): return str(int(color) + 1)
+    return f'color({color})'
+
+def graph_script(spec):
+    """
+    LabTalk for everything about a graph layer that is a property: axis
+    titles, plot colours, legend, text label and rescale. Run in the
+    layer's context, it replaces a COM round trip per property.
+    """
+    lines = [f'xb.text$ = {_lt_text(spec["x_title"])};', f'yl.text$ = {_lt_text(spec["y_title"])};']
+    for i, p in enumerate(spec['plots']):
+        lines.append(f'layer.plot = {i + 1}; set %C -c {_lt_color(p["color"])};')
+    if spec['legend']: lines.append(f'legend.text$ = {_lt_text(spec["legend"])};')
+    if spec['label']: lines.append(f'text.text$ = {_lt_text(spec["label"])};')
+    lines.append('rescale;')
+    return '\n'.join(lines)
+
+def execute_plan(plan, op, sync=True, span=no_span):
+    """
+    Build everything in the plan. Objects are created one call each; each
+    graph's properties go over as one LabTalk script (graph_script), and
+    the only wait is a single sync at the end instead of a fixed sleep
+    after every graph and plot. Returns the backend graph objects in plan
+    order. `span(stage)` times the worksheet, graph and sync stages.
+    """
+    with span('worksheets', sheets=len(plan.sheets), rows=plan.rows()):
+        books = [op.new_book('w', lname=lname) for lname in plan.books]
+        sheets = []
+        for spec in plan.sheets:
+            if spec['book'] is None:
+                wks = op.new_sheet('w', lname=spec['name'])
+            else:
+                wks = books[spec['book']].add_sheet(spec['name'])
+            wks.from_df(spec['df'])
+            sheets.append(wks)
+    graphs = []
+    with span('graphs', graphs=len(plan.graphs), points=plan.points()):
+        for spec in plan.graphs:
+            graph = op.new_graph(template=spec['template'])
+            layer = graph[0]
+            for p in spec['plots']:
+                plot = layer.add_plot(sheets[p['sheet']], colx=p['x'], coly=p['y'])
+                if p['name']: plot.name = p['name']
+            layer.lt_exec(graph_script(spec))
+            graphs.append(graph)
+    if sync and (sheets or graphs):
+        with span('sync'): op.wait()
+    return graphs
+
+def replay_plan(plan, op):
+    """
+    Execute against a recording backend; returns (graphs, calls, seconds).
+    A graph's LabTalk script is one call, as it is one round trip in Origin.
+    """
+    op.reset()
+    t0 = time.perf_counter()
+    graphs = execute_plan(plan, op)
+    return graphs, len(op.calls), time.perf_counter() - t0
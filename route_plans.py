@@ -0,0 +1,230 @@
+import numpy as np
+import pandas as pd
+from functools import partial
+from processing import DECIMATORS, SWEEP_TOLERANCE, split_sweeps, sweep_tags
+from pptx_export import DEFAULT_DPI, DEFAULT_SLIDE, SLIDE_SIZES
+from render_plan import RenderPlan
+
+# Route handlers without Flask: each plan_* takes the uploaded files, the
+# parsed form params and a load(file_obj, fmt, by=None, prepare=None)
+# callable with loaders.read_upload's contract, and returns
+# (RenderPlan, pptx name). app.py serves them over HTTP; batch.py runs
+# them over directories on a process pool.
+class PlanError(ValueError):
+    """Input that parses but cannot be plotted (reported as HTTP 400)."""
+
+# --- Params ---
+def form_number(form, key, default, kind=float):
+    """form[key] as `kind`, `default` when missing or empty; PlanError when it is not a number."""
+    val = form.get(key)
+    if val is None or val == '': return default
+    try:
+        return kind(val)
+    except (TypeError, ValueError):
+        raise PlanError(f'{key} must be a number, got {val!r}') from None
+
+def parse_params(form, form_keys):
+    """Route params from a form-like mapping; raises PlanError on bad switches."""
+    params = {}
+    for key in form_keys:
+        val = form.get(key)
+        try:
+            params[key] = float(val) if (key != 'lastModified') else val
+        except (TypeError, ValueError):
+            params[key] = val
+    
+    # Read Switches
+    params['createPPT'] = form.get('createPPT') == 'true'
+    params['saveProject'] = form.get('saveProject') == 'true'
+    params['float32'] = form.get('float32') == 'true'
+    params['async'] = form.get('async') == 'true'
+    params['sweepTolerance'] = form_number(form, 'sweepTolerance', SWEEP_TOLERANCE)
+    params['appendPPT'] = form.get('appendPPT') == 'true'
+    params['slideSize'] = form.get('slideSize') or DEFAULT_SLIDE
+    params['pptDpi'] = form_number(form, 'pptDpi', DEFAULT_DPI, int)
+    params['pointBudget'] = form_number(form, 'pointBudget', 0, int)
+    params['decimation'] = form.get('decimation') or 'lttb'
+    params['rawSheet'] = form.get('rawSheet') == 'true'
+    if params['decimation'] not in DECIMATORS:
+        raise PlanError(f"Unknown decimation: {params['decimation']}")
+    if params['slideSize'] not in SLIDE_SIZES:
+        raise PlanError(f"Unknown slide size: {params['slideSize']}")
+    if params['pointBudget'] < 0:
+        raise PlanError(f"pointBudget must be 0 (off) or more, got {params['pointBudget']}")
+    if params['pptDpi'] <= 0:
+        raise PlanError(f"pptDpi must be positive, got {params['pptDpi']}")
+    return params
+
+# --- Graph Helpers ---
+SWEEP_COLORS = {'cooling': 'blue', 'warming': 'red'}
+
+def plan_sweep_sheets(plan, df, suffix, tolerance, names=None, **tags):
+    """One worksheet per temperature sweep, each with `tags`; returns (legend label, color, sheet)."""
+    sweeps = split_sweeps(df, tolerance)
+    sheets = []
+    for (seg, frame), tag in zip(sweeps, sweep_tags([seg for seg, _ in sweeps])):
+        name = seg.direction.capitalize()
+        wks = plan.sheet(f'{name}Data {suffix}{tag}', frame, sweep=seg.direction, **tags)
+        color = SWEEP_COLORS.get(seg.direction, len(sheets)) if not tag else len(sheets)
+        sheets.append(((names or {}).get(seg.direction, name) + tag, color, wks))
+    return sheets
+
+def sweep_legend(sheets):
+    return '\n'.join(f'\\l({i+1}) {label}' for i, (label, _, _) in enumerate(sheets))
+
+def round_up(field, step=10):
+    """Snap a field column up to the next `step` Oe so setpoint jitter shares one group."""
+    return np.ceil(field / step) * step
+
+# --- Route Plans ---
+def plan_dewar(files, params, load):
+    fmt_date = params.get('lastModified', '')
+    df_cool = load(files['cooling'], 'dewar')
+    df_warm = load(files['warming'], 'dewar')
+    plan = RenderPlan()
+    wks_c = plan.sheet(f'CoolingData {params["pressure"]} GPa', df_cool, sweep='cooling', kind='resistance')
+    wks_w = plan.sheet(f'WarmingData {params["pressure"]} GPa', df_warm, sweep='warming', kind='resistance')
+    for i, ch in enumerate(['1', '2']):
+        y_idx = 1 if ch == '1' else 2
+        txt = f'{fmt_date}\nHg1223\nCh. {ch}\nPressure: {params["pressure"]} GPa'
+        graph = plan.graph('Scatter', 'T (K)', 'R (Ω)', '\l(1) Cooling\n\l(2) Warming', txt)
+        plan.plot(graph, wks_c, 0, y_idx, 'blue')
+        plan.plot(graph, wks_w, 0, y_idx, 'red')
+    return plan, f"Dewar_{params['pressure']}GPa.pptx"
+
+def plan_resistance(files, params, load, fmt):
+    fmt_date = params.get('lastModified', '')
+    df = load(files['datafile'], fmt)
+    plan = RenderPlan()
+    sheets = plan_sweep_sheets(plan, df, f'{params["pressure"]} GPa', params['sweepTolerance'], kind='resistance')
+    for ch in ['1', '2']:
+        y_idx = 1 if ch == '1' else 2
+        txt = f'{fmt_date}\nHg1223\nCh. {ch}\nPressure: {params["pressure"]} GPa'
+        graph = plan.graph('Scatter', 'T (K)', 'R (Ω)', sweep_legend(sheets), txt)
+        for _, color, wks in sheets:
+            plan.plot(graph, wks, 0, y_idx, color)
+    return plan, f"Resistance_{params['pressure']}GPa.pptx"
+
+def plan_current_effect(files, params, load):
+    fmt_date = params.get('lastModified', '')
+    groups = load(files['datafile'], 'current_effect', by='Current',
+                  prepare=lambda df: df[pd.to_numeric(df['Temperature'], errors='coerce').notnull()])
+    plan = RenderPlan()
+    wb = plan.book(f'CurrentData {params["pressure"]} GPa')
+    for ch_idx, ch_name in [(1, '1'), (2, '2')]:
+        graph = plan.graph('Scatter', 'T (K)', 'R (Ω)', '', f'{fmt_date}\nHg1223\nCh. {ch_name}\n{params["pressure"]} GPa')
+        legend = ''
+        for i, (curr, sub) in enumerate(groups):
+            wks = plan.sheet(f'Ch{ch_name}_{curr}mA', sub[['Temperature', f'R{ch_name}']], wb, group=curr,
+                             kind='resistance')
+            plan.plot(graph, wks, 0, 1, i)
+            legend += f'\l({i+1}) {curr} A\n'
+        graph['legend'] = legend
+    return plan, f"CurrentEffect_{params['pressure']}GPa.pptx"
+
+def plan_ppms_magnetic(files, params, load):
+    groups = load(files['datafile'], 'ppms_magnetic', by='MagneticField')
+    fmt_date = params.get('lastModified', '')
+    plan = RenderPlan()
+    wb = plan.book(f'MagneticFieldData {params["pressure"]} GPa')
+    for ch_idx, ch_name in [(1, '1'), (2, '2')]:
+        graph = plan.graph('Scatter', 'T (K)', 'R (Ω)', '', f'{fmt_date}\nCe\nCh. {ch_name}\n{params["pressure"]} GPa')
+        legend = ''
+        for i, (field, sub) in enumerate(groups):
+            wks = plan.sheet(f'Field_{field}', sub[['Temperature', f'R{ch_name}']], wb, group=field,
+                             kind='resistance')
+            plan.plot(graph, wks, 0, 1, i)
+            legend += f'\l({i+1}) {round(field)/1000} T\n'
+        graph['legend'] = legend
+    return plan, f"MagneticField_{params['pressure']}GPa.pptx"
+
+def plan_ppms_heat_capacity(files, params, load):
+    groups = load(files['datafile'], 'ppms_heat_capacity', by='MagneticField',
+                  prepare=lambda df: df.assign(MagneticField=round_up(df['MagneticField'])))
+    fmt_date = params.get('lastModified', '')
+    plan = RenderPlan()
+    wb = plan.book(f'MagneticFieldData {params["mass_heat_cap"]} mg')
+    graph = plan.graph('Scatter', 'T (K)', 'Cp (mj/mole$\cdot$K)', '', f'{fmt_date}\n{params["mass_heat_cap"]} mg')
+    legend = ''
+    for i, (field, sub) in enumerate(groups):
+        wks = plan.sheet(f'Field_{field}', sub[['Temperature', 'Heat capacity']], wb, group=field)
+        plan.plot(graph, wks, 0, 1, i)
+        legend += f'\l({i+1}) {round(field)/1000} T\n'
+    graph['legend'] = legend
+    return plan, f"HeatCapacity_{params['mass_heat_cap']}mg.pptx"
+
+def plan_field_warming_cooling(files, params, load, fmt, y_col, y_label, mass_key, round_field):
+    fmt_date = params.get('lastModified', '')
+    field_col = 'Magnetic field'
+    prepare = (lambda df: df.assign(**{field_col: round_up(df[field_col])})) if round_field else None
+    groups = load(files['datafile'], fmt, by=field_col, prepare=prepare)
+    plan = RenderPlan()
+    wb = plan.book(f'Data_{params[mass_key]}mg')
+    graph_warm = plan.graph('Scatter', 'T (K)', y_label, '', f'{fmt_date}\nZFC\nCe\nMass = {params[mass_key]}mg')
+    graph_cool = plan.graph('Scatter', 'T (K)', y_label, '', f'{fmt_date}\nFC\nCe\nMass = {params[mass_key]}mg')
+    leg_w, leg_c = '', ''
+    n_w, n_c = 0, 0
+    for i, (field, sub) in enumerate(groups):
+        sweeps = split_sweeps(sub, params['sweepTolerance'])
+        for (seg, frame), tag in zip(sweeps, sweep_tags([seg for seg, _ in sweeps])):
+            if seg.direction == 'cooling':
+                wks_c = plan.sheet(f'Cooling_{field}{tag}', frame[['Temperature', y_col]], wb, group=field, sweep='cooling')
+                plan.plot(graph_cool, wks_c, 0, 1, i, f'Cooling_{field}{tag}')
+                n_c += 1
+                leg_c += f'\l({n_c}){field} Oe{tag}\n'
+            else:
+                wks_w = plan.sheet(f'Warming_{field}{tag}', frame[['Temperature', y_col]], wb, group=field, sweep='warming')
+                plan.plot(graph_warm, wks_w, 0, 1, i, f'Warming_{field}{tag}')
+                n_w += 1
+                leg_w += f'\l({n_w}){field} Oe{tag}\n'
+    graph_warm['legend'] = leg_w
+    graph_cool['legend'] = leg_c
+    return plan, f"CW_FieldData_{params[mass_key]}mg.pptx"
+
+def plan_mpms(files, params, load):
+    fmt_date = params.get('lastModified', '')
+    df = load(files['datafile'], 'mpms')
+    plan = RenderPlan()
+    sheets = plan_sweep_sheets(plan, df, f'{params["magnetic_moment"]} Oe', params['sweepTolerance'],
+                               {'warming': 'ZFC', 'cooling': 'FC'})
+    txt = f'{fmt_date}\nCe\nMagnetic field: {params["magnetic_moment"]} Oe'
+    graph = plan.graph('Scatter', 'T (K)', 'Magnetic moment (Oe)', sweep_legend(sheets), txt)
+    for _, color, wks in sheets:
+        plan.plot(graph, wks, 0, 1, color)
+    return plan, f"MPMS_{params['magnetic_moment']}Oe.pptx"
+
+def plan_mpms_ac(files, params, load):
+    groups = load(files['datafile'], 'mpms_ac', by='Frequency', prepare=lambda df: df.dropna())
+    if not groups: raise PlanError('No valid frequency data found')
+    plan = RenderPlan()
+    wb = plan.book(f"AC_Susceptibility_{params['mass_ac']}mg")
+    graph_real = plan.graph('Scatter', 'Temperature (K)', "X' (emu/Oe)")
+    graph_imag = plan.graph('Scatter', 'Temperature (K)', "X'' (emu/Oe)")
+    legend = ''
+    for i, (freq, sub) in enumerate(groups):
+        safe_freq = f"{freq:.2f}".replace('.', '_')
+        wks = plan.sheet(f'Freq_{safe_freq}', sub, wb, group=freq)
+        plan.plot(graph_real, wks, 0, 2, i)
+        plan.plot(graph_imag, wks, 0, 3, i)
+        legend += f'\l({i+1}) {freq:.1f} Hz\n'
+    graph_real['legend'] = graph_imag['legend'] = legend
+    return plan, f"AC_Susceptibility_{params['mass_ac']}mg.pptx"
+
+# --- Route Table ---
+# route -> uploaded file keys, form fields, plan builder
+ROUTES = {
+    'dewar': (['cooling', 'warming'], ['pressure', 'lastModified'], plan_dewar),
+    'dewar_strip': (['datafile'], ['pressure', 'lastModified'], partial(plan_resistance, fmt='dewar_strip')),
+    'ppms': (['datafile'], ['pressure', 'lastModified'], partial(plan_resistance, fmt='ppms')),
+    'current_effect': (['datafile'], ['pressure', 'lastModified'], plan_current_effect),
+    'ppms_magnetic': (['datafile'], ['pressure', 'lastModified'], plan_ppms_magnetic),
+    'ppms_heat_capacity': (['datafile'], ['mass_heat_cap', 'lastModified'], plan_ppms_heat_capacity),
+    'ppms_heat_capacity_cw': (['datafile'], ['mass', 'lastModified'], partial(
+        plan_field_warming_cooling, fmt='ppms_heat_capacity_cw', y_col='Heat capacity',
+        y_label='Heat capacity (mj/mole$\cdot$K)', mass_key='mass', round_field=True)),
+    'mpms_magnetic': (['datafile'], ['mass', 'lastModified'], partial(
+        plan_field_warming_cooling, fmt='mpms_magnetic', y_col='Magnetic moment',
+        y_label='Magnetic moment (Oe)', mass_key='mass', round_field=False)),
+    'mpms': (['datafile'], ['magnetic_moment', 'lastModified'], plan_mpms),
+    'mpms_ac': (['datafile'], ['mass_ac', 'MF_dc', 'MF_ac', 'lastModified'], plan_mpms_ac),
+}
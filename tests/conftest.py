@@ -0,0 +1,32 @@
+import os
+import sys
+
+# The app modules are flat siblings at the repo root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LABPLOTTER_BACKEND', 'fake')
+os.environ.setdefault('LABPLOTTER_CACHE_MB', '0')
+
+import pytest
+import fake_originpro
+
+@pytest.fixture
+def fo():
+    """The recording fake backend, reset before and after the test."""
+    fake_originpro.reset()
+    yield fake_originpro
+    fake_originpro.reset()
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """app.py on the fake backend, run from a scratch folder (it saves its project to the cwd)."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('app'))
+    import app
+    yield app
+    app.saver.stop(5)
+    app.worker.stop(5)
+    os.chdir(cwd)
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
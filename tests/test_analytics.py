@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from analytics import analyze_curves, compare_pairs
+
+def transition(tc, r_n=100.0, width=0.5, t=None):
+    t = np.arange(60.0, 150.0, 0.05) if t is None else t
+    return t, r_n / (1 + np.exp(-(t - tc) / width))
+
+def test_tc_and_normal_resistance_of_a_sigmoid():
+    t, r = transition(90.0)
+    cooling = (t[::-1], r[::-1])  # a cooling sweep arrives with T falling
+    noisy = (t, r + np.random.default_rng(0).normal(0, 0.2, len(t)))
+    stats, _ = analyze_curves([(t, r), cooling, noisy], [True, True, True])
+    for i in range(3):
+        assert stats['r_normal'][i] == pytest.approx(100.0, rel=0.01)
+        assert stats['tc_mid'][i] == pytest.approx(90.0, abs=0.1)
+        assert stats['tc_onset'][i] == pytest.approx(90.0 + 0.5 * np.log(9), abs=0.15)
+        assert stats['tc_zero'][i] == pytest.approx(90.0 - 0.5 * np.log(99), abs=0.2)
+        assert stats['t_dydt_max'][i] == pytest.approx(90.0, abs=0.2)
+        assert stats['norm'][i] == stats['r_normal'][i]
+    assert stats['points'].tolist() == [len(t)] * 3
+
+def test_non_resistive_and_empty_curves():
+    t, r = transition(90.0)
+    t_nan, r_nan = t.copy(), -r
+    r_nan[::3] = np.nan
+    stats, _ = analyze_curves([(t_nan, r_nan), (np.array([]), np.array([]))], [False, True])
+    assert np.isnan(stats['r_normal']).all() and np.isnan(stats['tc_mid']).all()
+    assert stats['norm'][0] == pytest.approx(100.0, rel=0.01)
+    assert stats['points'].tolist() == [len(t) - len(t[::3]), 0]
+
+def test_compare_pairs_of_shifted_sweeps():
+    t, cool = transition(89.0)
+    _, warm = transition(90.0)
+    _, same = transition(95.0)
+    curves = [(t[::-1], cool[::-1]), (t, warm), (t, same), (t, same)]
+    stats, packed = analyze_curves(curves, [True] * 4)
+    diffs = compare_pairs(packed, [(0, 1), (2, 3)], stats)
+    assert diffs['dtc_mid'][0] == pytest.approx(1.0, abs=0.05)
+    assert diffs['dtc_mid'][1] == pytest.approx(0.0, abs=1e-9)
+    # Two 0.5 K wide steps 1 K apart are furthest apart halfway between them.
+    assert diffs['max_diff'][0] == pytest.approx(100 * (1 / (1 + np.exp(-1)) - 1 / (1 + np.exp(1))), rel=0.1)
+    assert diffs['area'][0] == pytest.approx(100.0, rel=0.05)  # 1 K shift of a 100 Ω step
+    assert 89.0 < diffs['t_split'][0] < 95.0
+    assert diffs['max_diff'][1] == pytest.approx(0.0, abs=1e-6) and np.isnan(diffs['t_split'][1])
+
+def test_analyze_endpoint(client, tmp_path):
+    from benchmarks import write_format_file
+    path = tmp_path / 'run.dat'
+    write_format_file(str(path), 'ppms', 5000)
+    response = client.post('/analyze/ppms', content_type='multipart/form-data', data={
+        'pressure': '1', 'lastModified': '', 'curvePoints': '20', 'datafile': (open(path, 'rb'), 'run.dat')})
+    assert response.status_code == 200
+    curves = response.get_json()['curves']
+    assert curves and all(c['resistive'] for c in curves)
+    assert all(len(c['normalized']['t']) == 20 for c in curves)
+    bad = client.post('/analyze/ppms', content_type='multipart/form-data', data={
+        'pressure': '1', 'smoothPoints': 'x', 'datafile': (open(path, 'rb'), 'run.dat')})
+    assert bad.status_code == 400
@@ -0,0 +1,50 @@
+import pytest
+from benchmarks import write_format_file
+
+@pytest.fixture(scope='module')
+def ppms_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('data') / 'run.dat'
+    write_format_file(str(path), 'ppms', 5000)
+    return path
+
+def post(client, route, path, **form):
+    data = dict({'pressure': '1', 'lastModified': '2025-01-01'}, **form)
+    data['datafile'] = (open(path, 'rb'), 'run.dat')
+    return client.post(f'/{route}', data=data, content_type='multipart/form-data')
+
+# --- Routes ---
+def test_route_renders_on_the_worker(client, ppms_file, fo):
+    response = post(client, 'ppms', ppms_file, createPPT='false', pointBudget='500')
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['message'] == 'Processed successfully.'
+    assert fo.counts['new_graph'] >= 1
+
+@pytest.mark.parametrize('field, value, message', [
+    ('pointBudget', 'abc', 'pointBudget must be a number'),
+    ('pointBudget', '-5', 'pointBudget must be 0 (off) or more'),
+    ('pptDpi', '0', 'pptDpi must be positive'),
+    ('pptDpi', '-300', 'pptDpi must be positive'),
+    ('decimation', 'cubic', 'Unknown decimation'),
+])
+def test_bad_params_answer_400(client, ppms_file, field, value, message):
+    response = post(client, 'ppms', ppms_file, **{field: value})
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith(message)
+
+def test_missing_file_answers_400(client):
+    response = client.post('/ppms', data={'pressure': '1'}, content_type='multipart/form-data')
+    assert response.status_code == 400 and response.get_json()['error'] == 'Missing file: datafile'
+
+# --- Readiness ---
+def test_ready_once_origin_and_imports_are_up(client, app_module, monkeypatch):
+    app_module.prewarm()
+    assert app_module.worker.ready(timeout=5)
+    app_module.warm_imports()
+    body = client.get('/ready').get_json()
+    assert body['ready'] and body['origin'] and body['imports'] and body['import_error'] is None
+    monkeypatch.setattr(app_module, 'WARM_MODULES', ('not_a_module',))
+    monkeypatch.setitem(app_module.startup, 'import_error', None)
+    app_module.warm_imports()
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()['ready'] is False and 'not_a_module' in response.get_json()['import_error']
@@ -0,0 +1,47 @@
+import json
+import os
+from batch import directory_jobs, main, manifest_jobs, run_batch
+from benchmarks import write_format_file
+
+def touch(folder, *names):
+    for name in names: (folder / name).write_text('')
+
+def test_directory_jobs_pair_files_by_stem(tmp_path):
+    touch(tmp_path, 'run1_cooling.dat', 'run1_warming.dat', 'Run2-Cooling.dat', 'Run2-Warming.dat',
+          'run3_cooling.dat', 'notes.txt')
+    jobs = directory_jobs('dewar', str(tmp_path), '*.dat')
+    assert [name for name, _, _ in jobs] == ['Run2', 'run1']  # run3 has no warming file
+    assert jobs[1][1] == {'cooling': str(tmp_path / 'run1_cooling.dat'), 'warming': str(tmp_path / 'run1_warming.dat')}
+    single = directory_jobs('ppms', str(tmp_path), '*.dat')
+    assert len(single) == 5 and single[0][1] == {'datafile': str(tmp_path / 'Run2-Cooling.dat')}
+
+def test_manifest_jobs(tmp_path):
+    (tmp_path / 'jobs.jsonl').write_text(json.dumps({'name': 'p1', 'datafile': 'a.dat', 'pressure': 1.2}) + '\n\n'
+                                          + json.dumps({'datafile': 'b.dat'}) + '\n')
+    jobs = manifest_jobs('ppms', str(tmp_path / 'jobs.jsonl'))
+    assert jobs == [('p1', {'datafile': str(tmp_path / 'a.dat')}, {'pressure': '1.2'}),
+                    ('b', {'datafile': str(tmp_path / 'b.dat')}, {})]
+
+def test_run_batch_without_origin_writes_csv(tmp_path):
+    data = tmp_path / 'data'
+    data.mkdir()
+    for name in ('a', 'b'): write_format_file(str(data / f'{name}.dat'), 'ppms', 2000)
+    (data / 'broken.dat').write_text('not a measurement\n')
+    jobs = [(name, paths, {'pressure': '1', 'createPPT': 'false', 'pointBudget': '100'})
+            for name, paths, _ in directory_jobs('ppms', str(data))]
+    out = tmp_path / 'out'
+    results = run_batch('ppms', jobs, str(out), workers=2, log=lambda msg: None)
+    assert [r['name'] for r in results] == ['a', 'b', 'broken']
+    assert results[2]['error'] == 'ValueError: Column index out of bounds.'
+    assert results[0]['error'] is None and results[0]['points_after'] < results[0]['points_before']
+    summary = json.loads((out / 'a' / 'summary.json').read_text())
+    assert summary['sheets'] == results[0]['sheets']
+    assert sorted(os.listdir(out / 'a')) == sorted([s['name'] + '.csv' for s in summary['sheets']] + ['summary.json'])
+    assert (out / 'summary.csv').read_text().count('\n') == 4
+
+def test_cli_backend_none(tmp_path, capsys):
+    write_format_file(str(tmp_path / 'a.dat'), 'ppms', 500)
+    code = main(['ppms', str(tmp_path), '--pattern', '*.dat', '--backend', 'none', '--workers', '1',
+                 '--out', str(tmp_path / 'out'), '--set', 'pressure=2', '--set', 'createPPT=false'])
+    assert code == 0 and (tmp_path / 'out' / 'a' / 'summary.json').exists()
+    assert '1 jobs in' in capsys.readouterr().out
@@ -0,0 +1,33 @@
+import pytest
+from benchmarks import write_format_file
+from live_tail import FileTail, LiveSession, LiveWatch
+
+def test_file_tail_reads_only_complete_rows(tmp_path):
+    path = tmp_path / 'run.dat'
+    write_format_file(str(path), 'ppms', 1000)
+    data = path.read_bytes()
+    cut = data.index(b'\n', len(data) // 2) + 10  # mid-row
+    path.write_bytes(data[:cut])
+    tail = FileTail(str(path), 'ppms')
+    first = tail.read()
+    with open(path, 'ab') as fh: fh.write(data[cut:])
+    second = tail.read()
+    assert len(first) + len(second) == 1000 and tail.read() is None
+    path.write_bytes(data[:cut])  # truncated: read again from the top
+    assert len(tail.read()) == len(first) and tail.resets == 1
+
+def test_watch_keeps_rows_until_origin_takes_them(tmp_path, fo):
+    path = tmp_path / 'run.dat'
+    write_format_file(str(path), 'ppms', 1000)
+    calls = []
+    def run(fn):
+        calls.append(fn)
+        if len(calls) == 1: raise RuntimeError('Origin is busy')
+        return fn(fo)
+    watch = LiveWatch(LiveSession(str(path), 'ppms'), run)
+    with pytest.raises(RuntimeError):
+        watch.poll()
+    assert watch.status()['pending'] == 1000
+    assert watch.poll() == 1000
+    assert watch.status()['pending'] == 0 and watch.poll() == 0
+    assert watch.session.status()['sheets'] >= 1
@@ -0,0 +1,114 @@
+import io
+import pandas as pd
+import pytest
+import loaders
+from benchmarks import legacy_load_data, write_format_file
+from loaders import FORMATS, load_data, load_format, sniff_layout
+from parse_cache import ParseCache
+
+def sample_file(tmp_path, fmt, rows=2000, groups=1):
+    path = tmp_path / f'{fmt}.dat'
+    write_format_file(str(path), fmt, rows, groups)
+    return path.read_bytes()
+
+def legacy(data, fmt):
+    spec = FORMATS[fmt]
+    return legacy_load_data(io.BytesIO(data), spec['skiprows'], spec['usecols'], spec['colnames'])
+
+# --- Layout Sniffing ---
+def test_sniff_finds_header_after_data_marker():
+    data = b'[Header]\nTITLE, x\n[Data]\nTime,Temp (K),R\n1,2,3\n'
+    layout = sniff_layout(io.BytesIO(data), -1)
+    assert layout.columns == ['Time', 'Temp (K)', 'R'] and data[layout.data_offset:] == b'1,2,3\n'
+    layout = sniff_layout(io.BytesIO(b'a\tb\n1\t2\n'), 0)
+    assert (layout.delimiter, layout.columns, layout.data_offset) == ('\t', ['a', 'b'], 4)
+
+@pytest.mark.parametrize('data, skiprows', [
+    (b'[Header]\nTITLE, x\n[Data]\n\n\r\nTime,Temp,R\n1,2,3\n4,5,6\n', -1),
+    (b'h1\nh2\n\nTime,Temp,R\n1,2,3\n4,5,6\n', 2),
+    (b'\nTime,Temp,R\n1,2,3\n4,5,6\n', 0),
+])
+def test_blank_lines_before_the_header_are_skipped(data, skiprows):
+    layout = sniff_layout(io.BytesIO(data), skiprows)
+    assert layout.columns == ['Time', 'Temp', 'R']
+    df = load_data(io.BytesIO(data), skiprows, [1, 2], ['Temperature', 'R1'])
+    ref = legacy_load_data(io.BytesIO(data), skiprows, [1, 2], ['Temperature', 'R1'])
+    pd.testing.assert_frame_equal(df, ref)
+
+def test_missing_column_is_reported():
+    with pytest.raises(ValueError, match='out of bounds'):
+        load_data(io.BytesIO(b'a,b\n1,2\n'), 0, [0, 5], ['x', 'y'])
+
+# --- Route Formats ---
+@pytest.mark.parametrize('fmt', sorted(FORMATS))
+def test_load_format_matches_legacy_loader(tmp_path, fmt):
+    data = sample_file(tmp_path, fmt, groups=3)
+    df, ref = load_format(io.BytesIO(data), fmt), legacy(data, fmt)
+    assert list(df.columns) == FORMATS[fmt]['colnames']
+    assert all(df[name].dtype == kind for name, kind in FORMATS[fmt]['dtypes'].items())
+    # The legacy loader infers int64 for whole-number columns; values must still agree.
+    pd.testing.assert_frame_equal(df, ref, check_dtype=False)
+    compact = load_format(io.BytesIO(data), fmt, compact=True)
+    assert all(compact[name].dtype == 'float32' for name in FORMATS[fmt]['dtypes'])
+    pd.testing.assert_frame_equal(compact, ref, check_dtype=False, rtol=1e-6)
+
+def test_text_rows_become_nan(tmp_path):
+    data = b'h1\nh2\nh3\n' + b'T,a,b,c\n' + b'1.5,1,2,3\nn/a,1,2,3\n2.5,4,5,6\n'
+    df = load_data(io.BytesIO(data), 3, [0, 2], ['Temperature', 'R1'], dtypes={'Temperature': 'float64'})
+    assert df['Temperature'].dtype == 'float64' and df['Temperature'].isna().tolist() == [False, True, False]
+    assert df['R1'].tolist() == [2, 2, 5]
+
+# --- Streaming ---
+def with_text_row(data, fmt, row):
+    """data with the temperature of data row `row` replaced by text."""
+    lines = data.split(b'\n')
+    start = next(i for i, line in enumerate(lines) if line[:1].isdigit())
+    fields = lines[start + row].split(b',')
+    spec = FORMATS[fmt]
+    fields[spec['usecols'][spec['colnames'].index('Temperature')]] = b'n/a'
+    lines[start + row] = b','.join(fields)
+    return b'\n'.join(lines)
+
+def numeric_temperature(df):
+    return df[pd.to_numeric(df['Temperature'], errors='coerce').notnull()]
+
+def read(data, fmt, stream, monkeypatch, **kw):
+    monkeypatch.setattr(loaders, 'STREAM_MIN_BYTES', 0 if stream else 1 << 62)
+    return loaders.read_upload(io.BytesIO(data), fmt, chunksize=3000, **kw)
+
+def assert_same(single, streamed):
+    if isinstance(single, list):
+        assert [value for value, _ in streamed] == [value for value, _ in single]
+        for (_, a), (_, b) in zip(single, streamed): assert_same(a, b)
+        return
+    pd.testing.assert_frame_equal(single.reset_index(drop=True), streamed.reset_index(drop=True))
+
+@pytest.mark.parametrize('fmt, by, prepare, groups, text_row', [
+    ('dewar', None, None, 1, None),
+    ('mpms', None, None, 1, 7000),
+    ('ppms_magnetic', 'MagneticField', None, 4, None),
+    ('current_effect', 'Current', numeric_temperature, 5, None),
+    ('current_effect', 'Current', numeric_temperature, 5, 7000),
+])
+def test_streamed_matches_single_call(tmp_path, monkeypatch, fmt, by, prepare, groups, text_row):
+    data = sample_file(tmp_path, fmt, 10_000, groups)
+    if text_row is not None: data = with_text_row(data, fmt, text_row)
+    single = read(data, fmt, False, monkeypatch, by=by, prepare=prepare)
+    streamed = read(data, fmt, True, monkeypatch, by=by, prepare=prepare)
+    assert_same(single, streamed)
+    if text_row is not None:
+        frame = streamed if by is None else pd.concat([sub for _, sub in streamed])
+        assert frame['Temperature'].dtype.kind == 'f'
+        assert len(frame) == 10_000 - (prepare is not None)
+    if by: assert len(streamed) == groups
+
+def test_streamed_cache_hit_matches_miss(tmp_path, monkeypatch):
+    data = sample_file(tmp_path, 'current_effect', 10_000, 5)
+    cache = ParseCache(str(tmp_path / 'cache'), 64 * 2 ** 20)
+    miss = read(data, 'current_effect', True, monkeypatch, by='Current', prepare=numeric_temperature, cache=cache)
+    hit = read(data, 'current_effect', True, monkeypatch, by='Current', prepare=numeric_temperature, cache=cache)
+    single = read(data, 'current_effect', False, monkeypatch, by='Current', prepare=numeric_temperature, cache=cache)
+    assert_same(miss, hit)
+    assert_same(miss, single)
+    stats = cache.stats()
+    assert (stats['stores'], stats['hits'], stats['entries']) == (1, 2, 1)
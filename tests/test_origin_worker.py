@@ -0,0 +1,62 @@
+import threading
+from origin_worker import FakeBackend, OriginWorker
+
+class FlakyBackend(FakeBackend):
+    """Fails to attach the first `failures` times."""
+    def __init__(self, failures=1):
+        super().__init__()
+        self.failures = failures
+
+    def attach(self):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('Origin is not running')
+        super().attach()
+
+def test_jobs_run_in_order_on_one_thread(fo):
+    worker = OriginWorker(FakeBackend())
+    seen = []
+    ids = [worker.submit(lambda i=i: seen.append((i, threading.current_thread().name)) or i, f'job{i}')
+           for i in range(5)]
+    results = [worker.wait(job_id, timeout=5) for job_id in ids]
+    worker.stop(timeout=5)
+    assert [i for i, _ in seen] == list(range(5))
+    assert {name for _, name in seen} == {'origin-worker'}
+    assert [r['state'] for r in results] == ['done'] * 5
+    assert [r['result'] for r in results] == list(range(5))
+    assert all(r['queue_seconds'] >= 0 and r['run_seconds'] >= 0 for r in results)
+    assert fo.counts['attach'] == 1 and fo.counts['detach'] == 1
+
+def test_failing_job_does_not_stop_the_worker(fo):
+    worker = OriginWorker(FakeBackend())
+    bad = worker.submit(lambda: 1 / 0, 'bad')
+    good = worker.submit(lambda: 'ok', 'good')
+    assert worker.wait(bad, timeout=5)['state'] == 'error'
+    assert 'division by zero' in worker.status(bad)['error']
+    assert worker.wait(good, timeout=5)['result'] == 'ok'
+    worker.stop(timeout=5)
+
+def test_progress_and_history(fo):
+    worker = OriginWorker(FakeBackend(), history=3)
+    job_id = worker.submit(lambda: worker.progress('halfway') or worker.current['progress'])
+    assert worker.wait(job_id, timeout=5)['result'] == 'halfway'
+    ids = [worker.wait(worker.submit(lambda: None), timeout=5)['id'] for _ in range(5)]
+    worker.stop(timeout=5)
+    # Finished jobs beyond `history` are dropped, oldest first.
+    assert list(worker.jobs) == ids[-3:]
+    assert worker.status('missing') is None
+
+def test_attach_failure_fails_queued_jobs_then_recovers(fo):
+    worker = OriginWorker(FlakyBackend(failures=1))
+    gate = threading.Event()
+    first = worker.submit(lambda: gate.wait(5), 'first')
+    status = worker.wait(first, timeout=5)
+    assert status['state'] == 'error'
+    assert status['error'].startswith('Origin attach failed: Origin is not running')
+    assert not worker.ready(timeout=5)
+    assert worker.attach_error == 'Origin is not running'
+    # The next submit starts a fresh thread that attaches again.
+    second = worker.submit(lambda: 'attached', 'second')
+    assert worker.wait(second, timeout=5)['result'] == 'attached'
+    assert worker.ready(timeout=5)
+    worker.stop(timeout=5)
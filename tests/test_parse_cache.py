@@ -0,0 +1,104 @@
+import errno
+import io
+import os
+import time
+import numpy as np
+import pandas as pd
+import parse_cache
+from loaders import load_data
+from parse_cache import ParseCache
+
+def frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Temperature': rng.random(rows), 'R1': rng.random(rows).astype(np.float32),
+                         'Count': np.arange(rows)})
+
+def test_round_trip(tmp_path):
+    cache = ParseCache(str(tmp_path), 2 ** 20)
+    df = frame(1000)
+    assert cache.get('a') is None
+    assert cache.put('a', df)
+    pd.testing.assert_frame_equal(cache.get('a'), df)
+    mapped = cache.get('a', copy=False)
+    assert mapped.equals(df)
+    assert not mapped['Temperature'].to_numpy().flags.writeable
+    assert not cache.put('a', df)  # already stored
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['stores'], stats['entries']) == (2, 1, 1, 1)
+
+def test_least_recently_used_is_evicted(tmp_path):
+    size = 1000 * (8 + 4 + 8)
+    cache = ParseCache(str(tmp_path), int(size * 3.5))
+    for key in 'abc': cache.put(key, frame(1000))
+    cache.get('a')  # a is now the most recently used
+    cache.put('d', frame(1000))
+    assert list(cache.entries) == ['c', 'a', 'd']
+    assert 'b' not in cache.entries and not os.path.exists(tmp_path / 'b')
+    assert cache.get('b') is None and cache.get('a') is not None
+    assert cache.stats()['bytes'] <= cache.max_bytes
+    assert cache.stats()['evictions'] == 1
+
+def test_entries_survive_a_restart_in_lru_order(tmp_path):
+    cache = ParseCache(str(tmp_path), 2 ** 20)
+    cache.put('a', frame(10))
+    cache.put('b', frame(10))
+    os.utime(tmp_path / 'a' / 'meta.json', (1, 1))
+    reopened = ParseCache(str(tmp_path), 2 ** 20)
+    assert list(reopened.entries) == ['a', 'b']
+    pd.testing.assert_frame_equal(reopened.get('b'), frame(10))
+
+def test_oversized_and_non_numeric_frames_are_not_stored(tmp_path):
+    cache = ParseCache(str(tmp_path), 1000)
+    assert not cache.put('big', frame(1000))
+    assert not cache.put('text', pd.DataFrame({'Temperature': ['a', 'b']}))
+    assert cache.stats()['entries'] == 0 and cache.stats()['skipped'] == 1
+    assert os.listdir(tmp_path) == []
+
+def test_writer_gives_up_when_chunks_disagree(tmp_path):
+    cache = ParseCache(str(tmp_path), 2 ** 20)
+    writer = cache.writer('k')
+    writer.add(frame(10))
+    writer.add(frame(10).astype({'Count': np.float64}))
+    assert not writer.commit()
+    assert cache.get('k') is None and os.listdir(tmp_path) == []
+    writer = cache.writer('k')
+    writer.add(frame(10))
+    writer.add(frame(5, seed=1))
+    assert writer.commit()
+    pd.testing.assert_frame_equal(cache.get('k'), pd.concat([frame(10), frame(5, seed=1)], ignore_index=True))
+
+def test_invalidate_and_broken_entries(tmp_path):
+    cache = ParseCache(str(tmp_path), 2 ** 20)
+    cache.put('abc-1', frame(10))
+    cache.put('abc-2', frame(10))
+    cache.put('xyz-1', frame(10))
+    assert cache.invalidate('abc') == 2
+    os.remove(tmp_path / 'xyz-1' / '0.npy')
+    assert cache.get('xyz-1') is None
+    assert cache.stats()['entries'] == 0
+
+def test_new_instance_leaves_live_writers_alone(tmp_path):
+    first = ParseCache(str(tmp_path), 2 ** 20)
+    writer = first.writer('k')
+    writer.add(frame(10))
+    stale = tmp_path / 'tmp-crashed'
+    stale.mkdir()
+    old = time.time() - parse_cache.TMP_MAX_AGE - 60
+    os.utime(stale, (old, old))
+    ParseCache(str(tmp_path), 2 ** 20)
+    assert not stale.exists()
+    assert writer.commit()
+    pd.testing.assert_frame_equal(first.get('k'), frame(10))
+
+def test_disk_errors_skip_caching(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path), 2 ** 20)
+    def full(*args, **kw): raise OSError(errno.ENOSPC, 'No space left on device')
+    monkeypatch.setattr(parse_cache.json, 'dump', full)
+    assert not cache.put('a', frame(10))
+    monkeypatch.setattr(parse_cache.os, 'makedirs', full)
+    assert not cache.put('b', frame(10))
+    assert cache.stats()['skipped'] == 2 and cache.stats()['entries'] == 0
+    assert os.listdir(tmp_path) == []
+    # The parse itself still succeeds.
+    df = load_data(io.BytesIO(b'a,b\n1,2\n3,4\n'), 0, [0, 1], ['x', 'y'], cache=cache)
+    assert df['y'].tolist() == [2, 4]
@@ -0,0 +1,98 @@
+import json
+import os
+import struct
+import numpy as np
+import pytest
+import preview
+from benchmarks import write_format_file
+
+def graphs():
+    x = np.linspace(2, 300, 50, dtype=np.float32)
+    y = np.sin(x).astype(np.float32)
+    y[3] = np.nan
+    return [{'x_title': 'T (K)', 'y_title': 'R (Ω)', 'legend': '', 'label': 'run',
+             'curves': [{'name': 'Cooling', 'color': 'blue', 'x': x, 'y': y},
+                        {'name': 'Warming', 'color': preview._color(2), 'x': x[:0], 'y': y[:0]}]}]
+
+def read_binary(data):
+    """Inverse of preview.to_binary: (header, [[(x, y)] per graph])."""
+    assert data[:4] == preview.BINARY_MAGIC
+    size, = struct.unpack('<I', data[4:8])
+    header = json.loads(data[8:8 + size])
+    pos, out = 8 + size, []
+    for graph in header['graphs']:
+        curves = []
+        for curve in graph['curves']:
+            n = curve['points'] * 4
+            x = np.frombuffer(data[pos:pos + n], '<f4')
+            y = np.frombuffer(data[pos + n:pos + 2 * n], '<f4')
+            curves.append((x, y))
+            pos += 2 * n
+        out.append(curves)
+    assert pos == len(data)
+    return header, out
+
+# --- Encodings ---
+def test_binary_round_trip():
+    header, curves = read_binary(preview.to_binary(graphs(), {'route': 'ppms'}))
+    assert header['route'] == 'ppms' and header['graphs'][0]['y_title'] == 'R (Ω)'
+    assert [c['points'] for c in header['graphs'][0]['curves']] == [50, 0]
+    assert header['graphs'][0]['curves'][1]['color'] == preview.PALETTE[2]
+    for (x, y), curve in zip(curves[0], graphs()[0]['curves']):
+        np.testing.assert_array_equal(x, curve['x'])
+        np.testing.assert_array_equal(y, curve['y'])  # NaN compares equal here
+
+def test_json_matches_binary():
+    out = preview.to_json(graphs())
+    curve = out[0]['curves'][0]
+    assert curve['y'][3] is None and len(curve['x']) == curve['points'] == 50
+    np.testing.assert_allclose(np.array(curve['y'], dtype=float), graphs()[0]['curves'][0]['y'], rtol=1e-6)
+    json.dumps(out)  # no NaN left
+
+def test_png_thumbnail():
+    pytest.importorskip('PIL')
+    data = preview.to_png(graphs()[0])
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+
+# --- Endpoints ---
+@pytest.fixture(scope='module')
+def ppms_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('data') / 'run.dat'
+    write_format_file(str(path), 'ppms', 5000)
+    return path
+
+def post_preview(client, path, **form):
+    data = dict({'pressure': '1', 'lastModified': ''}, **form)
+    data['datafile'] = (open(path, 'rb'), 'run.dat')
+    return client.post('/preview/ppms', data=data, content_type='multipart/form-data')
+
+def test_preview_formats(client, ppms_file):
+    body = post_preview(client, ppms_file, previewPoints='100').get_json()
+    assert body['token'] is None and body['points']['after'] <= body['points']['before']
+    # A sheet feeding both channel graphs keeps the union of their points.
+    assert all(c['points'] <= 2 * 100 for g in body['graphs'] for c in g['curves'])
+    header, curves = read_binary(post_preview(client, ppms_file, format='binary').data)
+    assert len(curves) == len(body['graphs'])
+    assert post_preview(client, ppms_file, format='svg').status_code == 400
+    assert post_preview(client, ppms_file, previewPoints='many').status_code == 400
+
+def test_keep_confirm_and_discard(client, app_module, ppms_file, fo):
+    token = post_preview(client, ppms_file, keep='true').get_json()['token']
+    folder = app_module.previews[token]['folder']
+    # Bad overrides keep the preview for a corrected confirm.
+    assert client.post(f'/preview/{token}/confirm', data={'pointBudget': '-1'}).status_code == 400
+    response = client.post(f'/preview/{token}/confirm', data={'createPPT': 'false'})
+    assert response.status_code == 200 and fo.counts['new_graph'] >= 1
+    assert not os.path.exists(folder)
+    assert client.post(f'/preview/{token}/confirm').status_code == 404
+    token = post_preview(client, ppms_file, keep='true').get_json()['token']
+    folder = app_module.previews[token]['folder']
+    assert client.delete(f'/preview/{token}').status_code == 200 and not os.path.exists(folder)
+    assert client.delete(f'/preview/{token}').status_code == 404
+
+def test_kept_previews_are_bounded(client, app_module, ppms_file):
+    tokens = [post_preview(client, ppms_file, keep='true').get_json()['token']
+              for _ in range(app_module.PREVIEW_KEEP + 2)]
+    assert list(app_module.previews)[-app_module.PREVIEW_KEEP:] == tokens[-app_module.PREVIEW_KEEP:]
+    assert tokens[0] not in app_module.previews
+    for token in tokens[2:]: client.delete(f'/preview/{token}')
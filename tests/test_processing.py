@@ -0,0 +1,137 @@
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from processing import (GroupAccumulator, SweepTracker, decimate_indices, lttb_indices, minmax_indices,
+                        partition_by, segment_sweeps)
+
+def best_time(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+def noisy_ramp(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.linspace(2, 300, n) + rng.normal(0, 1.0, n)
+
+def test_segment_sweeps_edges():
+    assert segment_sweeps([]) == []
+    assert [s.direction for s in segment_sweeps([np.nan] * 5)] == ['flat']
+    assert [s.direction for s in segment_sweeps([300.0, 300.1, 300.2])] == ['flat']
+    t = np.r_[np.linspace(300, 2, 100), np.linspace(2, 300, 100)]
+    assert [tuple(s) for s in segment_sweeps(t)] == [(0, 100, 'cooling'), (100, 200, 'warming')]
+
+def test_segment_sweeps_fills_nan_and_keeps_noise_in_the_sweep():
+    t = np.r_[np.linspace(300, 2, 100), np.linspace(2, 300, 100)]
+    t[[0, 50, 150]] = np.nan
+    t[20] += 0.3  # below the tolerance
+    assert [tuple(s) for s in segment_sweeps(t, 0.5)] == [(0, 100, 'cooling'), (100, 200, 'warming')]
+
+def test_segments_cover_every_row():
+    t = noisy_ramp(20_000)
+    segments = segment_sweeps(t, 0.5)
+    assert segments[0].start == 0 and segments[-1].stop == len(t)
+    assert all(a.stop == b.start and a.direction != b.direction for a, b in zip(segments, segments[1:]))
+
+def test_many_reversals_stay_linear():
+    small, large = noisy_ramp(25_000), noisy_ramp(200_000)
+    assert len(segment_sweeps(large, 0.5)) > 5_000
+    # 8x the rows: linear is ~8x the time, the old quadratic scan was ~64x.
+    ratio = best_time(lambda: segment_sweeps(large, 0.5)) / best_time(lambda: segment_sweeps(small, 0.5))
+    assert ratio < 24
+
+# --- SweepTracker ---
+def random_walk(seed, n, step, nans=False):
+    rng = np.random.default_rng(seed)
+    t = np.cumsum(rng.normal(0, step, n)) + 300
+    if nans:
+        t[rng.random(n) < 0.05] = np.nan
+        t[:int(rng.integers(0, 20))] = np.nan
+    return t
+
+def fed(t, size, tolerance):
+    """Feed t in chunks of `size`; returns ({ordinal: Segment across chunks}, flat rows)."""
+    tracker = SweepTracker(tolerance)
+    sweeps, flat = {}, 0
+    for start in range(0, len(t), size):
+        for seg, ordinal in tracker.feed(t[start:start + size]):
+            if seg.direction == 'flat':
+                assert not sweeps
+                flat = seg.stop
+            elif ordinal in sweeps:
+                assert sweeps[ordinal].stop == seg.start and sweeps[ordinal].direction == seg.direction
+                sweeps[ordinal] = sweeps[ordinal]._replace(stop=seg.stop)
+            else:
+                sweeps[ordinal] = seg
+    return sweeps, flat
+
+@pytest.mark.parametrize('seed', range(40))
+def test_tracker_matches_segment_sweeps(seed):
+    rng = np.random.default_rng(seed)
+    tolerance = float(rng.choice([0.1, 0.5, 2.0]))
+    t = random_walk(seed, int(rng.integers(1, 3000)), float(rng.choice([0.05, 0.3, 1.0])), nans=seed % 2 == 0)
+    ref = segment_sweeps(t, tolerance)
+    assert [seg for seg, _ in SweepTracker(tolerance).feed(t)] == ref
+    for size in (1, 7, 100, 1000):
+        sweeps, flat = fed(t, size, tolerance)
+        assert flat % size == 0 or flat == len(t)
+        if not sweeps: continue
+        # Same sweeps from the first chunk that moved; a boundary only ever moves forward to a chunk edge.
+        assert sorted(sweeps) == list(range(min(sweeps), len(ref)))
+        assert sweeps[min(sweeps)].start == flat
+        for ordinal, seg in sweeps.items():
+            assert seg.direction == ref[ordinal].direction
+            assert seg.stop == ref[ordinal].stop or (seg.stop > ref[ordinal].stop and seg.stop % size == 0)
+
+# --- Decimation ---
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+@pytest.mark.parametrize('n, budget', [(10, 100), (1000, 50), (1001, 4), (100_000, 1000)])
+def test_decimation_keeps_ends_within_budget(method, n, budget):
+    rng = np.random.default_rng(n)
+    x = np.linspace(2, 300, n)
+    y = np.sin(x / 10) + rng.normal(0, 0.1, n)
+    keep = decimate_indices(x, y, budget, method)
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert (np.diff(keep) > 0).all()
+    assert len(keep) == n if n <= budget else len(keep) <= budget
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_decimation_handles_nan(method):
+    x = np.linspace(0, 1, 5000)
+    y = np.cos(x * 20)
+    y[::7] = np.nan
+    y[2000:2500] = np.nan  # a whole bucket or more of gaps
+    keep = decimate_indices(x, y, 200, method)
+    assert keep[0] == 0 and keep[-1] == len(y) - 1 and len(keep) <= 200
+    assert np.isfinite(y[keep[1:-1]]).sum() > len(keep) // 2
+
+def test_minmax_keeps_the_extremes():
+    y = np.zeros(10_000)
+    y[1234], y[8765] = 5.0, -5.0
+    keep = minmax_indices(np.arange(len(y)), y, 100)
+    assert 1234 in keep and 8765 in keep
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(10_000)
+    y[4321] = 10.0
+    assert 4321 in lttb_indices(np.arange(len(y)), y, 100)
+
+# --- Partitioning ---
+def test_partition_by_keeps_first_appearance_order():
+    df = pd.DataFrame({'Field': [2.0, 2.0, 1.0, np.nan, 2.0, 3.0], 'R': range(6)})
+    groups = partition_by(df, 'Field')
+    assert [value for value, _ in groups] == [2.0, 1.0, 3.0]
+    assert [sub['R'].tolist() for _, sub in groups] == [[0, 1, 4], [2], [5]]
+
+def test_group_accumulator_matches_partition_by():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'Current': rng.choice([0.5, 1.0, np.nan, 1.5], 1000), 'R1': rng.random(1000)})
+    acc = GroupAccumulator('Current')
+    for start in range(0, len(df), 64): acc.add(df.iloc[start:start + 64])
+    got, ref = acc.frames(), partition_by(df, 'Current')
+    assert [value for value, _ in got] == [value for value, _ in ref]
+    for (_, a), (_, b) in zip(got, ref):
+        pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True))
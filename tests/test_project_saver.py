@@ -0,0 +1,109 @@
+import os
+import time
+import pytest
+import project_saver
+from project_saver import ProjectSaver
+
+def saver_for(path, fo, **kw):
+    kw.setdefault('delay', 0.05)
+    return ProjectSaver(str(path), lambda fn: fn(fo), **kw)
+
+def test_burst_of_requests_is_saved_once(tmp_path, fo):
+    saver = saver_for(tmp_path / 'p.opju', fo, delay=0.2)
+    for _ in range(20): saver.request()
+    assert saver.flush(timeout=5)
+    status = saver.status()
+    assert (status['state'], status['saves'], status['pending']) == ('idle', 1, 0)
+    assert status['last']['coalesced'] == 20 and status['last']['error'] is None
+    assert fo.counts['save'] == 1
+    saver.request()
+    assert saver.flush(timeout=5) and fo.counts['save'] == 2
+    assert not os.path.exists(saver.backup)
+    saver.stop(timeout=5)
+
+def test_max_delay_bounds_a_long_burst(tmp_path, fo):
+    saver = saver_for(tmp_path / 'p.opju', fo, delay=0.05, max_delay=0.2)
+    end = time.time() + 0.6
+    while time.time() < end:
+        saver.request()
+        time.sleep(0.01)
+    assert saver.flush(timeout=5)
+    assert 2 <= fo.counts['save'] < 10
+    saver.stop(timeout=5)
+
+def test_locked_target_is_retried_with_backoff(tmp_path, fo, monkeypatch):
+    path = tmp_path / 'p.opju'
+    path.write_bytes(b'old')
+    replace, locked = os.replace, [2]
+    def flaky_replace(src, dst):
+        if src == str(path) and locked[0]:
+            locked[0] -= 1
+            raise PermissionError(13, 'Permission denied')
+        return replace(src, dst)
+    monkeypatch.setattr(project_saver.os, 'replace', flaky_replace)
+    saver = saver_for(path, fo, retries=3, backoff=0.01)
+    saver.request()
+    assert saver.flush(timeout=5)
+    assert saver.status()['last']['attempts'] == 3
+    assert path.read_bytes() == b'fake opju\n'
+    saver.stop(timeout=5)
+
+def test_target_locked_for_good_keeps_the_old_file(tmp_path, fo, monkeypatch):
+    path = tmp_path / 'p.opju'
+    path.write_bytes(b'old')
+    replace = os.replace
+    def locked_replace(src, dst):
+        if src == str(path): raise PermissionError(13, 'Permission denied')
+        return replace(src, dst)
+    monkeypatch.setattr(project_saver.os, 'replace', locked_replace)
+    saver = saver_for(path, fo, retries=2, backoff=0.01)
+    saver.request()
+    assert not saver.flush(timeout=5)
+    status = saver.status()
+    assert status['state'] == 'error' and status['failures'] == 1
+    assert status['last']['attempts'] == 3 and 'p.opju is locked' in status['last']['error']
+    assert fo.counts['save'] == 0 and path.read_bytes() == b'old'
+    saver.stop(timeout=5)
+
+@pytest.mark.parametrize('fail', ['raise', 'nothing'])
+def test_failed_save_restores_the_previous_file(tmp_path, fo, fail):
+    path = tmp_path / 'p.opju'
+    path.write_bytes(b'old')
+    def run(fn):
+        if fail == 'raise': raise RuntimeError('Origin crashed')
+    saver = ProjectSaver(str(path), run, delay=0.05, retries=3, backoff=0.01)
+    saver.request()
+    assert not saver.flush(timeout=5)
+    last = saver.status()['last']
+    assert last['attempts'] == 1  # only a locked target is retried
+    assert last['error'] == ('Origin crashed' if fail == 'raise' else f'Origin wrote no project file at {path}')
+    assert path.read_bytes() == b'old' and not os.path.exists(saver.backup)
+    # The next request tries again.
+    saver.run = lambda fn: fn(fo)
+    saver.request()
+    assert saver.flush(timeout=5) and path.read_bytes() == b'fake opju\n'
+    saver.stop(timeout=5)
+
+def test_stop_saves_what_is_pending(tmp_path, fo):
+    saver = saver_for(tmp_path / 'p.opju', fo, delay=5)
+    saver.request()
+    saver.stop(timeout=5)
+    assert fo.counts['save'] == 1 and not saver.thread.is_alive()
+
+def test_backup_left_by_a_crash_is_put_back(tmp_path, fo):
+    path = tmp_path / 'p.opju'
+    (tmp_path / 'p.previous.opju').write_bytes(b'old')
+    saver = saver_for(path, fo)
+    assert path.read_bytes() == b'old' and not os.path.exists(saver.backup)
+    status = saver.status()
+    assert status['recovered'] and status['previous'] == str(tmp_path / 'p.previous.opju')
+    # Both files present: the target is newer, nothing is touched.
+    (tmp_path / 'p.previous.opju').write_bytes(b'older')
+    assert not saver_for(path, fo).status()['recovered'] and path.read_bytes() == b'old'
+
+def test_project_endpoint(client, app_module):
+    body = client.get('/project').get_json()
+    assert body['path'].endswith('Origin_Project.opju') and body['previous'].endswith('Origin_Project.previous.opju')
+    response = client.post('/project?wait=5')
+    assert response.status_code == 200 and response.get_json()['saves'] >= 1
+    assert client.post('/project?wait=abc').status_code == 400
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+from render_plan import RenderPlan, execute_plan, graph_script, replay_plan
+
+def make_plan(graphs=2):
+    plan = RenderPlan()
+    df = pd.DataFrame({'T': np.linspace(2, 300, 20), 'R': np.linspace(0, 1, 20)})
+    for g in range(graphs):
+        sheet = plan.sheet(f'run {g}', df)
+        graph = plan.graph('line', 'T (K)', 'R (Ω)', legend='\\l(1) Cooling\n\\l(2) Warming', label='Hg1223 "x"')
+        plan.plot(graph, sheet, 0, 1, 'blue', name='Cooling')
+        plan.plot(graph, sheet, 0, 1, 3)
+    return plan
+
+def test_graph_script_sets_every_property():
+    script = graph_script(make_plan(1).graphs[0]).split('\n')
+    assert script == ['xb.text$ = "T (K)";', 'yl.text$ = "R (Ω)";',
+                      'layer.plot = 1; set %C -c color(blue);', 'layer.plot = 2; set %C -c 4;',
+                      'legend.text$ = "\\l(1) Cooling\\n\\l(2) Warming";',
+                      'text.text$ = "Hg1223 \'x\'";', 'rescale;']
+
+def test_graph_script_skips_empty_legend_and_label():
+    plan = RenderPlan()
+    plan.graph('line', 'x', 'y')
+    assert graph_script(plan.graphs[0]) == 'xb.text$ = "x";\nyl.text$ = "y";\nrescale;'
+
+def test_each_graph_is_one_labtalk_call(fo):
+    plan = make_plan(3)
+    graphs = execute_plan(plan, fo)
+    assert len(graphs) == 3
+    assert fo.counts['lt_exec'] == 3
+    assert fo.counts['set:name'] == 3
+    for name in ('axis', 'label', 'set:title', 'set:text', 'set:color', 'rescale'):
+        assert fo.counts[name] == 0
+
+def test_replay_counts_calls(fo):
+    # Per graph: new_graph, two add_plot, one plot name, one script; plus sheets and one sync.
+    _, calls, _ = replay_plan(make_plan(3), fo)
+    assert calls == 3 * (2 + 5) + 1